@@ -50,6 +50,8 @@ CREATE TABLE IF NOT EXISTS campaigns (
 CREATE INDEX IF NOT EXISTS idx_campaigns_user_id ON campaigns(user_id);
 CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns(status);
 CREATE INDEX IF NOT EXISTS idx_campaigns_created_at ON campaigns(created_at DESC);
+-- Keyset pagination: a user's rows newest first, cursor on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_campaigns_user_created_id ON campaigns(user_id, created_at DESC, id DESC);
 
 -- ============================================================================
 -- 3. TRANSACTIONS TABLE
@@ -72,6 +74,10 @@ CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions(user_id);
 CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
 CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions(status);
 CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_at DESC);
+-- Keyset pagination: a user's rows newest first, cursor on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_transactions_user_created_id ON transactions(user_id, created_at DESC, id DESC);
+-- Lets get_transaction_summary aggregate a user's rows from the index alone
+CREATE INDEX IF NOT EXISTS idx_transactions_user_type_amount ON transactions(user_id, type) INCLUDE (amount);
 
 -- ============================================================================
 -- 4. STOCKS TABLE
@@ -95,6 +101,8 @@ CREATE TABLE IF NOT EXISTS stocks (
 CREATE INDEX IF NOT EXISTS idx_stocks_user_id ON stocks(user_id);
 CREATE INDEX IF NOT EXISTS idx_stocks_ticker ON stocks(ticker);
 CREATE INDEX IF NOT EXISTS idx_stocks_created_at ON stocks(created_at DESC);
+-- Keyset pagination: a user's rows newest first, cursor on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_stocks_user_created_id ON stocks(user_id, created_at DESC, id DESC);
 
 -- ============================================================================
 -- 5. LEARNING MODULES TABLE
@@ -118,6 +126,8 @@ CREATE TABLE IF NOT EXISTS learning_modules (
 CREATE INDEX IF NOT EXISTS idx_learning_modules_user_id ON learning_modules(user_id);
 CREATE INDEX IF NOT EXISTS idx_learning_modules_status ON learning_modules(status);
 CREATE INDEX IF NOT EXISTS idx_learning_modules_created_at ON learning_modules(created_at DESC);
+-- Keyset pagination: a user's rows newest first, cursor on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_learning_modules_user_created_id ON learning_modules(user_id, created_at DESC, id DESC);
 
 -- ============================================================================
 -- 6. USER PREFERENCES TABLE
@@ -156,6 +166,19 @@ CREATE TABLE IF NOT EXISTS conversation_history (
 CREATE INDEX IF NOT EXISTS idx_conversation_history_user_id ON conversation_history(user_id);
 CREATE INDEX IF NOT EXISTS idx_conversation_history_persona ON conversation_history(persona);
 CREATE INDEX IF NOT EXISTS idx_conversation_history_created_at ON conversation_history(created_at DESC);
+-- Serves "last N turns for this user and persona" without a sort
+CREATE INDEX IF NOT EXISTS idx_conversation_history_user_persona_created ON conversation_history(user_id, persona, created_at DESC);
+
+-- Rolling summary of turns that have dropped out of the prompt window
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    persona TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_through TIMESTAMP WITH TIME ZONE,
+    turns_summarized INTEGER DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, persona)
+);
 
 -- ============================================================================
 -- ROW LEVEL SECURITY (RLS) POLICIES
@@ -169,6 +192,7 @@ ALTER TABLE stocks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE learning_modules ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_preferences ENABLE ROW LEVEL SECURITY;
 ALTER TABLE conversation_history ENABLE ROW LEVEL SECURITY;
+ALTER TABLE conversation_summaries ENABLE ROW LEVEL SECURITY;
 
 -- User Profiles Policies
 CREATE POLICY "Users can view their own profile"
@@ -273,6 +297,10 @@ CREATE POLICY "Users can create conversation entries"
     ON conversation_history FOR INSERT
     WITH CHECK (auth.uid() = user_id);
 
+CREATE POLICY "Users can view their own conversation summaries"
+    ON conversation_summaries FOR SELECT
+    USING (auth.uid() = user_id);
+
 -- ============================================================================
 -- VIEWS (Optional - useful for analytics)
 -- ============================================================================
@@ -315,6 +343,28 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Per-user transaction totals, aggregated in the database so only the summary
+-- crosses the wire. Called from TransactionDB.get_summary via RPC; runs with the
+-- caller's rights, so RLS still limits anon/authenticated callers to their rows.
+CREATE OR REPLACE FUNCTION get_transaction_summary(p_user_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_earnings', COALESCE(SUM(total) FILTER (WHERE type IN ('affiliate_payout', 'dividend', 'deposit')), 0),
+        'total_expenses', COALESCE(SUM(total) FILTER (WHERE type NOT IN ('affiliate_payout', 'dividend', 'deposit')), 0),
+        'by_type', COALESCE(jsonb_object_agg(type, total), '{}'::jsonb),
+        'transaction_count', COALESCE(SUM(n), 0)
+    )
+    FROM (
+        SELECT type, SUM(amount) AS total, COUNT(*) AS n
+        FROM transactions
+        WHERE user_id = p_user_id
+        GROUP BY type
+    ) per_type;
+$$;
+
 -- Create triggers for updating updated_at
 CREATE TRIGGER update_user_profiles_updated_at BEFORE UPDATE ON user_profiles
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -1,9 +1,16 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, session as cookie
 from flask_cors import CORS
+import math
 import os
-import threading
+import secrets
 
 from ai_service import AffiliateAIExecutive
+from chat_context import ContextBuilder, llm_summarizer
+from llm_gateway import LLMGateway, GatewayBusy, GatewayTimeout, get_genai_client
+from model_router import router as model_router
+from session_pool import SessionPool
+from sse import sse_response
+from supabase_pool import get_supabase
 
 API_KEY = os.getenv("GOOGLE_API_KEY", "")
 if not API_KEY:
@@ -11,21 +18,84 @@ if not API_KEY:
 
 app = Flask(__name__)
 CORS(app)
+# Signs the cookie that carries anonymous session keys. Sessions live in this
+# process, so a random key only costs anonymous users their history on restart.
+app.secret_key = os.getenv("SECRET_KEY") or secrets.token_hex(32)
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
-# Create a singleton assistant to reuse across requests
-assistant = None
-assistant_lock = threading.Lock()
+# Chat history lives in Supabase when CHAT_HISTORY_STORE=supabase, otherwise in each session.
+# The Supabase store is written with the service key (no RLS), so it is only
+# used for users who sent a verified Supabase access token.
+PERSIST_HISTORY = os.getenv("CHAT_HISTORY_STORE") == "supabase"
 
-def get_assistant():
-    global assistant
-    with assistant_lock:
-        if assistant is None:
-            assistant = AffiliateAIExecutive()
-        return assistant
+# Caps concurrent Gemini calls (summaries included); extra chats wait in a bounded queue
+gateway = LLMGateway()
+
+shared_context = None
+if PERSIST_HISTORY:
+    llm_client = get_genai_client()
+    shared_context = ContextBuilder(
+        summarizer=llm_summarizer(llm_client, model_router, gateway) if llm_client else None
+    )
+
+# One assistant per user, so users don't share history or wait on each other
+sessions = SessionPool(lambda user_id: AffiliateAIExecutive(
+    user_id=user_id, context_builder=shared_context, gateway=gateway
+))
+
+class Unauthorized(Exception):
+    pass
+
+def verified_user_id():
+    """User id from the request's Supabase access token, or None when none was sent"""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        response = get_supabase().auth.get_user(header[len('Bearer '):])
+    except Exception as e:
+        raise Unauthorized(f"Invalid or expired token: {e}")
+    if not response or not response.user:
+        raise Unauthorized("Invalid or expired token")
+    return str(response.user.id)
+
+def session_key():
+    """Key of the session (and conversation history) the request belongs to.
+
+    Only a verified token names a user. Anonymous callers get a random key
+    issued by the server in a signed cookie, so nobody can pick another
+    user's key; clients that don't keep cookies get a fresh session per
+    request. Persisted history requires a token.
+    """
+    user_id = verified_user_id()
+    if user_id:
+        return user_id
+    if PERSIST_HISTORY:
+        raise Unauthorized("Missing Authorization: Bearer <Supabase access token>")
+    if 'chat_session' not in cookie:
+        cookie['chat_session'] = secrets.token_urlsafe(16)
+    return f"anon:{cookie['chat_session']}"
+
+def acquire_session(key):
+    """Return the session with its lock held; a second turn for the same session gets 429"""
+    session = sessions.checkout(key)
+    if session is None:
+        retry_after = max(1, math.ceil(gateway.stats()['avg_seconds']))
+        raise GatewayBusy("Previous message for this session is still in progress", retry_after)
+    return session
+
+def busy_response(e, status):
+    response = jsonify({"error": str(e), "retry_after": e.retry_after})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, status
 
 @app.route('/status', methods=['GET'])
 def status():
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "gateway": gateway.stats(), "models": model_router.stats()})
+
+@app.route('/sessions/stats', methods=['GET'])
+def session_stats():
+    return jsonify(sessions.stats(top=request.args.get('top', 10, type=int)))
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -35,12 +105,56 @@ def chat():
 
     user_message = data.get('message')
     try:
-        assistant = get_assistant()
-        response = assistant.chat(user_message)
+        session = acquire_session(session_key())
+        try:
+            with gateway.slot() as deadline:
+                response = session.assistant.chat(user_message, deadline=deadline)
+            session.turns += 1
+        finally:
+            session.lock.release()
         return jsonify({"response": response})
+    except Unauthorized as e:
+        return jsonify({"error": str(e)}), 401
+    except GatewayTimeout as e:
+        return busy_response(e, 503)
+    except GatewayBusy as e:
+        return busy_response(e, 429)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the reply as Server-Sent Events while Gemini generates it"""
+    data = request.get_json(force=True)
+    if not data or 'message' not in data:
+        return jsonify({"error": "Missing 'message' in request body"}), 400
+
+    user_message = data.get('message')
+    session = None
+    try:
+        # Session lock and gateway slot are held until the stream finishes
+        # or the client disconnects
+        session = acquire_session(session_key())
+        deadline = gateway.acquire()
+    except Unauthorized as e:
+        return jsonify({"error": str(e)}), 401
+    except GatewayBusy as e:
+        if session is not None:
+            session.lock.release()
+        return busy_response(e, 503 if isinstance(e, GatewayTimeout) else 429)
+    except Exception as e:
+        if session is not None:
+            session.lock.release()
+        return jsonify({"error": str(e)}), 500
+
+    def finish():
+        gateway.release(deadline)
+        session.turns += 1
+        session.lock.release()
+
+    chunks = session.assistant.chat_stream(user_message, deadline=deadline)
+    return sse_response(chunks, on_close=finish)
+
 if __name__ == '__main__':
     # Run on port 5001 to avoid conflicts
-    app.run(host='0.0.0.0', port=5001, debug=False)
+    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
@@ -21,15 +21,152 @@ import numpy as np
 from apscheduler.schedulers.background import BackgroundScheduler
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quote_cache import QuoteCache
+from market_data import get_provider
+from history_store import HistoryStore
+import scanner
+import backtest
+from indicators import IndicatorEngine
+from quote_hub import QuoteHub
+from verdict_cache import VerdictCache
+from llm_gateway import get_genai_client
+from personas import PERSONAS, PERSONA_KEYWORDS, detect_persona, detect_personas
+from persona_tools import get_tools_for_persona, tools_for_persona, execute_tool_calls
+from chat_context import ContextBuilder, InMemoryConversationStore, llm_summarizer, to_contents, system_instruction
+from model_router import router as model_router, valid_reply, valid_verdict
 
 app = Flask(__name__)
 
+def create_llm_client():
+    """Return the process-wide pooled Gemini client (None without an API key)"""
+    return get_genai_client()
+
 # Define the AffiliateAIExecutive class
 class AffiliateAIExecutive:
-    def __init__(self):
-        pass
+    def __init__(self, llm_client=None, user_id='anonymous', context_builder=None, models=None, gateway=None):
+        self.llm_client = llm_client or create_llm_client()
+        self.models = models or model_router
+        self.user_id = user_id
+        if context_builder is None:
+            summarizer = llm_summarizer(self.llm_client, self.models, gateway) if self.llm_client else None
+            context_builder = ContextBuilder(InMemoryConversationStore(), summarizer=summarizer)
+        self.context = context_builder
 
-    # Define the functions here
+    # Function-call round trips allowed per chat turn
+    max_tool_rounds = 3
+
+    def _request(self, message, deadline):
+        """Persona, bounded prompt contents and config for the next turn.
+
+        The persona the message routes to sets the token budget, the history
+        the turn is read from and recorded in, and the tools attached.
+        """
+        persona = detect_persona(message)
+        context = self.context.build(self.user_id, persona, message)
+        config = types.GenerateContentConfig(
+            system_instruction=system_instruction(context),
+            tools=tools_for_persona(persona),
+            http_options=deadline.http_options() if deadline else None
+        )
+        return persona, to_contents(context, message), config
+
+    @staticmethod
+    def _tool_turn(model_parts, function_calls):
+        """The model's function calls plus our responses, to append to contents"""
+        results = execute_tool_calls(function_calls)
+        responses = [
+            types.Part.from_function_response(
+                name=call.name,
+                response=result if isinstance(result, dict) else {'result': result}
+            )
+            for call, result in zip(function_calls, results)
+        ]
+        return [types.Content(role='model', parts=model_parts), types.Content(role='user', parts=responses)]
+
+    def chat(self, message, deadline=None):
+        """Send a message with the recent conversation and return the reply text.
+
+        Starts on the tier the message routes to and moves to the large model
+        for the rest of the turn if a small-model reply is rejected.
+        """
+        if self.llm_client is None:
+            raise RuntimeError("GOOGLE_API_KEY not set; chat is disabled")
+        persona, contents, config = self._request(message, deadline)
+        tier = self.models.route(message)
+        tools_used = []
+        for round_ in range(self.max_tool_rounds + 1):
+            response, tier = self.models.generate(self.llm_client, contents, config, tier, validate=valid_reply)
+            calls = response.function_calls
+            if not calls or round_ == self.max_tool_rounds:
+                break
+            tools_used += [call.name for call in calls]
+            contents = contents + self._tool_turn(response.candidates[0].content.parts, calls)
+        reply = response.text or ''
+        self.context.record(self.user_id, persona, message, reply, tools_used)
+        return reply
+
+    def chat_stream(self, message, deadline=None):
+        """Like chat(), but yields reply text chunks as Gemini produces them.
+
+        A small-model round that ends without text or tool calls is retried
+        on the large model; nothing has been sent to the client by then.
+        Closing the generator early (client disconnect) stops the upstream
+        stream and leaves the history untouched.
+        """
+        if self.llm_client is None:
+            raise RuntimeError("GOOGLE_API_KEY not set; chat is disabled")
+        persona, contents, config = self._request(message, deadline)
+        tier = self.models.route(message)
+        parts = []
+        tools_used = []
+        round_ = 0
+        while True:
+            stream = self.llm_client.models.generate_content_stream(
+                model=self.models.model(tier), contents=contents, config=config
+            )
+            calls = []
+            call_parts = []
+            streamed = False
+            last = None
+            started = time.perf_counter()
+            try:
+                for chunk in stream:
+                    last = chunk
+                    if chunk.function_calls:
+                        calls += chunk.function_calls
+                        call_parts += [part for part in chunk.candidates[0].content.parts if part.function_call]
+                        continue
+                    text = chunk.text
+                    if text:
+                        streamed = True
+                        parts.append(text)
+                        yield text
+            except Exception:
+                self.models.record(tier, started, error=True)
+                raise
+            finally:
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+            self.models.record(tier, started, last)
+            if not streamed and not calls:
+                next_tier = self.models.escalate(tier)
+                if next_tier is not None:
+                    tier = next_tier
+                    continue
+            if not calls or round_ == self.max_tool_rounds:
+                break
+            round_ += 1
+            tools_used += [call.name for call in calls]
+            contents = contents + self._tool_turn(call_parts, calls)
+        self.context.record(self.user_id, persona, message, ''.join(parts), tools_used)
+
+    def memory_bytes(self):
+        """Bytes of conversation held in process (0 when history lives in Supabase)"""
+        approx_bytes = getattr(self.context.store, 'approx_bytes', None)
+        return approx_bytes() if approx_bytes else 0
 
 # Define the FinancialService class
 class FinancialService:
@@ -47,16 +184,27 @@ class TradingService:
 
 # --- Global Trading & Financial Services ---
 class GlobalTradingService:
-    def __init__(self):
+    def __init__(self, market_data=None, llm_client=None):
         self.scheduler = BackgroundScheduler()
         self.scheduler.start()
         self.active_trades = {}
         self.portfolio = {}
+        self.quote_cache = QuoteCache(ttl=float(os.getenv("QUOTE_CACHE_TTL", "15")))
+        self.max_fetch_workers = int(os.getenv("MARKET_DATA_MAX_WORKERS", "8"))
+        self.market_data = market_data or get_provider()
+        self.market_data.schedule_refresh(self.scheduler)
+        self.history = HistoryStore(provider=self.market_data)
+        self.indicators = IndicatorEngine()
+        self.llm_client = llm_client or create_llm_client()
+        self.models = model_router
+        self.verdict_cache = VerdictCache()
         self.trading_strategies = {
             'momentum': self.momentum_strategy,
             'mean_reversion': self.mean_reversion_strategy,
             'ai_ml': self.ai_ml_strategy
         }
+        # Strategies that read live quotes (the others only read daily bars)
+        self.quote_strategies = {'momentum'}
         
     def momentum_strategy(self, symbol):
         """Momentum-based trading strategy"""
@@ -82,15 +230,9 @@ class GlobalTradingService:
     def mean_reversion_strategy(self, symbol):
         """Mean reversion trading strategy"""
         try:
-            stock = yf.Ticker(symbol)
-            data = stock.history(period="30d", interval="1d")
-            if len(data) > 20:
-                current_price = data['Close'].iloc[-1]
-                mean_price = data['Close'].iloc[:-5].mean()  # Exclude last 5 days
-                std_dev = data['Close'].iloc[:-5].std()
-                
-                z_score = (current_price - mean_price) / std_dev
-                
+            ind = self.get_indicators(symbol)
+            z_score = ind.get('z_score')
+            if ind['bars'] > 20 and z_score is not None:
                 if z_score < -2:  # Significantly below mean
                     return {
                         'action': 'buy',
@@ -109,37 +251,50 @@ class GlobalTradingService:
     def ai_ml_strategy(self, symbol):
         """AI/ML-based trading strategy using Gemini"""
         try:
-            # Get historical data
-            stock = yf.Ticker(symbol)
-            data = stock.history(period="90d", interval="1d")
+            # Get running indicators for the last 30 bars
+            ind = self.get_indicators(symbol)
             
-            if len(data) > 30:
-                # Prepare data for AI analysis
-                recent_data = data.tail(30)
-                price_trend = 'up' if recent_data['Close'].iloc[-1] > recent_data['Close'].iloc[-10] else 'down'
-                volume_trend = 'increasing' if recent_data['Volume'].iloc[-5:].mean() > recent_data['Volume'].iloc[-30:-5].mean() else 'stable'
-                volatility = recent_data['Close'].pct_change().std() * 100
-                
-                # Use Gemini for analysis
-                model = genai.GenerativeModel('gemini-pro')
-                prompt = f"""
-                Analyze this stock data for {symbol}:
-                - Current Price: ${recent_data['Close'].iloc[-1]:.2f}
-                - 30-day Trend: {price_trend}
-                - Volume Trend: {volume_trend}
-                - Volatility: {volatility:.2f}%
-                
-                Provide a trading recommendation (BUY/SELL/HOLD) with confidence level (0-100) and reasoning.
-                Keep it concise and focus on risk management.
-                """
+            if ind['bars'] > 30 and ind['volatility'] is not None:
+                current_price = ind['price']
+                price_trend = ind['price_trend']
+                volume_trend = ind['volume_trend']
+                volatility = ind['volatility']
                 
-                response = model.generate_content(prompt)
+                # Reuse a recent verdict when the features have not moved
+                cache_key = self.verdict_cache.key(symbol, current_price, price_trend, volume_trend, volatility)
+                verdict = self.verdict_cache.get(cache_key)
+                if verdict is None:
+                    if self.llm_client is None:
+                        return {'error': 'GOOGLE_API_KEY not configured'}
+
+                    # Use Gemini for analysis
+                    prompt = f"""
+                    Analyze this stock data for {symbol}:
+                    - Current Price: ${current_price:.2f}
+                    - 30-day Trend: {price_trend}
+                    - Volume Trend: {volume_trend}
+                    - Volatility: {volatility:.2f}%
+                    
+                    Provide a trading recommendation (BUY/SELL/HOLD) with confidence level (0-100) and reasoning.
+                    Keep it concise and focus on risk management.
+                    """
+                    
+                    # Structured verdict: small model first, large model if it is not parseable
+                    response, _ = self.models.generate(self.llm_client, prompt, tier=self.models.route(tier='small'),
+                                                       validate=valid_verdict)
+                    verdict = response.text
+                    self.verdict_cache.put(cache_key, verdict)
+                    cached = False
+                else:
+                    cached = True
+
                 return {
                     'action': 'AI_RECOMMENDATION',
                     'confidence': 0.75,
-                    'reason': response.text,
+                    'reason': verdict,
+                    'cached': cached,
                     'data_points': {
-                        'price': recent_data['Close'].iloc[-1],
+                        'price': current_price,
                         'trend': price_trend,
                         'volume_trend': volume_trend,
                         'volatility': volatility
@@ -148,23 +303,131 @@ class GlobalTradingService:
         except Exception as e:
             return {'error': str(e)}
         
+    def get_indicators(self, symbol):
+        """Get streaming indicator values, feeding in any bars newer than the last seen"""
+        bars = self.history.window(symbol, '1d', bars=int(os.getenv("INDICATOR_SEED_BARS", "60")))
+        self.indicators.ingest(symbol, bars['ts'], bars['close'], bars['volume'])
+        return self.indicators.snapshot(symbol)
+
     def get_stock_data(self, symbol):
-        """Get real-time stock data"""
+        """Get real-time stock data (served from the quote cache when fresh)"""
         try:
-            stock = yf.Ticker(symbol)
-            data = stock.history(period="1d", interval="1m")
-            if not data.empty:
-                latest = data.iloc[-1]
-                return {
-                    'symbol': symbol,
-                    'price': latest['Close'],
-                    'volume': latest['Volume'],
-                    'timestamp': latest.name.isoformat(),
-                    'change': latest['Close'] - data.iloc[-2]['Close'] if len(data) > 1 else 0
-                }
+            return self.quote_cache.get(symbol, self._fetch_stock_data)
         except Exception as e:
             return {'error': str(e)}
+
+    def get_stock_data_many(self, symbols):
+        """Get real-time stock data for a list of symbols in one bulk fetch"""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        results = self.quote_cache.get_many(symbols, self._fetch_stock_data_bulk)
+        return {symbol: results.get(symbol) for symbol in symbols}
+
+    def _fetch_stock_data(self, symbol):
+        """Download the latest 1-minute bars for a symbol"""
+        data = self.market_data.history(symbol, interval="1m", period="1d")
+        return self._quote_from_history(symbol, data)
+
+    def _fetch_stock_data_bulk(self, symbols):
+        """Download 1-minute bars for many symbols with a single request.
+
+        Symbols the bulk download leaves empty are retried individually on a
+        bounded thread pool.
+        """
+        quotes = {}
+        try:
+            frames = self.market_data.download(symbols, interval="1m", period="1d")
+            for symbol, frame in frames.items():
+                quote = self._quote_from_history(symbol, frame)
+                if quote:
+                    quotes[symbol] = quote
+        except Exception as e:
+            print(f"[Trading] Bulk download failed, falling back to per-symbol fetch: {e}")
+
+        remaining = [s for s in symbols if s not in quotes]
+        if remaining:
+            workers = max(1, min(self.max_fetch_workers, len(remaining)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for symbol, quote in zip(remaining, pool.map(self._fetch_stock_data_safe, remaining)):
+                    quotes[symbol] = quote
+        return quotes
+
+    def _fetch_stock_data_safe(self, symbol):
+        try:
+            return self._fetch_stock_data(symbol)
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _quote_from_history(self, symbol, data):
+        """Build a quote dict from a frame of recent bars"""
+        if not data.empty:
+            latest = data.iloc[-1]
+            return {
+                'symbol': symbol,
+                'price': latest['Close'],
+                'volume': latest['Volume'],
+                'timestamp': latest.name.isoformat(),
+                'change': latest['Close'] - data.iloc[-2]['Close'] if len(data) > 1 else 0
+            }
+
+    def get_quote_cache_stats(self):
+        """Get quote cache hit/miss/stale counters"""
+        return self.quote_cache.stats()
     
+    def scan_universe(self, symbols, strategies=None, bars=30, page=1, page_size=50):
+        """Run vectorized strategies over a whole watchlist"""
+        strategies = strategies or list(scanner.SCAN_STRATEGIES)
+        unsupported = [s for s in strategies if s not in scanner.SCAN_STRATEGIES]
+        if unsupported:
+            return {'error': f"Strategies without a vectorized form: {', '.join(unsupported)}"}
+
+        symbols = list(dict.fromkeys(symbols))
+        close = self._close_matrix(symbols, bars)
+        quotes = self._quote_arrays(symbols) if self.quote_strategies.intersection(strategies) else None
+        return scanner.scan(symbols, close, strategies, page=page, page_size=page_size, quotes=quotes)
+
+    def _quote_arrays(self, symbols):
+        """Live price/change arrays for the scanner (NaN where no quote), from one bulk fetch"""
+        quotes = self.get_stock_data_many(symbols)
+        price = np.full(len(symbols), np.nan)
+        change = np.full(len(symbols), np.nan)
+        for i, symbol in enumerate(symbols):
+            quote = quotes.get(symbol)
+            if isinstance(quote, dict) and 'price' in quote:
+                price[i] = quote['price']
+                change[i] = quote.get('change', 0)
+        return {'price': price, 'change': change}
+
+    def run_backtest(self, symbols, strategies=None, bars=252, include_series=False):
+        """Replay stored daily bars through the vectorized strategies"""
+        strategies = strategies or list(backtest.SIGNAL_STRATEGIES)
+        unsupported = [s for s in strategies if s not in backtest.SIGNAL_STRATEGIES]
+        if unsupported:
+            return {'error': f"Strategies without a vectorized form: {', '.join(unsupported)}"}
+
+        symbols = list(dict.fromkeys(symbols))
+        close = self._close_matrix(symbols, bars)
+        return {
+            'bars': bars,
+            'strategies': strategies,
+            'results': backtest.backtest_universe(symbols, close, strategies, include_series=include_series)
+        }
+
+    def _close_matrix(self, symbols, bars):
+        """Load daily closes for symbols into a (symbols x bars) matrix"""
+        workers = max(1, min(self.max_fetch_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            windows = list(pool.map(lambda s: self._scan_window(s, bars), symbols))
+        return scanner.build_price_matrix(windows, bars)
+
+    def _scan_window(self, symbol, bars):
+        try:
+            return self.history.window(symbol, '1d', bars=bars)['close']
+        except Exception as e:
+            print(f"[Trading] No history for {symbol}: {e}")
+            return np.empty(0)
+
     def get_dividend_stocks(self):
         """Get high dividend yield stocks"""
         high_dividend_stocks = [
@@ -179,8 +442,9 @@ class GlobalTradingService:
         ]
         
         # Get current prices and calculate APY
+        quotes = self.get_stock_data_many([s['symbol'] for s in high_dividend_stocks])
         for stock in high_dividend_stocks:
-            data = self.get_stock_data(stock['symbol'])
+            data = quotes.get(stock['symbol']) or {}
             if 'price' in data:
                 stock['current_price'] = data['price']
                 stock['annual_dividend'] = stock['current_price'] * stock['dividend_yield']
@@ -220,18 +484,30 @@ class GlobalTradingService:
     
     def get_crypto_data(self, symbol):
         """Get cryptocurrency data"""
+        return self.get_crypto_data_many([symbol]).get(symbol) or {'error': f'No ticker for {symbol}'}
+
+    def get_crypto_data_many(self, symbols, venue=None):
+        """Get cryptocurrency data for several pairs with one fetch_tickers call"""
         try:
-            exchange = ccxt.binance()
-            ticker = exchange.fetch_ticker(symbol)
-            return {
+            tickers = self.market_data.fetch_tickers(symbols, venue)
+        except Exception as e:
+            return {symbol: {'error': str(e)} for symbol in symbols}
+
+        timestamp = datetime.now().isoformat()
+        results = {}
+        for symbol in symbols:
+            ticker = tickers.get(symbol)
+            if ticker is None:
+                results[symbol] = {'error': f'No ticker for {symbol}'}
+                continue
+            results[symbol] = {
                 'symbol': symbol,
                 'price': ticker['last'],
                 'volume': ticker['baseVolume'],
                 'change': ticker['change'],
-                'timestamp': datetime.now().isoformat()
+                'timestamp': timestamp
             }
-        except Exception as e:
-            return {'error': str(e)}
+        return results
     
     def auto_trade_crypto(self, user_id, investment_amount, strategy='balanced'):
         """Auto-trade cryptocurrencies"""
@@ -247,8 +523,9 @@ class GlobalTradingService:
             investment_per_crypto = investment_amount * 0.4 / 3  # 40% in top 3
             crypto_pairs = crypto_pairs[:3]
         
+        quotes = self.get_crypto_data_many(crypto_pairs)
         for pair in crypto_pairs:
-            data = self.get_crypto_data(pair)
+            data = quotes[pair]
             if 'price' in data:
                 amount = investment_per_crypto / data['price']
                 trade = {
@@ -621,6 +898,10 @@ task_service = TaskAutomationService()
 # Initialize the AffiliateAIExecutive
 affiliate_ai = AffiliateAIExecutive()
 
+# Push quotes over Socket.IO instead of per-client polling
+quote_hub = QuoteHub(trading_service)
+app.wsgi_app = quote_hub.wrap(app.wsgi_app)
+
 # Configure CORS
 CORS(app, origins=os.getenv("CORS_ORIGIN", "*"))
 
@@ -630,16 +911,6 @@ def health_check():
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
 # Trading Endpoints
-@app.route('/api/trading/strategy/<symbol>/<strategy_type>', methods=['GET'])
-def execute_trading_strategy(symbol, strategy_type):
-    try:
-        if strategy_type in trading_service.trading_strategies:
-            result = trading_service.trading_strategies[strategy_type](symbol)
-            return jsonify(result)
-        else:
-            return jsonify({"error": "Invalid strategy type"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/trading/dividends', methods=['GET'])
 def get_dividend_stocks():
@@ -683,6 +954,13 @@ def auto_trade_crypto():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/trading/cache-stats', methods=['GET'])
+def get_quote_cache_stats():
+    try:
+        return jsonify(trading_service.get_quote_cache_stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Real Estate Endpoints
 @app.route('/api/real-estate/search', methods=['POST'])
 def search_properties():
@@ -778,16 +1056,105 @@ def get_active_tasks(user_id):
 # Advanced Trading & Analytics Endpoints
 @app.route('/api/trading/strategy/<symbol>/<strategy_type>', methods=['GET'])
 def execute_trading_strategy(symbol, strategy_type):
+    """Run a strategy for one symbol, or a comma-separated list of symbols"""
     try:
         if strategy_type in trading_service.trading_strategies:
             strategy_func = trading_service.trading_strategies[strategy_type]
-            result = strategy_func(symbol)
-            return jsonify(result)
+            # Keys in the response keep the caller's casing
+            symbols = [s.strip() for s in symbol.split(',') if s.strip()]
+            if len(symbols) == 1:
+                return jsonify(strategy_func(symbols[0]))
+            if strategy_type in trading_service.quote_strategies:
+                # Warm the quote cache with one bulk download before fanning out
+                trading_service.get_stock_data_many(symbols)
+            return jsonify({s: strategy_func(s) for s in symbols})
         else:
             return jsonify({"error": "Invalid strategy type"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/trading/scan', methods=['POST'])
+def scan_trading_universe():
+    """Rank momentum/mean-reversion signals across a list of symbols"""
+    try:
+        data = request.get_json() or {}
+        symbols = [s.strip().upper() for s in data.get('symbols', []) if s and s.strip()]
+        if not symbols:
+            return jsonify({"error": "Missing 'symbols' in request body"}), 400
+
+        page = max(1, int(data.get('page', 1)))
+        page_size = min(500, max(1, int(data.get('page_size', 50))))
+        bars = max(25, int(data.get('bars', 30)))
+
+        result = trading_service.scan_universe(symbols, data.get('strategies'), bars, page, page_size)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/trading/backtest', methods=['POST'])
+def backtest_strategies():
+    """Backtest strategies over stored daily bars for a list of symbols"""
+    try:
+        data = request.get_json() or {}
+        symbols = [s.strip().upper() for s in data.get('symbols', []) if s and s.strip()]
+        if not symbols:
+            return jsonify({"error": "Missing 'symbols' in request body"}), 400
+
+        bars = min(5000, max(50, int(data.get('bars', 252))))
+        result = trading_service.run_backtest(
+            symbols,
+            data.get('strategies'),
+            bars,
+            include_series=bool(data.get('include_series', False))
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/trading/indicators/<symbol>', methods=['GET'])
+def get_symbol_indicators(symbol):
+    try:
+        return jsonify(trading_service.get_indicators(symbol.upper()))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/trading/stream-stats', methods=['GET'])
+def get_quote_stream_stats():
+    try:
+        return jsonify(quote_hub.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/trading/ai-cache-stats', methods=['GET'])
+def get_verdict_cache_stats():
+    try:
+        return jsonify(trading_service.verdict_cache.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/ai/model-stats', methods=['GET'])
+def get_model_stats():
+    """Per-tier call, latency, token and cost counters for the model router"""
+    try:
+        return jsonify(model_router.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/trading/quotes', methods=['GET'])
+def get_stock_quotes():
+    """Get quotes for ?symbols=AAPL,MSFT,... in one bulk fetch"""
+    try:
+        symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+        if not symbols:
+            return jsonify({"error": "Missing 'symbols' query parameter"}), 400
+        return jsonify(trading_service.get_stock_data_many(symbols))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/portfolio/analytics/<user_id>', methods=['GET'])
 def get_portfolio_analytics(user_id):
     try:
@@ -0,0 +1,244 @@
+"""
+Vectorized backtesting engine for the trading strategies.
+Replays a (symbols x bars) close matrix through each strategy in one NumPy
+pass, producing signal, position and PnL arrays, and fans chunks of
+symbols out to a process pool for large universes. The pool is created once
+per process with the spawn start method (callers are threaded web workers,
+where fork can deadlock); smaller universes run in-process.
+
+Usage:
+    python backtest.py --symbols AAPL,MSFT,KO --strategies momentum,mean_reversion --bars 252
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Matches calculate_sharpe_ratio: 2% annual risk-free rate on monthly returns
+RISK_FREE_MONTHLY = 0.02 / 12
+BARS_PER_MONTH = 21
+
+# Universes smaller than this are backtested in-process; below it the
+# NumPy work is cheaper than shipping chunks to other processes
+PARALLEL_MIN_SYMBOLS = int(os.getenv("BACKTEST_PARALLEL_MIN_SYMBOLS", "512"))
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+# Per-bar counterparts of GlobalTradingService.trading_strategies.
+# Each maps a (symbols x bars) close matrix to a signal matrix of
+# +1 (buy), -1 (sell) or 0 (no signal); NaN prices give 0.
+SIGNAL_STRATEGIES = {}
+
+
+def signal_strategy(name):
+    """Register a per-bar signal function under its trading_strategies name"""
+    def decorator(func):
+        SIGNAL_STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+@signal_strategy('momentum')
+def momentum_signals(close):
+    """Buy after an up bar, sell after a down bar"""
+    change = np.diff(close, axis=1, prepend=np.nan)
+    return np.where(change > 0, 1, np.where(change <= 0, -1, 0)).astype(np.int8)
+
+
+@signal_strategy('mean_reversion')
+def mean_reversion_signals(close, lookback=21, exclude=5):
+    """Z-score of each bar against the mean of the lookback window minus its last bars"""
+    signals = np.zeros(close.shape, dtype=np.int8)
+    if close.shape[1] < lookback:
+        return signals
+    # windows[:, i] covers bars i .. i+lookback-1; the signal lands on the last one
+    base = sliding_window_view(close, lookback, axis=1)[:, :, :-exclude]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = base.mean(axis=2)
+        std = base.std(axis=2, ddof=1)
+        z_score = (close[:, lookback - 1:] - mean) / std
+    signals[:, lookback - 1:] = np.where(z_score < -2, 1, np.where(z_score > 2, -1, 0))
+    return signals
+
+
+def run_backtest(close, strategy):
+    """Backtest one strategy over a close matrix.
+
+    The position on bar t is the signal from bar t-1, so there is no
+    look-ahead. Returns per-symbol signal, position and pnl arrays plus
+    summary metrics.
+    """
+    signal = SIGNAL_STRATEGIES[strategy](close)
+    position = np.zeros_like(signal)
+    position[:, 1:] = signal[:, :-1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bar_returns = np.diff(close, axis=1, prepend=np.nan) / np.roll(close, 1, axis=1)
+    bar_returns[:, 0] = 0.0
+    pnl = np.nan_to_num(position * bar_returns)
+
+    return {
+        'signal': signal,
+        'position': position,
+        'pnl': pnl,
+        'sharpe_ratio': sharpe_ratio(pnl),
+        'max_drawdown': max_drawdown(pnl),
+        'turnover': turnover(position),
+        'hit_rate': hit_rate(position, pnl),
+        'total_return': np.prod(1 + pnl, axis=1) - 1,
+    }
+
+
+def sharpe_ratio(pnl):
+    """Row-wise Sharpe with the same formula as calculate_sharpe_ratio.
+
+    Bar PnL is compounded into monthly returns (BARS_PER_MONTH bars each,
+    counted back from the last bar) before annualizing with sqrt(12).
+    """
+    months = pnl.shape[1] // BARS_PER_MONTH
+    if months < 2:
+        return np.zeros(pnl.shape[0])
+    monthly = pnl[:, pnl.shape[1] - months * BARS_PER_MONTH:]
+    monthly = np.prod(1 + monthly.reshape(pnl.shape[0], months, BARS_PER_MONTH), axis=2) - 1
+    excess = monthly - RISK_FREE_MONTHLY
+    std = excess.std(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std == 0, 0.0, excess.mean(axis=1) / std * np.sqrt(12))
+    return np.round(sharpe, 2) + 0.0  # no -0.0 in reports
+
+
+def max_drawdown(pnl):
+    """Row-wise max drawdown in percent, as in calculate_max_drawdown"""
+    if pnl.shape[1] < 2:
+        return np.zeros(pnl.shape[0])
+    cumulative = np.cumprod(1 + pnl, axis=1)
+    running_max = np.maximum.accumulate(cumulative, axis=1)
+    drawdown = (cumulative - running_max) / running_max
+    return np.round(np.abs(drawdown.min(axis=1)) * 100, 2)
+
+
+def turnover(position):
+    """Average absolute position change per bar"""
+    changes = np.abs(np.diff(position.astype(np.float64), axis=1))
+    return changes.mean(axis=1) if changes.shape[1] else np.zeros(position.shape[0])
+
+
+def hit_rate(position, pnl):
+    """Share of bars in the market that made money"""
+    active = position != 0
+    wins = (pnl > 0) & active
+    counts = active.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts == 0, 0.0, wins.sum(axis=1) / counts)
+
+
+def _backtest_chunk(close, strategies, include_series):
+    """Process-pool entry point: backtest every strategy on a block of symbols"""
+    results = {}
+    for strategy in strategies:
+        result = run_backtest(close, strategy)
+        if not include_series:
+            for key in ('signal', 'position', 'pnl'):
+                result.pop(key)
+        results[strategy] = result
+    return results
+
+
+def _get_pool(workers):
+    """The process-wide backtest pool with `workers` processes, started on first use.
+
+    Asking for a different size replaces the pool; the old one finishes the
+    chunks already handed to it and then exits.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            context = multiprocessing.get_context(os.getenv("BACKTEST_START_METHOD", "spawn"))
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the backtest pool's worker processes (tests and shutdown hooks)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+            _pool_workers = None
+
+
+def backtest_universe(symbols, close, strategies, workers=None, chunk_size=64, include_series=False):
+    """Backtest strategies across symbols, splitting rows over a process pool.
+
+    Universes below BACKTEST_PARALLEL_MIN_SYMBOLS run in-process.
+    Returns {symbol: {strategy: metrics}}.
+    """
+    workers = workers or int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+    starts = list(range(0, len(symbols), chunk_size))
+    chunks = [close[start:start + chunk_size] for start in starts]
+
+    outputs = None
+    if workers > 1 and len(chunks) > 1 and len(symbols) >= PARALLEL_MIN_SYMBOLS:
+        try:
+            outputs = list(_get_pool(workers).map(
+                _backtest_chunk,
+                chunks,
+                [strategies] * len(chunks),
+                [include_series] * len(chunks)
+            ))
+        except BrokenProcessPool as e:
+            print(f"[Backtest] Process pool failed, running in-process: {e}")
+            shutdown_pool()
+    if outputs is None:
+        outputs = [_backtest_chunk(chunk, strategies, include_series) for chunk in chunks]
+
+    report = {}
+    for start, chunk, output in zip(starts, chunks, outputs):
+        for strategy, result in output.items():
+            for row in range(len(chunk)):
+                symbol = symbols[start + row]
+                report.setdefault(symbol, {})[strategy] = {
+                    key: values[row].tolist() if values.ndim > 1 else round(float(values[row]), 4)
+                    for key, values in result.items()
+                }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest trading strategies on stored daily bars")
+    parser.add_argument('--symbols', required=True, help="Comma-separated ticker symbols")
+    parser.add_argument('--strategies', default=','.join(SIGNAL_STRATEGIES), help="Comma-separated strategy names")
+    parser.add_argument('--bars', type=int, default=252, help="Number of daily bars to replay")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size")
+    parser.add_argument('--no-sync', action='store_true', help="Use stored bars without a delta download")
+    args = parser.parse_args()
+
+    from history_store import HistoryStore
+    from scanner import build_price_matrix
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    store = HistoryStore()
+    windows = [store.window(s, '1d', bars=args.bars, sync=not args.no_sync)['close'] for s in symbols]
+    close = build_price_matrix(windows, args.bars)
+
+    report = backtest_universe(symbols, close, strategies, workers=args.workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+Prompt context builder for the chat assistants.
+Only the most recent turns for a user and persona go into the prompt. Older
+turns are folded into a stored rolling summary, and the whole context is
+trimmed to a per-persona token budget, so prompt size (and with it latency
+and cost) stays flat however long a user has been chatting.
+
+History lives in a store with the ConversationDB interface: the Supabase
+conversation_history/conversation_summaries tables, or the in-process
+InMemoryConversationStore used when no database is configured.
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+
+from google.genai import types
+
+# Prompt token budgets per persona; CHAT_TOKEN_BUDGET covers the rest
+PERSONA_TOKEN_BUDGETS = {
+    'executive': 6000,
+    'stock_analyst': 6000,
+    'financial_assistant': 5000,
+    'campaign_manager': 4000,
+    'learning_manager': 3000,
+    'app_customizer': 2000,
+    'language_assistant': 2000,
+}
+
+
+def token_budget(persona):
+    """Budget for a persona; CHAT_TOKEN_BUDGET_<PERSONA> overrides the table"""
+    override = os.getenv(f"CHAT_TOKEN_BUDGET_{persona.upper()}")
+    if override:
+        return int(override)
+    return PERSONA_TOKEN_BUDGETS.get(persona, int(os.getenv("CHAT_TOKEN_BUDGET", "4000")))
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return len(text or '') // 4 + 1
+
+
+def turn_tokens(turn):
+    return estimate_tokens(turn.get('user_message')) + estimate_tokens(turn.get('ai_response'))
+
+
+def fit_turns(turns, budget):
+    """Keep the newest turns that fit in budget. turns is newest first; returns oldest first"""
+    kept = []
+    used = 0
+    for turn in turns:
+        cost = turn_tokens(turn)
+        if used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+    return kept, used
+
+
+def extractive_summary(previous, turns, max_chars=2000):
+    """Fallback summarizer: keep the gist of each turn without an LLM call"""
+    lines = [previous] if previous else []
+    for turn in turns:
+        lines.append(f"User asked: {(turn.get('user_message') or '')[:160]}")
+        if turn.get('ai_response'):
+            lines.append(f"Assistant answered: {turn['ai_response'][:160]}")
+    text = '\n'.join(lines)
+    return text[-max_chars:]
+
+
+def llm_summarizer(client, models=None, gateway=None):
+    """Summarizer that asks the small Gemini tier to merge turns into the running summary.
+
+    The call is counted in the model router's stats and, with a gateway,
+    takes one of its concurrency slots like any chat turn. GatewayBusy is
+    raised so the fold is retried on a later turn instead of degrading.
+    """
+    if models is None:
+        from model_router import router as models
+
+    def summarize(previous, turns):
+        transcript = '\n'.join(
+            f"User: {t.get('user_message')}\nAssistant: {t.get('ai_response')}" for t in turns
+        )
+        prompt = (
+            "Update the running summary of a conversation with the new turns below. "
+            "Keep facts, decisions, preferences and open questions; drop small talk. "
+            "Answer with the updated summary only, at most 200 words.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        slot = gateway.slot() if gateway is not None else nullcontext()
+        with slot:
+            try:
+                response, _ = models.generate(client, prompt, tier=models.route(tier='small'))
+                return response.text or extractive_summary(previous, turns)
+            except Exception as e:
+                print(f"[ChatContext] Summarization failed, using extractive summary: {e}")
+                return extractive_summary(previous, turns)
+    return summarize
+
+
+class InMemoryConversationStore:
+    """Process-local stand-in for ConversationDB, bounded per user and persona"""
+
+    def __init__(self, max_turns=200):
+        self.max_turns = max_turns
+        self._turns = {}      # (user_id, persona) -> deque of turns, oldest first
+        self._summaries = {}  # (user_id, persona) -> summary row
+        self._lock = threading.Lock()
+
+    def create(self, user_id, persona, user_message, ai_response, tools_used=None):
+        turn = {
+            'user_message': user_message,
+            'ai_response': ai_response,
+            'tools_used': tools_used or [],
+            'created_at': datetime.now().isoformat(),
+        }
+        with self._lock:
+            self._turns.setdefault((user_id, persona), deque(maxlen=self.max_turns)).append(turn)
+        return turn
+
+    def get_recent(self, user_id, persona, limit, after=None):
+        with self._lock:
+            turns = list(self._turns.get((user_id, persona), ()))
+        recent = []
+        for turn in reversed(turns):
+            if len(recent) >= limit or (after and turn['created_at'] <= after):
+                break
+            recent.append(turn)
+        return recent
+
+    def get_oldest(self, user_id, persona, limit, after=None):
+        with self._lock:
+            turns = list(self._turns.get((user_id, persona), ()))
+        return [turn for turn in turns if not after or turn['created_at'] > after][:limit]
+
+    def get_summary(self, user_id, persona):
+        with self._lock:
+            return dict(self._summaries.get((user_id, persona), {}))
+
+    def save_summary(self, user_id, persona, summary, summarized_through, turns_summarized):
+        row = {
+            'summary': summary,
+            'summarized_through': summarized_through,
+            'turns_summarized': turns_summarized,
+        }
+        with self._lock:
+            self._summaries[(user_id, persona)] = row
+        return row
+
+    def approx_bytes(self):
+        with self._lock:
+            size = sum(len(row['summary'].encode()) for row in self._summaries.values())
+            for turns in self._turns.values():
+                for turn in turns:
+                    size += len((turn['user_message'] or '').encode()) + len((turn['ai_response'] or '').encode())
+            return size
+
+
+_fold_pool = None
+_fold_pool_lock = threading.Lock()
+
+
+def _fold_executor():
+    """Worker threads shared by every ContextBuilder for summarization"""
+    global _fold_pool
+    with _fold_pool_lock:
+        if _fold_pool is None:
+            _fold_pool = ThreadPoolExecutor(
+                max_workers=int(os.getenv("CHAT_SUMMARY_WORKERS", "2")),
+                thread_name_prefix="chat-summary"
+            )
+        return _fold_pool
+
+
+class ContextBuilder:
+    """Builds bounded prompt context from a conversation store.
+
+    The last `window` turns always go in (budget permitting). Turns beyond
+    the window stay in the prompt until `fold_batch` of them have piled up;
+    then every unsummarized turn older than the window is folded into the
+    summary, `fold_batch` turns per summarizer call, on a background thread
+    so the reply is not held up by it.
+    """
+
+    def __init__(self, store=None, summarizer=None, window=None, fold_batch=None):
+        if store is None:
+            from supabase_client import ConversationDB
+            store = ConversationDB
+        self.store = store
+        self.summarizer = summarizer or extractive_summary
+        self.window = window or int(os.getenv("CHAT_HISTORY_WINDOW", "10"))
+        self.fold_batch = fold_batch or int(os.getenv("CHAT_SUMMARY_FOLD_BATCH", "10"))
+        self.folds = 0
+        self._pending = {}  # (user_id, persona) -> future of the running fold
+        self._lock = threading.Lock()
+
+    def build(self, user_id, persona, message):
+        """Return the summary and the turns to send ahead of `message`"""
+        summary_row = self.store.get_summary(user_id, persona)
+        if 'error' in summary_row:
+            summary_row = {}
+        summary = summary_row.get('summary') or ''
+
+        # Newest first, one indexed query: (user_id, persona, created_at DESC)
+        rows = self.store.get_recent(
+            user_id, persona, self.window + self.fold_batch,
+            after=summary_row.get('summarized_through')
+        )
+        if len(rows) - self.window >= self.fold_batch:
+            self._schedule_fold(user_id, persona, keep_from=rows[self.window - 1]['created_at'])
+
+        budget = token_budget(persona) - estimate_tokens(message)
+        # The summary may take at most a quarter of the budget; its newest part is kept
+        summary_cap = max(budget // 4, 0)
+        if estimate_tokens(summary) > summary_cap:
+            summary = summary[-summary_cap * 4:] if summary_cap else ''
+        summary_tokens = estimate_tokens(summary) if summary else 0
+        turns, used = fit_turns(rows, budget - summary_tokens)
+        return {
+            'summary': summary,
+            'turns': turns,
+            'tokens': summary_tokens + used + estimate_tokens(message),
+            'budget': token_budget(persona),
+            'dropped': len(rows) - len(turns),
+        }
+
+    def _schedule_fold(self, user_id, persona, keep_from):
+        """Start a background fold for the user and persona unless one is running"""
+        key = (user_id, persona)
+        with self._lock:
+            running = self._pending.get(key)
+            if running is not None and not running.done():
+                return
+            future = _fold_executor().submit(self._fold, user_id, persona, keep_from)
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._fold_done(key, done))
+
+    def _fold_done(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        if future.exception() is not None:
+            print(f"[ChatContext] Fold for {key} deferred: {future.exception()}")
+
+    def _fold(self, user_id, persona, keep_from):
+        """Summarize every unsummarized turn older than `keep_from`, oldest first"""
+        summary_row = self.store.get_summary(user_id, persona)
+        if 'error' in summary_row:
+            return
+        summary = summary_row.get('summary') or ''
+        through = summary_row.get('summarized_through')
+        count = summary_row.get('turns_summarized') or 0
+        while True:
+            fetched = self.store.get_oldest(user_id, persona, self.fold_batch, after=through)
+            batch = [turn for turn in fetched if turn['created_at'] < keep_from]
+            if not batch:
+                return
+            summary = self.summarizer(summary, batch)
+            through = batch[-1]['created_at']
+            count += len(batch)
+            self.store.save_summary(user_id, persona, summary, summarized_through=through,
+                                    turns_summarized=count)
+            with self._lock:
+                self.folds += 1
+            if len(batch) < len(fetched) or len(fetched) < self.fold_batch:
+                return
+
+    def flush(self, timeout=None):
+        """Wait for running folds (tests and shutdown)"""
+        with self._lock:
+            futures = list(self._pending.values())
+        wait(futures, timeout=timeout)
+
+    def record(self, user_id, persona, message, reply, tools_used=None):
+        return self.store.create(user_id, persona, message, reply, tools_used)
+
+
+def to_contents(context, message):
+    """Gemini contents for the recent turns followed by the new message"""
+    contents = []
+    for turn in context['turns']:
+        contents.append(types.Content(role='user', parts=[types.Part(text=turn.get('user_message') or '')]))
+        if turn.get('ai_response'):
+            contents.append(types.Content(role='model', parts=[types.Part(text=turn['ai_response'])]))
+    contents.append(types.Content(role='user', parts=[types.Part(text=message)]))
+    return contents
+
+
+def system_instruction(context):
+    if not context['summary']:
+        return None
+    return f"Summary of the earlier conversation with this user:\n{context['summary']}"
@@ -0,0 +1,52 @@
+"""
+Pytest setup for the offline unit tests.
+Market data is served from synthetic replay fixtures and history goes to a
+temporary directory, so the tests need no network, API keys or database.
+"""
+
+import os
+import tempfile
+
+import httpx
+import pytest
+import google.genai as genai
+from google.genai import types
+
+from fake_gemini import FakeGemini
+
+_ROOT = tempfile.mkdtemp(prefix="affiliate-ai-tests-")
+os.environ["MARKET_DATA_PROVIDER"] = "replay"
+os.environ["MARKET_DATA_FIXTURES"] = os.path.join(_ROOT, "fixtures")
+os.environ["HISTORY_STORE_DIR"] = os.path.join(_ROOT, "history")
+for _name in ("GOOGLE_API_KEY", "GEMINI_BASE_URL", "REDIS_URL", "SUPABASE_URL",
+              "SUPABASE_SERVICE_KEY", "SUPABASE_ANON_KEY", "CHAT_HISTORY_STORE"):
+    os.environ.pop(_name, None)
+
+# Manual scripts that talk to a running server or the live Gemini API; run them directly
+collect_ignore = [
+    "test_api.py",
+    "test_api_key.py",
+    "test_auth.py",
+    "test_e2e.py",
+    "test_func_decl.py",
+    "test_paypal_ai.py",
+    "test_personas.py",
+    "test_personas_demo.py",
+    "test_schema.py",
+    "test_transaction.py",
+]
+
+
+@pytest.fixture
+def fake_gemini():
+    """FakeGemini with no latency, served in-process over httpx.WSGITransport"""
+    return FakeGemini(latency="fixed:0", chunk_delay_ms=0, chunks=4, reply_words=12, seed=1)
+
+
+@pytest.fixture
+def gemini_client(fake_gemini):
+    """genai.Client whose requests go to fake_gemini"""
+    return genai.Client(api_key="test", http_options=types.HttpOptions(
+        base_url="http://fake-gemini",
+        client_args={"transport": httpx.WSGITransport(app=fake_gemini.app)}
+    ))
@@ -6,76 +6,8 @@ This demonstrates persona detection and routing without needing the actual Gemin
 
 import json
 
-# Persona definitions (same as in ai_service.py)
-PERSONAS = {
-    "campaign_manager": {
-        "name": "Campaign Manager",
-        "emoji": "🎯",
-        "description": "Manages marketing campaigns across platforms",
-    },
-    "stock_analyst": {
-        "name": "Stock Market Analyst",
-        "emoji": "📈",
-        "description": "Tracks stock investments and dividends",
-    },
-    "learning_manager": {
-        "name": "Learning & Development Manager",
-        "emoji": "🎓",
-        "description": "Tracks educational progress",
-    },
-    "financial_assistant": {
-        "name": "Financial Assistant",
-        "emoji": "💰",
-        "description": "Logs financial transactions",
-    },
-    "app_customizer": {
-        "name": "App Customizer",
-        "emoji": "⚙️",
-        "description": "Manages app settings and preferences",
-    },
-    "language_assistant": {
-        "name": "Language Assistant",
-        "emoji": "🌍",
-        "description": "Provides translation and multilingual support (65+ languages)",
-    }
-}
-
-# Persona detection keywords
-PERSONA_KEYWORDS = {
-    "campaign_manager": ["campaign", "marketing", "ads", "instagram", "facebook", "tiktok", "twitter", "platform", "pinterest"],
-    "stock_analyst": ["stock", "dividend", "invest", "share", "portfolio", "market", "nasdaq"],
-    "learning_manager": ["learning", "course", "education", "training", "skill", "progress", "module"],
-    "financial_assistant": ["transaction", "deposit", "withdrawal", "payout", "payment", "finance", "paypal"],
-    "app_customizer": ["theme", "settings", "view", "customize", "dark", "light"],
-    "language_assistant": ["translate", "language", "spanish", "french", "german", "chinese", "japanese"],
-}
-
-
-def detect_persona(user_message: str) -> str:
-    """Detects which persona should handle the request."""
-    message_lower = user_message.lower()
-    
-    # Check for explicit persona mentions
-    for persona_key, persona_data in PERSONAS.items():
-        persona_name = persona_data["name"].lower()
-        if persona_name in message_lower or persona_key.replace("_", " ") in message_lower:
-            return persona_key
-    
-    # Check for keyword matches
-    persona_scores = {persona: 0 for persona in PERSONAS.keys()}
-    
-    for persona_key, keywords in PERSONA_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in message_lower:
-                persona_scores[persona_key] += 1
-    
-    # Return persona with highest score
-    best_persona = max(persona_scores, key=persona_scores.get)
-    if persona_scores[best_persona] > 0:
-        return best_persona
-    
-    # Default fallback
-    return "campaign_manager"
+# Persona definitions and the router shared with ai_service.py
+from personas import PERSONAS, PERSONA_KEYWORDS, detect_persona
 
 
 # Demo test cases
@@ -0,0 +1,81 @@
+"""
+Process-wide registry of ccxt exchange clients.
+Keeps one initialized exchange per venue so loaded markets and the
+underlying HTTP session are reused across requests.
+"""
+
+import os
+import threading
+
+import ccxt
+
+
+class ExchangeRegistry:
+    """Lazily creates, caches and refreshes ccxt exchanges by venue id"""
+
+    def __init__(self, default_venue=None, timeout_ms=None):
+        self.default_venue = default_venue or os.getenv("CRYPTO_EXCHANGE", "binance")
+        self.timeout_ms = timeout_ms or int(os.getenv("CRYPTO_EXCHANGE_TIMEOUT_MS", "10000"))
+        self._exchanges = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, venue=None):
+        """Return the shared exchange for a venue, loading markets on first use"""
+        venue = venue or self.default_venue
+        exchange = self._exchanges.get(venue)
+        if exchange is not None:
+            return exchange
+
+        with self._venue_lock(venue):
+            exchange = self._exchanges.get(venue)
+            if exchange is None:
+                exchange_class = getattr(ccxt, venue, None)
+                if exchange_class is None:
+                    raise ValueError(f"Unknown exchange: {venue}")
+                exchange = exchange_class({
+                    'enableRateLimit': True,
+                    'timeout': self.timeout_ms,
+                })
+                exchange.load_markets()
+                self._exchanges[venue] = exchange
+            return exchange
+
+    def fetch_tickers(self, symbols, venue=None):
+        """Fetch tickers for all symbols with a single request"""
+        exchange = self.get(venue)
+        symbols = list(dict.fromkeys(symbols))
+        if exchange.has.get('fetchTickers'):
+            return exchange.fetch_tickers(symbols)
+        return {symbol: exchange.fetch_ticker(symbol) for symbol in symbols}
+
+    def refresh_markets(self):
+        """Reload market metadata for every venue created so far"""
+        for venue, exchange in list(self._exchanges.items()):
+            try:
+                with self._venue_lock(venue):
+                    exchange.load_markets(reload=True)
+            except Exception as e:
+                print(f"[Exchange] Failed to refresh markets for {venue}: {e}")
+
+    def schedule_refresh(self, scheduler, minutes=None):
+        """Refresh market metadata periodically on an APScheduler scheduler"""
+        minutes = minutes or int(os.getenv("CRYPTO_MARKETS_REFRESH_MINUTES", "60"))
+        scheduler.add_job(
+            func=self.refresh_markets,
+            trigger='interval',
+            minutes=minutes,
+            id='exchange_registry_refresh',
+            replace_existing=True
+        )
+
+    def _venue_lock(self, venue):
+        with self._lock:
+            lock = self._locks.get(venue)
+            if lock is None:
+                lock = self._locks[venue] = threading.Lock()
+            return lock
+
+
+# Global instance
+exchange_registry = ExchangeRegistry()
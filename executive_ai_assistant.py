@@ -5,10 +5,19 @@ from datetime import datetime, timedelta
 from flask import Flask, jsonify, request, render_template_string
 from flask_cors import CORS
 import random
+import time
+from google.genai import types
+
+from llm_gateway import get_genai_client, LLMGateway, GatewayBusy, GatewayTimeout
+from model_router import router as model_router
+from sse import sse_response
 
 app = Flask(__name__)
 CORS(app, origins="*")
 
+# Caps concurrent Gemini calls from the streaming chat
+gateway = LLMGateway()
+
 # Executive AI Assistant Configuration
 EXECUTIVE_AI = {
     "name": "Executive AI Assistant",
@@ -459,54 +468,60 @@ def get_executive_dashboard():
         }
     })
 
+EXECUTIVE_RESPONSES = {
+    'sales': {
+        'message': '📈 Sales Performance Analysis:\n• Total Revenue: $125,000 (+23.5% MoM)\n• 1,847 customers served\n• Conversion rate: 3.8%\n• Avg order value: $67.73\n\nRecommendation: Focus on luxury segment - highest margin at 42%',
+        'action': 'generate_sales_report',
+        'priority': 'high'
+    },
+    'marketing': {
+        'message': '📢 Marketing Campaign Status:\n• Instagram: 5.8% CTR (best performer)\n• Facebook: 2.5% CTR\n• Google Ads: 3.5% CTR\n• Budget optimized: $2,340 saved this week\n\nAction: Shift 20% more budget to Instagram',
+        'action': 'optimize_marketing',
+        'priority': 'medium'
+    },
+    'inventory': {
+        'message': '📦 Inventory Management:\n• Modern Vanity: 15 units left (auto-reorder initiated)\n• Traditional Vanity: 42 units\n• Luxury Vanity: 8 units (premium segment)\n• Total inventory value: $67,500\n\nAlert: Restock Modern Vanity within 3 days',
+        'action': 'manage_inventory',
+        'priority': 'high'
+    },
+    'customer': {
+        'message': '👥 Customer Insights:\n• Satisfaction: 4.6/5 stars\n• 67% repeat customer rate\n• 89% would recommend\n• Top complaint: Shipping time (avg 3.2 days)\n\nAction: Implement express shipping option',
+        'action': 'improve_customer_service',
+        'priority': 'medium'
+    },
+    'automation': {
+        'message': '🤖 Automation Status:\n• 147 customer service inquiries auto-resolved\n• 23 financial transactions auto-processed\n• 18% marketing budget optimization\n• 4.2 hours manual work saved today\n\nAll systems operating at optimal efficiency',
+        'action': 'monitor_automation',
+        'priority': 'low'
+    }
+}
+
+def match_executive_response(message):
+    """Pick the canned response whose keyword appears in the message"""
+    lowered = message.lower()
+    for keyword, response in EXECUTIVE_RESPONSES.items():
+        if keyword in lowered:
+            return response
+    return {
+        'message': f'🤖 I understand you\'re asking about "{message}". Let me analyze your business data and provide actionable insights for your bathroom vanities empire.',
+        'action': 'general_assistance',
+        'priority': 'medium'
+    }
+
+def executive_system_prompt():
+    """Business context handed to Gemini for the streaming chat"""
+    return (
+        f"You are {EXECUTIVE_AI['name']} for {EXECUTIVE_AI['owner']}, owner of {EXECUTIVE_AI['business']}. "
+        f"Personality: {EXECUTIVE_AI['personality']}. "
+        f"Current business metrics: {json.dumps(BUSINESS_INTELLIGENCE)}. "
+        "Answer concisely with actionable recommendations."
+    )
+
 @app.route('/api/executive/chat', methods=['POST'])
 def executive_chat():
     """AI Assistant chat interface"""
     data = request.get_json()
-    message = data.get('message', '').lower()
-    
-    # AI Response Logic
-    responses = {
-        'sales': {
-            'message': '📈 Sales Performance Analysis:\n• Total Revenue: $125,000 (+23.5% MoM)\n• 1,847 customers served\n• Conversion rate: 3.8%\n• Avg order value: $67.73\n\nRecommendation: Focus on luxury segment - highest margin at 42%',
-            'action': 'generate_sales_report',
-            'priority': 'high'
-        },
-        'marketing': {
-            'message': '📢 Marketing Campaign Status:\n• Instagram: 5.8% CTR (best performer)\n• Facebook: 2.5% CTR\n• Google Ads: 3.5% CTR\n• Budget optimized: $2,340 saved this week\n\nAction: Shift 20% more budget to Instagram',
-            'action': 'optimize_marketing',
-            'priority': 'medium'
-        },
-        'inventory': {
-            'message': '📦 Inventory Management:\n• Modern Vanity: 15 units left (auto-reorder initiated)\n• Traditional Vanity: 42 units\n• Luxury Vanity: 8 units (premium segment)\n• Total inventory value: $67,500\n\nAlert: Restock Modern Vanity within 3 days',
-            'action': 'manage_inventory',
-            'priority': 'high'
-        },
-        'customer': {
-            'message': '👥 Customer Insights:\n• Satisfaction: 4.6/5 stars\n• 67% repeat customer rate\n• 89% would recommend\n• Top complaint: Shipping time (avg 3.2 days)\n\nAction: Implement express shipping option',
-            'action': 'improve_customer_service',
-            'priority': 'medium'
-        },
-        'automation': {
-            'message': '🤖 Automation Status:\n• 147 customer service inquiries auto-resolved\n• 23 financial transactions auto-processed\n• 18% marketing budget optimization\n• 4.2 hours manual work saved today\n\nAll systems operating at optimal efficiency',
-            'action': 'monitor_automation',
-            'priority': 'low'
-        }
-    }
-    
-    # Find best matching response
-    best_response = None
-    for keyword, response in responses.items():
-        if keyword in message:
-            best_response = response
-            break
-    
-    if not best_response:
-        best_response = {
-            'message': f'🤖 I understand you\'re asking about "{data.get("message", "")}". Let me analyze your business data and provide actionable insights for your bathroom vanities empire.',
-            'action': 'general_assistance',
-            'priority': 'medium'
-        }
+    best_response = match_executive_response(data.get('message', ''))
     
     return jsonify({
         'response': best_response['message'],
@@ -516,6 +531,49 @@ def executive_chat():
         'ai_confidence': 0.92
     })
 
+@app.route('/api/executive/chat/stream', methods=['POST'])
+def executive_chat_stream():
+    """Streaming chat: forwards Gemini chunks as Server-Sent Events"""
+    data = request.get_json() or {}
+    message = data.get('message', '')
+    canned = match_executive_response(message)
+    extra = {'action': canned['action'], 'priority': canned['priority']}
+
+    client = get_genai_client()
+    if client is None:
+        # No Gemini configured: stream the canned answer line by line
+        return sse_response(iter(canned['message'].splitlines(keepends=True)), extra=extra)
+
+    try:
+        deadline = gateway.acquire()
+    except GatewayBusy as e:
+        response = jsonify({"error": str(e), "retry_after": e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503 if isinstance(e, GatewayTimeout) else 429
+
+    tier = model_router.route(message)
+
+    def chunks():
+        started = time.perf_counter()
+        last = None
+        stream = client.models.generate_content_stream(
+            model=model_router.model(tier),
+            contents=message,
+            config=types.GenerateContentConfig(
+                system_instruction=executive_system_prompt(),
+                http_options=deadline.http_options()
+            )
+        )
+        try:
+            for chunk in stream:
+                last = chunk
+                yield chunk.text
+        finally:
+            stream.close()
+            model_router.record(tier, started, last)
+
+    return sse_response(chunks(), on_close=lambda: gateway.release(deadline), extra=extra)
+
 @app.route('/api/executive/automation')
 def get_automation_status():
     """Get automation tasks status"""
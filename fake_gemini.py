@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generate-content API.
+Speaks the subset the SDK uses here (models.list, generateContent and
+streamGenerateContent with alt=sse) so the chat and strategy paths can be
+load-tested without an API key. Point the SDK at it with
+GEMINI_BASE_URL=http://127.0.0.1:8089 and any GOOGLE_API_KEY.
+
+    python fake_gemini.py serve --latency lognormal:400,0.5 --error-rate 0.02
+    python fake_gemini.py load --url http://127.0.0.1:5001/chat/stream --requests 200 --concurrency 20
+
+Latency specs: fixed:MS, uniform:LOW,HIGH, normal:MEAN,STD, lognormal:MEDIAN,SIGMA.
+Canned function calls are a JSON object {"tool_name": {args}}; when a request
+declares one of those tools, the first reply is a call to it.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, jsonify, request
+
+ERROR_STATUS = {400: 'INVALID_ARGUMENT', 429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE'}
+
+
+def parse_latency(spec):
+    """Return a sampler (seconds) for a latency spec like 'lognormal:400,0.5'"""
+    kind, _, args = (spec or 'fixed:0').partition(':')
+    values = [float(v) for v in args.split(',') if v]
+    if kind == 'fixed':
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'normal':
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == 'lognormal':
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def load_function_calls(value):
+    """Canned calls from a JSON string or a path to a JSON file"""
+    if not value:
+        return {}
+    if os.path.exists(value):
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+class FakeGemini:
+    """Configurable fake of the generate-content endpoints"""
+
+    def __init__(self, latency=None, chunk_delay_ms=None, chunks=None, reply_words=None,
+                 error_rate=None, error_codes=None, function_calls=None, seed=None):
+        self.sample_latency = parse_latency(latency or os.getenv("FAKE_GEMINI_LATENCY", "lognormal:400,0.5"))
+        self.chunk_delay = float(chunk_delay_ms if chunk_delay_ms is not None else os.getenv("FAKE_GEMINI_CHUNK_DELAY_MS", "40")) / 1000
+        self.chunks = int(chunks or os.getenv("FAKE_GEMINI_CHUNKS", "8"))
+        self.reply_words = int(reply_words or os.getenv("FAKE_GEMINI_REPLY_WORDS", "60"))
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv("FAKE_GEMINI_ERROR_RATE", "0"))
+        codes = error_codes or os.getenv("FAKE_GEMINI_ERROR_CODES", "429,500,503")
+        self.error_codes = [int(c) for c in str(codes).split(',')]
+        self.function_calls = function_calls if function_calls is not None else \
+            load_function_calls(os.getenv("FAKE_GEMINI_FUNCTION_CALLS"))
+        self.rng = random.Random(seed if seed is not None else os.getenv("FAKE_GEMINI_SEED"))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.function_call_replies = 0
+        self.by_model = {}
+
+        self.app = Flask(__name__)
+        self.app.add_url_rule('/<version>/models', 'list_models', self.list_models)
+        self.app.add_url_rule('/<version>/models/<path:target>', 'model_action', self.model_action, methods=['POST'])
+        self.app.add_url_rule('/fake/stats', 'stats', lambda: jsonify(self.stats()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'function_call_replies': self.function_call_replies,
+                'by_model': dict(self.by_model),
+            }
+
+    # --- Routes ---
+
+    def list_models(self, version):
+        names = os.getenv("FAKE_GEMINI_MODELS", "gemini-pro,gemini-1.5-flash,gemini-1.5-pro").split(',')
+        return jsonify({'models': [
+            {'name': f'models/{name}', 'displayName': name,
+             'supportedGenerationMethods': ['generateContent', 'streamGenerateContent', 'countTokens']}
+            for name in names
+        ]})
+
+    def model_action(self, version, target):
+        model, _, action = target.partition(':')
+        body = request.get_json(silent=True) or {}
+        with self._lock:
+            self.requests += 1
+            self.by_model[model] = self.by_model.get(model, 0) + 1
+            rng_value = self.rng.random()
+            latency = self.sample_latency(self.rng)
+
+        if action == 'countTokens':
+            return jsonify({'totalTokens': self._prompt_tokens(body)})
+        if action not in ('generateContent', 'streamGenerateContent'):
+            return self._error(400, f"Unsupported action: {action}")
+        if rng_value < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            time.sleep(latency / 4)
+            return self._error(self.rng.choice(self.error_codes), "Injected error")
+
+        time.sleep(latency)
+        call = self._function_call(body)
+        if action == 'generateContent':
+            if call:
+                return jsonify(self._response(model, [{'functionCall': call}], body))
+            return jsonify(self._response(model, [{'text': self._reply_text(body)}], body))
+
+        def stream():
+            if call:
+                yield self._sse(self._response(model, [{'functionCall': call}], body))
+                return
+            words = self._reply_text(body).split(' ')
+            size = max(1, -(-len(words) // self.chunks))
+            for i in range(0, len(words), size):
+                if i:
+                    time.sleep(self.chunk_delay)
+                text = ' '.join(words[i:i + size]) + (' ' if i + size < len(words) else '')
+                last = i + size >= len(words)
+                yield self._sse(self._response(model, [{'text': text}], body, finished=last))
+
+        return Response(stream(), mimetype='text/event-stream')
+
+    # --- Helpers ---
+
+    def _function_call(self, body):
+        """A canned call if the request declares a matching tool and is not answering one"""
+        contents = body.get('contents') or []
+        if contents and any('functionResponse' in part for part in contents[-1].get('parts', [])):
+            return None
+        for tool in body.get('tools') or []:
+            for declaration in tool.get('functionDeclarations') or []:
+                if declaration.get('name') in self.function_calls:
+                    with self._lock:
+                        self.function_call_replies += 1
+                    return {'name': declaration['name'], 'args': self.function_calls[declaration['name']]}
+        return None
+
+    def _reply_text(self, body):
+        last = ''
+        contents = body.get('contents') or []
+        if contents:
+            for part in contents[-1].get('parts', []):
+                if 'text' in part:
+                    last = part['text']
+                elif 'functionResponse' in part:
+                    last = json.dumps(part['functionResponse'].get('response'))
+        words = f"Fake reply to: {last[:200]}".split()
+        filler = ['lorem', 'ipsum', 'dolor', 'sit', 'amet']
+        while len(words) < self.reply_words:
+            words.append(filler[len(words) % len(filler)])
+        return ' '.join(words)
+
+    @staticmethod
+    def _prompt_tokens(body):
+        return len(json.dumps(body.get('contents', []))) // 4 + len(json.dumps(body.get('tools', []))) // 4
+
+    def _response(self, model, parts, body, finished=True):
+        candidate = {'content': {'role': 'model', 'parts': parts}, 'index': 0}
+        if finished:
+            candidate['finishReason'] = 'STOP'
+        prompt = self._prompt_tokens(body)
+        output = sum(len(p.get('text', '')) for p in parts) // 4 + 1
+        return {
+            'candidates': [candidate],
+            'usageMetadata': {'promptTokenCount': prompt, 'candidatesTokenCount': output,
+                              'totalTokenCount': prompt + output},
+            'modelVersion': model,
+        }
+
+    @staticmethod
+    def _sse(payload):
+        return f"data: {json.dumps(payload)}\r\n\r\n"
+
+    @staticmethod
+    def _error(code, message):
+        return jsonify({'error': {'code': code, 'message': message,
+                                  'status': ERROR_STATUS.get(code, 'UNKNOWN')}}), code
+
+
+def run_load(url, total, concurrency, message, stream):
+    """Drive a chat endpoint and report status codes and latency percentiles"""
+    import requests
+
+    session = requests.Session()
+    results = []
+
+    def one(i):
+        started = time.perf_counter()
+        first = None
+        try:
+            response = session.post(url, json={'message': f"{message} #{i}", 'user_id': f"load-{i % concurrency}"},
+                                    stream=stream, timeout=120)
+            if stream and response.ok:
+                for line in response.iter_lines():
+                    if line.startswith(b'data:') and first is None:
+                        first = time.perf_counter() - started
+            else:
+                response.content
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        return status, time.perf_counter() - started, first
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    def pct(values, q):
+        if not values:
+            return None
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+
+    codes = {}
+    for status, _, _ in results:
+        codes[str(status)] = codes.get(str(status), 0) + 1
+    ok = [latency for status, latency, _ in results if status == 200]
+    ttft = [first for status, _, first in results if status == 200 and first is not None]
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(total / elapsed, 1),
+        'status': codes,
+        'latency_ms': {'p50': pct(ok, 0.5), 'p95': pct(ok, 0.95), 'p99': pct(ok, 0.99),
+                       'mean': round(statistics.mean(ok) * 1000, 1) if ok else None},
+        'ttft_ms': {'p50': pct(ttft, 0.5), 'p95': pct(ttft, 0.95)} if stream else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini API server and load driver")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="run the fake API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=int(os.getenv("FAKE_GEMINI_PORT", "8089")))
+    serve.add_argument("--latency", help="e.g. fixed:200, uniform:100,400, lognormal:400,0.5")
+    serve.add_argument("--chunk-delay-ms", type=float)
+    serve.add_argument("--chunks", type=int)
+    serve.add_argument("--reply-words", type=int)
+    serve.add_argument("--error-rate", type=float)
+    serve.add_argument("--error-codes", help="comma-separated HTTP codes to inject")
+    serve.add_argument("--function-calls", help="JSON object or file of canned calls")
+    serve.add_argument("--seed", type=int)
+
+    load = sub.add_parser("load", help="load-test a chat endpoint")
+    load.add_argument("--url", default="http://127.0.0.1:5001/chat")
+    load.add_argument("--requests", type=int, default=100)
+    load.add_argument("--concurrency", type=int, default=10)
+    load.add_argument("--message", default="How is my stock portfolio doing?")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        fake = FakeGemini(
+            latency=args.latency, chunk_delay_ms=args.chunk_delay_ms, chunks=args.chunks,
+            reply_words=args.reply_words, error_rate=args.error_rate, error_codes=args.error_codes,
+            function_calls=load_function_calls(args.function_calls) if args.function_calls else None,
+            seed=args.seed
+        )
+        print(f"Fake Gemini listening on http://{args.host}:{args.port} (set GEMINI_BASE_URL to use it)")
+        fake.app.run(host=args.host, port=args.port, threaded=True)
+    elif args.command == "load":
+        stream = args.url.rstrip('/').endswith('/stream')
+        print(json.dumps(run_load(args.url, args.requests, args.concurrency, args.message, stream), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local OHLCV history store for the trading strategies.
+Bars are kept on disk as one memory-mapped column file per field, per
+symbol and interval. Syncing only downloads bars newer than the last one
+stored, and windows are served as zero-copy NumPy views.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from market_data import get_provider
+
+# Column name -> (dtype, yfinance column)
+COLUMNS = {
+    'ts': ('<i8', None),
+    'open': ('<f8', 'Open'),
+    'high': ('<f8', 'High'),
+    'low': ('<f8', 'Low'),
+    'close': ('<f8', 'Close'),
+    'volume': ('<f8', 'Volume'),
+}
+
+
+class HistoryStore:
+    """Append-only columnar bar store backed by np.memmap"""
+
+    def __init__(self, root=None, sync_seconds=None, backfill_days=None, provider=None):
+        self.provider = provider or get_provider()
+        self.root = root or os.getenv("HISTORY_STORE_DIR", os.path.join("data", "history"))
+        self.sync_seconds = sync_seconds if sync_seconds is not None else float(os.getenv("HISTORY_SYNC_SECONDS", "300"))
+        self.backfill_days = backfill_days or int(os.getenv("HISTORY_BACKFILL_DAYS", "365"))
+        self._synced_at = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def window(self, symbol, interval='1d', days=None, bars=None, sync=True):
+        """Return {column: array} for the newest bars of a symbol.
+
+        Select by calendar days (like yfinance's period="30d") or by bar
+        count. The arrays are read-only views onto the memory-mapped files.
+        """
+        if sync:
+            self.sync(symbol, interval)
+
+        n = self._length(symbol, interval)
+        columns = {name: self._column(symbol, interval, name, n) for name in COLUMNS}
+        start = 0
+        if days is not None and n:
+            cutoff = int(time.time()) - int(days * 86400)
+            start = int(np.searchsorted(columns['ts'], cutoff, side='left'))
+        if bars is not None:
+            start = max(start, n - bars)
+        return {name: values[start:] for name, values in columns.items()}
+
+    def sync(self, symbol, interval='1d', force=False):
+        """Download bars newer than the last stored one and append them.
+
+        Calls within HISTORY_SYNC_SECONDS of the previous sync are skipped
+        unless force is set. Returns the number of bars appended.
+        """
+        key = (symbol, interval)
+        with self._key_lock(key):
+            last_sync = self._synced_at.get(key)
+            if not force and last_sync is not None and time.monotonic() - last_sync < self.sync_seconds:
+                return 0
+
+            last_ts = self.last_timestamp(symbol, interval)
+            if last_ts is None:
+                frame = self.provider.history(symbol, interval=interval, period=f"{self.backfill_days}d")
+            else:
+                start = datetime.fromtimestamp(last_ts, tz=timezone.utc)
+                frame = self.provider.history(symbol, interval=interval, start=start)
+
+            appended = self.append(symbol, interval, frame)
+            self._synced_at[key] = time.monotonic()
+            return appended
+
+    def append(self, symbol, interval, frame):
+        """Write a yfinance history frame into the store.
+
+        A bar with the same timestamp as the last stored bar replaces it (the
+        current session's bar keeps changing); older bars are ignored.
+        """
+        if frame is None or frame.empty:
+            return 0
+
+        ts = frame.index.as_unit('s').asi8
+        n = self._length(symbol, interval)
+        self._truncate(symbol, interval, n)
+
+        if n:
+            last_ts = int(self._column(symbol, interval, 'ts', n)[-1])
+            same = ts == last_ts
+            if same.any():
+                row = int(np.flatnonzero(same)[-1])
+                for name, (dtype, source) in COLUMNS.items():
+                    if source is None:
+                        continue
+                    column = np.memmap(self._path(symbol, interval, name), dtype=dtype, mode='r+', shape=(n,))
+                    column[-1] = frame[source].iloc[row]
+                    column.flush()
+            keep = ts > last_ts
+        else:
+            keep = np.ones(len(ts), dtype=bool)
+
+        if not keep.any():
+            return 0
+
+        # Write ts last so a partial append is dropped by _length on next open
+        ordered = [item for item in COLUMNS.items() if item[0] != 'ts'] + [('ts', COLUMNS['ts'])]
+        for name, (dtype, source) in ordered:
+            values = ts[keep] if source is None else frame[source].to_numpy()[keep]
+            with open(self._path(symbol, interval, name), 'ab') as f:
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return int(keep.sum())
+
+    def last_timestamp(self, symbol, interval='1d'):
+        """Return the epoch seconds of the newest stored bar, or None"""
+        n = self._length(symbol, interval)
+        if not n:
+            return None
+        return int(self._column(symbol, interval, 'ts', n)[-1])
+
+    def _column(self, symbol, interval, name, n):
+        dtype = COLUMNS[name][0]
+        if not n:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(symbol, interval, name), dtype=dtype, mode='r', shape=(n,))
+
+    def _length(self, symbol, interval):
+        """Number of complete rows, i.e. the shortest column"""
+        lengths = []
+        for name, (dtype, _) in COLUMNS.items():
+            path = self._path(symbol, interval, name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            lengths.append(size // np.dtype(dtype).itemsize)
+        return min(lengths)
+
+    def _truncate(self, symbol, interval, n):
+        """Drop any partially appended rows beyond n"""
+        for name, (dtype, _) in COLUMNS.items():
+            path = self._path(symbol, interval, name)
+            size = n * np.dtype(dtype).itemsize
+            if os.path.exists(path):
+                if os.path.getsize(path) != size:
+                    os.truncate(path, size)
+            else:
+                open(path, 'wb').close()
+
+    def _path(self, symbol, interval, name):
+        directory = os.path.join(self.root, symbol.replace('/', '_').upper(), interval)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{name}.bin")
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
@@ -0,0 +1,225 @@
+"""
+Streaming indicator engine for the trading strategies.
+Keeps running state per symbol and updates it in O(1) per bar, so signals
+can be read on every tick without rebuilding pandas frames.
+
+The newest bar is held as "pending" and can be revised in place while it is
+still forming. Indicators combine the committed state with the pending bar
+at read time, so they match the windowed definitions used by
+mean_reversion_strategy and ai_ml_strategy.
+"""
+
+import bisect
+import math
+import threading
+from collections import deque
+
+
+class RollingStats:
+    """Welford mean/variance over a sliding window of fixed size"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x):
+        """Add a value, evicting the oldest once full. Returns the evicted value or None"""
+        evicted = None
+        if len(self.values) == self.size:
+            evicted = self.values.popleft()
+            self._remove(evicted)
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (x - self.mean)
+        return evicted
+
+    def _remove(self, x):
+        n = len(self.values)
+        if n == 0:
+            self.mean, self._m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / n
+        self._m2 -= delta * (x - self.mean)
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def variance(self, ddof=1):
+        n = len(self.values)
+        if n - ddof <= 0:
+            return float('nan')
+        return max(self._m2, 0.0) / (n - ddof)
+
+    def with_value(self, x, ddof=1):
+        """Mean and std as if x were appended (without evicting), in O(1)"""
+        n = len(self.values) + 1
+        delta = x - self.mean
+        mean = self.mean + delta / n
+        m2 = self._m2 + delta * (x - mean)
+        if n - ddof <= 0:
+            return mean, float('nan')
+        return mean, math.sqrt(max(m2, 0.0) / (n - ddof))
+
+
+class EMA:
+    """Exponential moving average with the pandas span convention"""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def add(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def peek(self, x):
+        """EMA including x without committing it"""
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+
+class SymbolIndicators:
+    """Running indicator state for one symbol.
+
+    Windows are counted in bars including the pending one:
+    - z-score: pending close vs. bars [-lookback, -exclude) (mean_reversion)
+    - volume trend: mean of the last `recent` volumes vs. the `trend_window - recent` before them
+    - volatility: std of pct changes over the last `trend_window` closes
+    - price trend: pending close vs. the close `trend_lag` bars back
+    """
+
+    def __init__(self, lookback=21, exclude=5, trend_window=30, recent=5, trend_lag=10, ema_span=20):
+        self.lookback = lookback
+        self.exclude = exclude
+        self.trend_window = trend_window
+        self.recent = recent
+        self.bars = 0
+        self.pending = None  # (ts, close, volume)
+        self.last_close = None
+
+        # Committed closes wait exclude-1 bars before entering the z-score window
+        self._close_delay = deque()
+        self._close_stats = RollingStats(lookback - exclude)
+        self._recent_volume = deque()
+        self._recent_volume_sum = 0.0
+        self._older_volume = RollingStats(trend_window - recent)
+        self._returns = RollingStats(trend_window - 2)
+        self._close_lag = deque(maxlen=trend_lag - 1)
+        self.ema = EMA(ema_span)
+
+    @property
+    def last_ts(self):
+        return self.pending[0] if self.pending else None
+
+    def update(self, ts, close, volume=0.0):
+        """Apply a bar. A bar with the pending timestamp revises it in place"""
+        if self.pending is not None:
+            if ts == self.pending[0]:
+                self.pending = (ts, close, volume)
+                return
+            if ts < self.pending[0]:
+                return
+            self._commit(self.pending[1], self.pending[2])
+        self.pending = (ts, close, volume)
+        self.bars += 1
+
+    def _commit(self, close, volume):
+        self._close_delay.append(close)
+        if len(self._close_delay) > self.exclude - 1:
+            self._close_stats.add(self._close_delay.popleft())
+
+        self._recent_volume.append(volume)
+        self._recent_volume_sum += volume
+        if len(self._recent_volume) > self.recent - 1:
+            old = self._recent_volume.popleft()
+            self._recent_volume_sum -= old
+            self._older_volume.add(old)
+
+        if self.last_close:
+            self._returns.add(close / self.last_close - 1)
+        self._close_lag.append(close)
+        self.ema.add(close)
+        self.last_close = close
+
+    def snapshot(self):
+        """Current indicator values; entries are None until their window fills"""
+        if self.pending is None:
+            return {'bars': 0}
+        ts, close, volume = self.pending
+
+        z_score = None
+        if self._close_stats.full:
+            std = math.sqrt(self._close_stats.variance(ddof=1))
+            if std > 0:
+                z_score = (close - self._close_stats.mean) / std
+
+        volume_ratio = None
+        if self._older_volume.full and self._older_volume.mean > 0:
+            recent_mean = (self._recent_volume_sum + volume) / self.recent
+            volume_ratio = recent_mean / self._older_volume.mean
+
+        volatility = None
+        if self._returns.full and self.last_close:
+            _, std = self._returns.with_value(close / self.last_close - 1, ddof=1)
+            volatility = std * 100
+
+        price_trend = None
+        if len(self._close_lag) == self._close_lag.maxlen:
+            price_trend = 'up' if close > self._close_lag[0] else 'down'
+
+        return {
+            'bars': self.bars,
+            'timestamp': ts,
+            'price': close,
+            'change': close - self.last_close if self.last_close is not None else 0,
+            'ema': self.ema.peek(close),
+            'z_score': z_score,
+            'price_trend': price_trend,
+            'volume_ratio': volume_ratio,
+            'volume_trend': None if volume_ratio is None else ('increasing' if volume_ratio > 1 else 'stable'),
+            'volatility': volatility,
+        }
+
+
+class IndicatorEngine:
+    """Thread-safe registry of SymbolIndicators"""
+
+    def __init__(self, **params):
+        self.params = params
+        self._symbols = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, ts, close, volume=0.0):
+        """Feed one bar or tick for a symbol"""
+        state = self._state(symbol)
+        with self._lock:
+            state.update(ts, close, volume)
+
+    def ingest(self, symbol, ts, close, volume):
+        """Feed array-like bars, skipping any older than the pending bar"""
+        state = self._state(symbol)
+        with self._lock:
+            start = 0 if state.last_ts is None else bisect.bisect_left(ts, state.last_ts)
+            for i in range(start, len(ts)):
+                state.update(int(ts[i]), float(close[i]), float(volume[i]))
+
+    def snapshot(self, symbol):
+        state = self._state(symbol)
+        with self._lock:
+            return state.snapshot()
+
+    def _state(self, symbol):
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                state = self._symbols[symbol] = SymbolIndicators(**self.params)
+            return state
@@ -1,12 +1,14 @@
 import os
-import google.genai as genai
+
+from llm_gateway import get_genai_client
 
 API_KEY = os.getenv("GOOGLE_API_KEY", "")
 if not API_KEY:
     print("[ERROR] GOOGLE_API_KEY environment variable not set!")
     exit(1)
 
-client = genai.Client(api_key=API_KEY)
+# Honors GEMINI_BASE_URL, so this also works against fake_gemini.py
+client = get_genai_client()
 
 try:
     models = client.models.list()
@@ -0,0 +1,166 @@
+"""
+LLM gateway for the chat endpoints.
+Bounds how many Gemini calls run at once, keeps a bounded wait queue in
+front of them and applies a per-request deadline, so a burst of slow chats
+fails fast with 429 instead of exhausting the web workers. Also owns the
+process-wide genai.Client so every caller shares one HTTP connection pool.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import google.genai as genai
+from google.genai import types
+
+_client = None
+_client_checked = False
+_client_lock = threading.Lock()
+
+
+def get_genai_client():
+    """Return the shared genai.Client, creating it on first use.
+
+    GEMINI_BASE_URL points it somewhere other than Google (e.g. fake_gemini.py).
+    Returns None when GOOGLE_API_KEY is not set.
+    """
+    global _client, _client_checked
+    if _client_checked:
+        return _client
+    with _client_lock:
+        if _client_checked:
+            return _client
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if api_key:
+            pool_size = int(os.getenv("LLM_HTTP_POOL_SIZE", "20"))
+            _client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    base_url=os.getenv("GEMINI_BASE_URL") or None,
+                    timeout=int(float(os.getenv("LLM_TIMEOUT", "60")) * 1000),
+                    client_args={
+                        'limits': httpx.Limits(
+                            max_connections=pool_size,
+                            max_keepalive_connections=pool_size
+                        )
+                    }
+                )
+            )
+        else:
+            print("[WARNING] GOOGLE_API_KEY not set; Gemini calls are disabled")
+        _client_checked = True
+        return _client
+
+
+class GatewayBusy(Exception):
+    """The wait queue is full; the caller should retry after retry_after seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GatewayTimeout(GatewayBusy):
+    """The request's deadline passed while it was waiting for a slot"""
+
+
+class Deadline:
+    """Absolute deadline handed to the caller once it holds a slot"""
+
+    def __init__(self, timeout):
+        self.expires_at = time.monotonic() + timeout
+        self.started_at = None
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def remaining_ms(self):
+        return int(self.remaining() * 1000)
+
+    def http_options(self):
+        """Per-request HttpOptions that stop the HTTP call at the deadline"""
+        return types.HttpOptions(timeout=max(1, self.remaining_ms()))
+
+
+class LLMGateway:
+    """Concurrency limiter with a bounded queue and per-request deadlines"""
+
+    def __init__(self, max_concurrency=None, max_queue=None, timeout=None):
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("LLM_MAX_QUEUE", "16"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._avg_seconds = 5.0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """Hold one concurrency slot for the duration of the block.
+
+        Raises GatewayBusy when the queue is full and GatewayTimeout when the
+        deadline passes before a slot frees up.
+        """
+        deadline = self.acquire(timeout)
+        try:
+            yield deadline
+        finally:
+            self.release(deadline)
+
+    def acquire(self, timeout=None):
+        """Take a slot and return its Deadline; pair with release().
+
+        Used where the slot outlives the request handler, e.g. while a
+        streamed response is still being written.
+        """
+        deadline = Deadline(timeout or self.timeout)
+        with self._cond:
+            if self._active >= self.max_concurrency:
+                if self._waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise GatewayBusy("LLM gateway queue is full", self._retry_after())
+                self._waiting += 1
+                try:
+                    while self._active >= self.max_concurrency:
+                        if not self._cond.wait(deadline.remaining()) and deadline.remaining() == 0:
+                            self.timed_out += 1
+                            raise GatewayTimeout("Timed out waiting for an LLM slot", self._retry_after())
+                finally:
+                    self._waiting -= 1
+            self._active += 1
+        deadline.started_at = time.monotonic()
+        return deadline
+
+    def release(self, deadline):
+        """Return a slot taken by acquire()"""
+        elapsed = time.monotonic() - deadline.started_at
+        with self._cond:
+            self._active -= 1
+            self.completed += 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'timeout': self.timeout,
+                'active': self._active,
+                'waiting': self._waiting,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_seconds': round(self._avg_seconds, 3),
+            }
+
+    def _retry_after(self):
+        """Seconds until the current backlog should have drained. Lock held"""
+        backlog = self._waiting + 1
+        return max(1, math.ceil(self._avg_seconds * backlog / self.max_concurrency))
@@ -0,0 +1,307 @@
+"""
+Pluggable market-data providers for the trading service.
+LiveMarketDataProvider talks to yfinance and ccxt. ReplayMarketDataProvider
+serves recorded OHLCV bars and tickers from fixture files, with optional
+injected latency and errors, so the trading endpoints can be load-tested
+offline with repeatable results.
+
+Select with MARKET_DATA_PROVIDER=live|replay. Record fixtures with:
+    python market_data.py record --symbols AAPL,MSFT --pairs BTC/USDT --out fixtures/market_data
+or generate synthetic ones (no network needed) with:
+    python market_data.py synthesize --symbols AAPL,MSFT --pairs BTC/USDT --seed 7
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from exchange_registry import exchange_registry
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataError(ConnectionError):
+    """Raised by providers when an upstream (or injected) failure occurs"""
+
+
+class MarketDataProvider:
+    """Interface used by GlobalTradingService and HistoryStore.
+
+    Frames use yfinance's layout: Open/High/Low/Close/Volume columns on a
+    tz-aware DatetimeIndex.
+    """
+
+    def history(self, symbol, interval='1d', period=None, start=None):
+        """Bars for one symbol, either the trailing period or everything from start"""
+        raise NotImplementedError
+
+    def download(self, symbols, interval='1m', period='1d'):
+        """Bars for many symbols in one request, as {symbol: frame}"""
+        return {symbol: self.history(symbol, interval=interval, period=period) for symbol in symbols}
+
+    def fetch_tickers(self, symbols, venue=None):
+        """Crypto tickers as {pair: {'last', 'baseVolume', 'change', ...}}"""
+        raise NotImplementedError
+
+    def schedule_refresh(self, scheduler):
+        """Register any periodic maintenance jobs"""
+
+
+class LiveMarketDataProvider(MarketDataProvider):
+    """yfinance for equities, the shared ccxt registry for crypto"""
+
+    def __init__(self, exchanges=None):
+        self.exchanges = exchanges or exchange_registry
+
+    def history(self, symbol, interval='1d', period=None, start=None):
+        stock = yf.Ticker(symbol)
+        if start is not None:
+            return stock.history(start=start, interval=interval)
+        return stock.history(period=period or '1mo', interval=interval)
+
+    def download(self, symbols, interval='1m', period='1d'):
+        data = yf.download(
+            tickers=symbols,
+            period=period,
+            interval=interval,
+            group_by='ticker',
+            threads=False,
+            progress=False
+        )
+        frames = {}
+        if data.empty:
+            return frames
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frames[symbol] = data[symbol].dropna(subset=['Close'])
+            elif len(symbols) == 1:
+                frames[symbol] = data.dropna(subset=['Close'])
+        return frames
+
+    def fetch_tickers(self, symbols, venue=None):
+        return self.exchanges.fetch_tickers(symbols, venue)
+
+    def schedule_refresh(self, scheduler):
+        self.exchanges.schedule_refresh(scheduler)
+
+
+class ReplayMarketDataProvider(MarketDataProvider):
+    """Serves fixtures from disk with deterministic latency and error injection.
+
+    Layout under the fixture directory:
+        ohlcv/<SYMBOL>_<interval>.csv   timestamp,open,high,low,close,volume (UTC)
+        tickers.json                    {"BTC/USDT": {"last": ..., "baseVolume": ..., "change": ...}}
+
+    Periods are measured back from the last recorded bar rather than the wall
+    clock, so a replay returns the same bars no matter when it runs.
+    """
+
+    def __init__(self, fixture_dir=None, latency_ms=None, jitter_ms=None, error_rate=None, seed=None):
+        self.fixture_dir = fixture_dir or os.getenv("MARKET_DATA_FIXTURES", os.path.join("fixtures", "market_data"))
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("MARKET_DATA_REPLAY_LATENCY_MS", "0"))
+        self.jitter_ms = jitter_ms if jitter_ms is not None else float(os.getenv("MARKET_DATA_REPLAY_JITTER_MS", "0"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("MARKET_DATA_REPLAY_ERROR_RATE", "0"))
+        self._random = random.Random(seed if seed is not None else int(os.getenv("MARKET_DATA_REPLAY_SEED", "42")))
+        self._random_lock = threading.Lock()
+        self._frames = {}
+        self._tickers = None
+        self.calls = 0
+        self.errors = 0
+
+    def history(self, symbol, interval='1d', period=None, start=None):
+        self._simulate_call(f"history {symbol} {interval}")
+        frame = self._load_frame(symbol, interval)
+        if frame.empty:
+            return frame
+        if start is not None:
+            start = pd.Timestamp(start)
+            start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+            return frame[frame.index >= start]
+        cutoff = frame.index[-1] - _period_to_timedelta(period or '1mo')
+        return frame[frame.index > cutoff]
+
+    def download(self, symbols, interval='1m', period='1d'):
+        # One simulated round-trip for the whole batch, like yf.download
+        self._simulate_call(f"download {len(symbols)} symbols")
+        frames = {}
+        for symbol in symbols:
+            frame = self._load_frame(symbol, interval)
+            if not frame.empty:
+                cutoff = frame.index[-1] - _period_to_timedelta(period)
+                frames[symbol] = frame[frame.index > cutoff]
+        return frames
+
+    def fetch_tickers(self, symbols, venue=None):
+        self._simulate_call(f"fetch_tickers {len(symbols)} pairs")
+        if self._tickers is None:
+            path = os.path.join(self.fixture_dir, 'tickers.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._tickers = json.load(f)
+            else:
+                self._tickers = {}
+        return {symbol: dict(self._tickers[symbol]) for symbol in symbols if symbol in self._tickers}
+
+    def stats(self):
+        return {
+            'fixture_dir': self.fixture_dir,
+            'latency_ms': self.latency_ms,
+            'jitter_ms': self.jitter_ms,
+            'error_rate': self.error_rate,
+            'calls': self.calls,
+            'errors': self.errors,
+        }
+
+    def _simulate_call(self, what):
+        with self._random_lock:
+            self.calls += 1
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if fail:
+            raise MarketDataError(f"Injected replay failure: {what}")
+
+    def _load_frame(self, symbol, interval):
+        key = (symbol, interval)
+        frame = self._frames.get(key)
+        if frame is None:
+            path = os.path.join(self.fixture_dir, 'ohlcv', f"{_fixture_name(symbol)}_{interval}.csv")
+            if os.path.exists(path):
+                raw = pd.read_csv(path)
+                frame = pd.DataFrame(
+                    raw[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=float),
+                    columns=OHLCV_COLUMNS,
+                    index=pd.to_datetime(raw['timestamp'], utc=True)
+                ).sort_index()
+            else:
+                frame = pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+            self._frames[key] = frame
+        return frame
+
+
+def _fixture_name(symbol):
+    return symbol.replace('/', '_').upper()
+
+
+def _period_to_timedelta(period):
+    """Translate yfinance periods ('1d', '30d', '3mo', '1y') to a Timedelta"""
+    if period.endswith('mo'):
+        return pd.Timedelta(days=30 * int(period[:-2]))
+    if period.endswith('y'):
+        return pd.Timedelta(days=365 * int(period[:-1]))
+    if period.endswith('d'):
+        return pd.Timedelta(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def get_provider(name=None):
+    """Build the provider selected by MARKET_DATA_PROVIDER (default: live)"""
+    name = name or os.getenv("MARKET_DATA_PROVIDER", "live")
+    if name == 'replay':
+        return ReplayMarketDataProvider()
+    if name == 'live':
+        return LiveMarketDataProvider()
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def record_fixtures(out_dir, symbols=(), pairs=(), intervals=(('1d', '365d'), ('1m', '1d'))):
+    """Snapshot live bars and tickers into the replay fixture layout"""
+    live = LiveMarketDataProvider()
+    for symbol in symbols:
+        for interval, period in intervals:
+            frame = live.history(symbol, interval=interval, period=period)
+            _write_ohlcv(out_dir, symbol, interval, frame)
+            print(f"Recorded {len(frame)} {interval} bars for {symbol}")
+    if pairs:
+        tickers = live.fetch_tickers(list(pairs))
+        keep = ('symbol', 'last', 'baseVolume', 'quoteVolume', 'change', 'percentage', 'bid', 'ask')
+        _write_tickers(out_dir, {pair: {k: t.get(k) for k in keep} for pair, t in tickers.items()})
+        print(f"Recorded {len(tickers)} tickers")
+
+
+def synthesize_fixtures(out_dir, symbols=(), pairs=(), daily_bars=400, minute_bars=390, seed=7):
+    """Write seeded random-walk fixtures for offline benchmarks"""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp('2024-01-02T21:00:00Z')
+    for symbol in symbols:
+        for interval, bars, step, sigma in (('1d', daily_bars, 'D', 0.015), ('1m', minute_bars, 'min', 0.0008)):
+            index = pd.date_range(end=end, periods=bars, freq=step, tz='UTC')
+            close = rng.uniform(20, 400) * np.cumprod(1 + rng.normal(0, sigma, bars))
+            spread = np.abs(rng.normal(0, sigma, bars)) * close
+            frame = pd.DataFrame({
+                'Open': np.r_[close[0], close[:-1]],
+                'High': close + spread,
+                'Low': close - spread,
+                'Close': close,
+                'Volume': rng.integers(10_000, 5_000_000, bars).astype(float),
+            }, index=index)
+            _write_ohlcv(out_dir, symbol, interval, frame)
+    tickers = {}
+    for pair in pairs:
+        last = float(rng.uniform(0.5, 60000))
+        tickers[pair] = {
+            'symbol': pair,
+            'last': last,
+            'baseVolume': float(rng.uniform(1e3, 1e6)),
+            'change': float(last * rng.normal(0, 0.02)),
+        }
+    if tickers:
+        _write_tickers(out_dir, tickers)
+    print(f"Synthesized fixtures for {len(symbols)} symbols and {len(pairs)} pairs in {out_dir}")
+
+
+def _write_ohlcv(out_dir, symbol, interval, frame):
+    os.makedirs(os.path.join(out_dir, 'ohlcv'), exist_ok=True)
+    out = pd.DataFrame({
+        'timestamp': frame.index.tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'open': frame['Open'].to_numpy(),
+        'high': frame['High'].to_numpy(),
+        'low': frame['Low'].to_numpy(),
+        'close': frame['Close'].to_numpy(),
+        'volume': frame['Volume'].to_numpy(),
+    })
+    out.to_csv(os.path.join(out_dir, 'ohlcv', f"{_fixture_name(symbol)}_{interval}.csv"), index=False)
+
+
+def _write_tickers(out_dir, tickers):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'tickers.json'), 'w') as f:
+        json.dump(tickers, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Market data fixture tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    record = sub.add_parser('record', help="Record live data into replay fixtures")
+    record.add_argument('--symbols', default='', help="Comma-separated stock symbols")
+    record.add_argument('--pairs', default='', help="Comma-separated crypto pairs")
+    record.add_argument('--out', default=os.path.join("fixtures", "market_data"), help="Fixture directory")
+    synth = sub.add_parser('synthesize', help="Generate seeded random-walk fixtures")
+    synth.add_argument('--symbols', default='', help="Comma-separated stock symbols")
+    synth.add_argument('--pairs', default='', help="Comma-separated crypto pairs")
+    synth.add_argument('--out', default=os.path.join("fixtures", "market_data"), help="Fixture directory")
+    synth.add_argument('--seed', type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    pairs = [p.strip().upper() for p in args.pairs.split(',') if p.strip()]
+    if args.command == 'record':
+        record_fixtures(args.out, symbols, pairs)
+    else:
+        synthesize_fixtures(args.out, symbols, pairs, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Tiered model routing for Gemini calls.
+Simple intents (keyword-routed persona chats, tool lookups, structured
+verdicts) go to a small fast model; analysis-heavy requests go to the large
+one. When a small-model answer fails its validator the call is repeated on
+the large tier. Per-tier latency, token and cost counters are kept so the
+routing thresholds can be tuned from real traffic.
+"""
+
+import os
+import re
+import threading
+import time
+
+TIERS = ('small', 'large')
+
+# Word stems that mark a request as analysis rather than a lookup or CRUD action
+ANALYSIS_TERMS = (
+    "analy", "compar", "evaluat", "assess", "forecast", "predict", "project",
+    "strateg", "recommend", "optimi", "explain", "why", "plan", "risk",
+    "tradeoff", "pros and cons", "should i",
+)
+
+# Finish reasons that mean the answer is unusable
+BAD_FINISH_REASONS = {'MAX_TOKENS', 'SAFETY', 'RECITATION', 'MALFORMED_FUNCTION_CALL', 'BLOCKLIST', 'OTHER'}
+
+VERDICT_PATTERN = re.compile(r"\b(BUY|SELL|HOLD)\b", re.IGNORECASE)
+
+
+def finish_reason(response):
+    candidates = getattr(response, 'candidates', None) or []
+    reason = getattr(candidates[0], 'finish_reason', None) if candidates else None
+    return getattr(reason, 'name', reason)
+
+
+def valid_reply(response):
+    """A chat turn is usable if it calls a tool or returns text that was not cut off"""
+    if finish_reason(response) in BAD_FINISH_REASONS:
+        return False
+    return bool(response.function_calls) or bool((response.text or '').strip())
+
+
+def valid_verdict(response):
+    """A trading verdict must name an action and give a confidence figure"""
+    text = response.text or ''
+    return bool(VERDICT_PATTERN.search(text)) and any(char.isdigit() for char in text)
+
+
+class TierStats:
+    """Counters for one model tier"""
+
+    def __init__(self, model, price_in, price_out):
+        self.model = model
+        self.price_in = price_in    # USD per million prompt tokens
+        self.price_out = price_out  # USD per million output tokens
+        self.routed = 0
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def cost(self):
+        return (self.input_tokens * self.price_in + self.output_tokens * self.price_out) / 1e6
+
+    def as_dict(self):
+        return {
+            'model': self.model,
+            'routed': self.routed,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'avg_latency_ms': round(self.latency_total / self.calls * 1000, 1) if self.calls else None,
+            'max_latency_ms': round(self.latency_max * 1000, 1),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cost_usd': round(self.cost(), 6),
+        }
+
+
+class ModelRouter:
+    """Picks a model tier per request and escalates rejected small-tier answers"""
+
+    def __init__(self, small_model=None, large_model=None, analysis_min_words=None, enabled=None):
+        large_default = os.getenv("TRADING_LLM_MODEL") or os.getenv("CHAT_LLM_MODEL") or "gemini-1.5-pro"
+        self.tiers = {
+            'small': TierStats(
+                small_model or os.getenv("LLM_SMALL_MODEL", "gemini-1.5-flash"),
+                float(os.getenv("LLM_SMALL_PRICE_IN", "0.075")),
+                float(os.getenv("LLM_SMALL_PRICE_OUT", "0.30"))
+            ),
+            'large': TierStats(
+                large_model or os.getenv("LLM_LARGE_MODEL", large_default),
+                float(os.getenv("LLM_LARGE_PRICE_IN", "1.25")),
+                float(os.getenv("LLM_LARGE_PRICE_OUT", "5.00"))
+            ),
+        }
+        self.analysis_min_words = analysis_min_words or int(os.getenv("LLM_ANALYSIS_MIN_WORDS", "80"))
+        self.enabled = enabled if enabled is not None else os.getenv("LLM_TIER_ROUTING", "on") != "off"
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in ANALYSIS_TERMS) + ")")
+        self.escalations = 0
+        self._lock = threading.Lock()
+
+    def model(self, tier):
+        return self.tiers[tier].model
+
+    def tier_for(self, message):
+        """'large' for analysis-heavy or long messages, 'small' otherwise"""
+        if not self.enabled:
+            return 'large'
+        if len(message.split()) >= self.analysis_min_words or self.pattern.search(message.lower()):
+            return 'large'
+        return 'small'
+
+    def route(self, message='', tier=None):
+        """Count and return the starting tier for a request (`tier` forces one while routing is on)"""
+        if not self.enabled:
+            tier = 'large'
+        elif tier is None:
+            tier = self.tier_for(message)
+        with self._lock:
+            self.tiers[tier].routed += 1
+        return tier
+
+    def record(self, tier, started, response=None, error=False):
+        """Add one call's latency and token usage to the tier's counters"""
+        elapsed = time.perf_counter() - started
+        usage = getattr(response, 'usage_metadata', None)
+        with self._lock:
+            stats = self.tiers[tier]
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.latency_total += elapsed
+            stats.latency_max = max(stats.latency_max, elapsed)
+            if usage is not None:
+                stats.input_tokens += usage.prompt_token_count or 0
+                stats.output_tokens += usage.candidates_token_count or 0
+
+    def escalate(self, tier):
+        """Note a rejected answer from `tier` and return the tier to retry on (None at the top)"""
+        if tier != 'small':
+            return None
+        with self._lock:
+            self.tiers[tier].rejected += 1
+            self.escalations += 1
+        return 'large'
+
+    def generate(self, client, contents, config=None, tier='small', validate=None):
+        """generate_content on the tier's model, escalating when validate(response) fails.
+
+        Returns (response, tier that produced it). A large-tier answer is
+        returned even if it fails validation; the caller decides what to do.
+        """
+        while True:
+            started = time.perf_counter()
+            try:
+                response = client.models.generate_content(model=self.model(tier), contents=contents, config=config)
+            except Exception:
+                self.record(tier, started, error=True)
+                raise
+            self.record(tier, started, response)
+            if validate is None or validate(response):
+                return response, tier
+            next_tier = self.escalate(tier)
+            if next_tier is None:
+                return response, tier
+            tier = next_tier
+
+    def stats(self):
+        with self._lock:
+            tiers = {name: stats.as_dict() for name, stats in self.tiers.items()}
+            escalations = self.escalations
+        small_routed = tiers['small']['routed']
+        return {
+            'enabled': self.enabled,
+            'analysis_min_words': self.analysis_min_words,
+            'tiers': tiers,
+            'escalations': escalations,
+            'escalation_rate': round(escalations / small_routed, 3) if small_routed else 0.0,
+            'total_cost_usd': round(sum(t['cost_usd'] for t in tiers.values()), 6),
+        }
+
+
+# Shared by every assistant and the trading service so counters cover the whole process
+router = ModelRouter()
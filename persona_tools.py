@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Gemini function declarations scoped per persona.
+Declarations are built once at import from the tool schemas and cached per
+persona, and a request only carries the tools of the persona handling it
+instead of every persona's schema.
+
+    python persona_tools.py report    # prompt tokens saved per persona
+"""
+
+import argparse
+import json
+
+from google.genai import types
+
+from chat_context import estimate_tokens
+from personas import PERSONAS
+from stock_tools import STOCK_TOOLS, execute_stock_tools
+
+# Every tool schema the assistant can declare, by name
+TOOL_SCHEMAS = {tool["name"]: tool for tool in STOCK_TOOLS}
+
+# Declaration fields sent to Gemini; STOCK_TOOLS also carries timeout/cache settings
+_SCHEMA_KEYS = ("type", "description", "enum", "properties", "items", "required")
+
+
+def _schema(spec):
+    """Convert a JSON-schema style dict into types.Schema"""
+    fields = {key: spec[key] for key in _SCHEMA_KEYS if key in spec}
+    if "type" in fields:
+        fields["type"] = fields["type"].upper()
+    if "properties" in fields:
+        fields["properties"] = {name: _schema(prop) for name, prop in fields["properties"].items()}
+    if "items" in fields:
+        fields["items"] = _schema(fields["items"])
+    return types.Schema(**fields)
+
+
+def function_declaration(tool):
+    return types.FunctionDeclaration(
+        name=tool["name"],
+        description=tool["description"],
+        parameters=_schema(tool["parameters"]) if tool.get("parameters", {}).get("properties") else None,
+    )
+
+
+_DECLARATIONS = {name: function_declaration(tool) for name, tool in TOOL_SCHEMAS.items()}
+
+PERSONA_DECLARATIONS = {
+    key: [_DECLARATIONS[name] for name in persona.get("tools", []) if name in _DECLARATIONS]
+    for key, persona in PERSONAS.items()
+}
+
+# Ready-made `tools` values for GenerateContentConfig; None when a persona has no tools
+PERSONA_TOOL_CONFIG = {
+    key: [types.Tool(function_declarations=declarations)] if declarations else None
+    for key, declarations in PERSONA_DECLARATIONS.items()
+}
+
+
+def get_tools_for_persona(persona_key):
+    """FunctionDeclarations available to a persona"""
+    return PERSONA_DECLARATIONS.get(persona_key, [])
+
+
+def tools_for_persona(persona_key):
+    """Prebuilt GenerateContentConfig.tools for a persona (None if it has no tools)"""
+    return PERSONA_TOOL_CONFIG.get(persona_key)
+
+
+def execute_tool_calls(function_calls):
+    """Run one model turn's function calls; results are in call order"""
+    return execute_stock_tools(function_calls)
+
+
+def _declaration_tokens(declarations):
+    payload = [d.model_dump(mode="json", exclude_none=True) for d in declarations]
+    return estimate_tokens(json.dumps(payload)) if payload else 0
+
+
+def token_savings_report():
+    """Estimated tool-schema prompt tokens per request: every declaration vs. the persona's own"""
+    all_tokens = _declaration_tokens(list(_DECLARATIONS.values()))
+    report = {}
+    for key, declarations in PERSONA_DECLARATIONS.items():
+        persona_tokens = _declaration_tokens(declarations)
+        report[key] = {
+            "tools": len(declarations),
+            "tokens_all_tools": all_tokens,
+            "tokens_persona_tools": persona_tokens,
+            "tokens_saved": all_tokens - persona_tokens,
+            "saved_pct": round((all_tokens - persona_tokens) / all_tokens * 100, 1) if all_tokens else 0.0,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persona tool declarations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="estimated prompt tokens saved per persona")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        print(json.dumps(token_savings_report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
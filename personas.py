@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Persona definitions and the keyword router that picks a persona per message.
+All keywords (and explicit persona names) are compiled into one trie-shaped
+regex, so a message is scored for every persona in a single scan instead of
+one substring search per keyword. Keywords match at a word start and may
+carry a suffix ("share" matches "shares" but not "timeshare").
+
+    python personas.py bench    # compare against the substring router
+"""
+
+import argparse
+import re
+import time
+
+PERSONAS = {
+    "campaign_manager": {
+        "name": "Campaign Manager",
+        "emoji": "🎯",
+        "description": "Manages marketing campaigns across platforms",
+        "tools": [],
+    },
+    "stock_analyst": {
+        "name": "Stock Market Analyst",
+        "emoji": "📈",
+        "description": "Tracks stock investments and dividends",
+        "tools": ["get_stock_quote", "get_penny_stocks", "get_stock_intraday", "get_stock_daily"],
+    },
+    "learning_manager": {
+        "name": "Learning & Development Manager",
+        "emoji": "🎓",
+        "description": "Tracks educational progress",
+        "tools": [],
+    },
+    "financial_assistant": {
+        "name": "Financial Assistant",
+        "emoji": "💰",
+        "description": "Logs financial transactions",
+        "tools": [],
+    },
+    "app_customizer": {
+        "name": "App Customizer",
+        "emoji": "⚙️",
+        "description": "Manages app settings and preferences",
+        "tools": [],
+    },
+    "language_assistant": {
+        "name": "Language Assistant",
+        "emoji": "🌍",
+        "description": "Provides translation and multilingual support (65+ languages)",
+        "tools": [],
+    }
+}
+
+PERSONA_KEYWORDS = {
+    "campaign_manager": ["campaign", "marketing", "ads", "instagram", "facebook", "tiktok", "twitter", "platform", "pinterest"],
+    "stock_analyst": ["stock", "dividend", "invest", "share", "portfolio", "market", "nasdaq"],
+    "learning_manager": ["learning", "course", "education", "training", "skill", "progress", "module"],
+    "financial_assistant": ["transaction", "deposit", "withdrawal", "payout", "payment", "finance", "paypal"],
+    "app_customizer": ["theme", "settings", "view", "customize", "dark", "light"],
+    "language_assistant": ["translate", "language", "spanish", "french", "german", "chinese", "japanese"],
+}
+
+# Optional per-keyword weights; unlisted keywords count 1
+PERSONA_KEYWORD_WEIGHTS = {}
+
+# Naming a persona outright ("Stock Analyst, ...") beats any keyword score
+EXPLICIT_WEIGHT = 1000
+
+DEFAULT_PERSONA = "campaign_manager"
+
+
+def _trie_pattern(terms):
+    """Alternation factored into a prefix trie.
+
+    A flat "a|b|c" is tried branch by branch at every position; the trie
+    form branches on one character at a time, so the cost of a scan stays
+    nearly flat as keywords are added. Optional tails are greedy, so the
+    longest term wins ("marketing" over "market").
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class PersonaRouter:
+    """Single-pass weighted keyword router"""
+
+    def __init__(self, personas, keywords, weights=None, default=DEFAULT_PERSONA):
+        self.order = list(personas)
+        self.default = default
+        weights = weights or {}
+
+        # term -> (persona index, weight); explicit names first so they win on collisions
+        self.terms = {}
+        for index, (key, data) in enumerate(personas.items()):
+            for name in (data["name"].lower(), key.replace("_", " ")):
+                self.terms.setdefault(name, (index, EXPLICIT_WEIGHT))
+        for key, words in keywords.items():
+            index = self.order.index(key)
+            for word in words:
+                self.terms.setdefault(word.lower(), (index, weights.get(word, 1)))
+
+        self.pattern = re.compile(rf"\b({_trie_pattern(self.terms)})\w*")
+
+    def scores(self, message):
+        """Score per persona; each distinct term counts once"""
+        totals = [0] * len(self.order)
+        for term in set(self.pattern.findall(message.lower())):
+            index, weight = self.terms[term]
+            totals[index] += weight
+        return dict(zip(self.order, totals))
+
+    def route(self, message):
+        return self._pick(set(self.pattern.findall(message.lower())))
+
+    def route_many(self, messages):
+        """Route a batch of messages"""
+        pattern = self.pattern
+        pick = self._pick
+        return [pick(set(pattern.findall(message.lower()))) for message in messages]
+
+    def _pick(self, terms):
+        if not terms:
+            return self.default
+        totals = [0] * len(self.order)
+        for term in terms:
+            index, weight = self.terms[term]
+            totals[index] += weight
+        best = max(range(len(totals)), key=totals.__getitem__)  # first persona wins ties
+        return self.order[best] if totals[best] > 0 else self.default
+
+
+router = PersonaRouter(PERSONAS, PERSONA_KEYWORDS, PERSONA_KEYWORD_WEIGHTS)
+
+
+def detect_persona(user_message: str) -> str:
+    """Detects which persona should handle the request."""
+    return router.route(user_message)
+
+
+def detect_personas(user_messages: list) -> list:
+    """Batch version of detect_persona."""
+    return router.route_many(user_messages)
+
+
+def _substring_detect_persona(user_message, persona_keywords=PERSONA_KEYWORDS):
+    """Previous router (one substring search per keyword), kept for the benchmark"""
+    message_lower = user_message.lower()
+    for persona_key, persona_data in PERSONAS.items():
+        persona_name = persona_data["name"].lower()
+        if persona_name in message_lower or persona_key.replace("_", " ") in message_lower:
+            return persona_key
+    persona_scores = {persona: 0 for persona in PERSONAS.keys()}
+    for persona_key, keywords in persona_keywords.items():
+        for keyword in keywords:
+            if keyword in message_lower:
+                persona_scores[persona_key] += 1
+    best_persona = max(persona_scores, key=persona_scores.get)
+    if persona_scores[best_persona] > 0:
+        return best_persona
+    return DEFAULT_PERSONA
+
+
+BENCH_MESSAGES = [
+    "Create a new Instagram campaign called Summer Sale",
+    "Hey Stock Analyst, log my Apple stock purchase: 10 shares at $150",
+    "Learning Manager, update my AI Tools course to 50% progress",
+    "Log an affiliate payout of $500 via PayPal",
+    "Set my application theme to dark mode",
+    "Translate this to Spanish: Hello, how are you?",
+    "Can you help me figure out what to do next with the quarterly numbers we reviewed yesterday?",
+    "I want to purchase 5 shares of Microsoft at $300 each",
+]
+
+
+def benchmark(rounds=2000, extra_keywords=0):
+    """Time the substring router against the compiled router (single and batch)"""
+    keywords = {key: list(words) for key, words in PERSONA_KEYWORDS.items()}
+    for key in keywords:
+        keywords[key] += [f"{key[:4]}term{i}" for i in range(extra_keywords)]
+    compiled = PersonaRouter(PERSONAS, keywords)
+
+    messages = BENCH_MESSAGES * rounds
+    results = {}
+    for label, run in (
+        ("substring", lambda: [_substring_detect_persona(m, keywords) for m in messages]),
+        ("compiled", lambda: [compiled.route(m) for m in messages]),
+        ("compiled_batch", lambda: compiled.route_many(messages)),
+    ):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        results[label] = round(elapsed / len(messages) * 1e6, 2)  # microseconds per message
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persona router tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="micro-benchmark the persona routers")
+    bench.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        for extra in (0, 50, 200):
+            total = sum(len(words) for words in PERSONA_KEYWORDS.values()) + extra * len(PERSONA_KEYWORDS)
+            print(f"{total} keywords (us/message): {benchmark(args.rounds, extra)}")
+
+
+if __name__ == "__main__":
+    main()
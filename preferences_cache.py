@@ -0,0 +1,184 @@
+"""
+Read-through cache for user preferences.
+Preferences are read on almost every request and rarely change, so each
+user's row (or the defaults, for users without one) is kept in a per-process
+TTL + LRU cache and, with REDIS_URL set, in Redis so all workers share it.
+Writes go through the cache: the writer stores the new row and drops every
+other copy, and a read that raced a write never stores its stale result.
+Across workers that guard is a per-user generation counter in Redis: every
+invalidation bumps it, and a loaded row is published only if the counter is
+unchanged since before the load (WATCH/MULTI).
+
+Entries are kept per namespace (the Supabase key role that read them),
+because an anon-key read can see less than a service-key read under RLS.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+NAMESPACES = ("service", "anon")
+
+
+class PreferencesCache:
+    """TTL + LRU cache of preference rows keyed by (namespace, user_id), optionally backed by Redis"""
+
+    def __init__(self, ttl=None, max_entries=None, redis_url=None, local_ttl=None):
+        self.ttl = ttl or float(os.getenv("PREFS_CACHE_TTL", "300"))
+        self.max_entries = max_entries or int(os.getenv("PREFS_CACHE_SIZE", "10000"))
+        self.redis_url = redis_url or os.getenv("REDIS_URL")
+        self.redis = redis.Redis.from_url(
+            self.redis_url,
+            socket_timeout=float(os.getenv("PREFS_CACHE_REDIS_TIMEOUT", "0.25"))
+        ) if self.redis_url else None
+        # With Redis, the local copy only absorbs bursts; Redis carries invalidations across workers
+        self.local_ttl = local_ttl or float(os.getenv("PREFS_CACHE_LOCAL_TTL", "5" if self.redis else str(self.ttl)))
+        self._entries = OrderedDict()  # (namespace, user_id) -> (row, stored_at)
+        self._written = {}             # user_id -> monotonic time of the last write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.redis_errors = 0
+        self.stale_loads = 0  # loaded rows not published because of a concurrent write
+
+    @staticmethod
+    def _redis_key(namespace, user_id):
+        return f"prefs:{namespace}:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id):
+        return f"prefs:gen:{user_id}"
+
+    def get(self, user_id, loader, namespace="service"):
+        """Return the cached row, else loader(user_id) (cached unless it is an error)"""
+        key = (namespace, user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.local_ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+
+        generation = None
+        if self.redis is not None:
+            try:
+                # The generation is read before the load so a write during it is noticed
+                raw, generation = self.redis.mget(self._redis_key(namespace, user_id),
+                                                  self._generation_key(user_id))
+            except redis.RedisError as e:
+                raw = None
+                self._redis_error(e)
+            if raw is not None:
+                row = json.loads(raw)
+                self._store(key, row, now)
+                with self._lock:
+                    self.redis_hits += 1
+                return dict(row)
+
+        with self._lock:
+            self.misses += 1
+        row = loader(user_id)
+        if isinstance(row, dict) and "error" not in row:
+            if self._store(key, row, now) and self.redis is not None:
+                self._publish_if_current(key, row, generation)
+        return row
+
+    def write(self, user_id, row, namespace="service"):
+        """Write-through after a successful save: keep the new row, drop other copies"""
+        self.invalidate(user_id)
+        if isinstance(row, dict) and row and "error" not in row:
+            self._store((namespace, user_id), row, time.monotonic(), publish=True, force=True)
+
+    def invalidate(self, user_id):
+        """Forget a user's preferences in every namespace, here and in Redis"""
+        now = time.monotonic()
+        with self._lock:
+            self.writes += 1
+            self._written[user_id] = now
+            for namespace in NAMESPACES:
+                self._entries.pop((namespace, user_id), None)
+            if len(self._written) > self.max_entries:
+                # Only writes newer than any in-flight load matter
+                cutoff = now - 60
+                self._written = {uid: at for uid, at in self._written.items() if at >= cutoff}
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.incr(self._generation_key(user_id))
+                # Outlives any load that could still be in flight
+                pipe.pexpire(self._generation_key(user_id), int(self.ttl * 1000))
+                pipe.delete(*(self._redis_key(namespace, user_id) for namespace in NAMESPACES))
+                pipe.execute()
+            except redis.RedisError as e:
+                self._redis_error(e)
+
+    def _store(self, key, row, loaded_at, publish=False, force=False):
+        """Cache a row unless a write for the user happened after it was loaded; True if stored"""
+        with self._lock:
+            if not force and self._written.get(key[1], float("-inf")) >= loaded_at:
+                return False
+            self._entries[key] = (dict(row), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if publish and self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(*key), json.dumps(row, default=str), px=int(self.ttl * 1000))
+            except redis.RedisError as e:
+                self._redis_error(e)
+        return True
+
+    def _publish_if_current(self, key, row, generation):
+        """Publish a loaded row to Redis only if no worker invalidated the user since the load began"""
+        generation_key = self._generation_key(key[1])
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(generation_key)
+                if pipe.get(generation_key) != generation:
+                    with self._lock:
+                        self.stale_loads += 1
+                    return False
+                pipe.multi()
+                pipe.set(self._redis_key(*key), json.dumps(row, default=str), px=int(self.ttl * 1000))
+                pipe.execute()
+                return True
+        except redis.WatchError:
+            with self._lock:
+                self.stale_loads += 1
+        except redis.RedisError as e:
+            self._redis_error(e)
+        return False
+
+    def _redis_error(self, e):
+        with self._lock:
+            self.redis_errors += 1
+        print(f"[PreferencesCache] Redis unavailable, using local cache only: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'local_ttl': self.local_ttl,
+                'redis': bool(self.redis),
+                'hits': self.hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'redis_errors': self.redis_errors,
+                'stale_loads': self.stale_loads,
+                'hit_rate': round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Shared by PreferencesDB and SupabaseManager so a write through either invalidates both
+preferences_cache = PreferencesCache()
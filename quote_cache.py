@@ -0,0 +1,226 @@
+"""
+Per-symbol quote cache for the trading service.
+Entries expire after a TTL, and concurrent misses for the same symbol
+share a single in-flight upstream fetch. With stale_ttl set, an expired
+entry is still served for that long while one background fetch refreshes it
+(stale-while-revalidate). At most max_entries symbols are kept; the least
+recently used one is evicted first.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class _InFlight:
+    """A fetch in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QuoteCache:
+    """Thread-safe TTL + LRU cache with single-flight loading"""
+
+    def __init__(self, ttl=15.0, stale_ttl=0.0, max_entries=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries or int(os.getenv("QUOTE_CACHE_SIZE", "4096"))
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._inflight = {}  # key -> _InFlight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader(key) on a miss.
+
+        Values of None or dicts carrying an 'error' key are returned to the
+        caller but never stored, so failures are retried on the next call.
+        """
+        with self._lock:
+            state, found = self._claim(key)
+        if state == 'hit':
+            return found
+        if state == 'stale':
+            value, flight = found
+            if flight is not None:
+                self._revalidate({key: flight}, lambda keys: {key: loader(key)})
+            return value
+        if state == 'wait':
+            found.event.wait()
+            if found.error is not None:
+                raise found.error
+            return found.value
+
+        try:
+            found.value = loader(key)
+        except Exception as e:
+            found.error = e
+            raise
+        finally:
+            self._settle({key: found})
+        return found.value
+
+    def get_many(self, keys, bulk_loader):
+        """Return {key: value} for keys, loading all misses with one call.
+
+        bulk_loader receives the list of keys that are neither cached nor
+        already being fetched and returns a dict of the values it found.
+        Keys it leaves out map to None; if it raises, each of its keys maps
+        to an error dict so one bad batch does not hide cached results.
+        """
+        results = {}
+        waiting = {}
+        leading = {}
+        refreshing = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                state, found = self._claim(key)
+                if state == 'hit':
+                    results[key] = found
+                elif state == 'stale':
+                    results[key], flight = found
+                    if flight is not None:
+                        refreshing[key] = flight
+                elif state == 'wait':
+                    waiting[key] = found
+                else:
+                    leading[key] = found
+
+        if refreshing:
+            self._revalidate(refreshing, bulk_loader)
+
+        if leading:
+            try:
+                loaded = bulk_loader(list(leading)) or {}
+                for key, flight in leading.items():
+                    flight.value = loaded.get(key)
+            except Exception as e:
+                for flight in leading.values():
+                    flight.value = {'error': str(e)}
+            finally:
+                self._settle(leading)
+            for key, flight in leading.items():
+                results[key] = flight.value
+
+        for key, flight in waiting.items():
+            flight.event.wait()
+            if flight.error is not None:
+                results[key] = {'error': str(flight.error)}
+            else:
+                results[key] = flight.value
+        return results
+
+    def invalidate(self, key=None):
+        """Drop one symbol, or the whole cache when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss/stale counters"""
+        with self._lock:
+            lookups = self.hits + self.stale_served + self.misses + self.stale
+            served = self.hits + self.stale_served
+            return {
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'in_flight': len(self._inflight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'stale_served': self.stale_served,
+                'revalidations': self.revalidations,
+                'coalesced': self.coalesced,
+                'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            }
+
+    def _claim(self, key):
+        """Classify a lookup as a hit, a stale hit, a wait on another fetch, or a new fetch.
+
+        A stale hit carries the value and, if nobody is refreshing the key
+        yet, a new flight for the caller to revalidate in the background.
+        Must be called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return 'hit', value
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_served += 1
+                if key in self._inflight:
+                    return 'stale', (value, None)
+                flight = _InFlight()
+                self._inflight[key] = flight
+                return 'stale', (value, flight)
+            self.stale += 1
+            del self._entries[key]
+        else:
+            self.misses += 1
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            return 'wait', flight
+        flight = _InFlight()
+        self._inflight[key] = flight
+        return 'lead', flight
+
+    def _revalidate(self, flights, bulk_loader):
+        """Refresh stale keys on a background thread; failures keep the old value"""
+        def run():
+            try:
+                loaded = bulk_loader(list(flights)) or {}
+                for key, flight in flights.items():
+                    flight.value = loaded.get(key)
+            except Exception as e:
+                for flight in flights.values():
+                    flight.error = e
+            finally:
+                self._settle(flights)
+
+        with self._lock:
+            self.revalidations += len(flights)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _settle(self, flights):
+        """Store finished fetches and wake anyone waiting on them"""
+        with self._lock:
+            now = time.monotonic()
+            for key, flight in flights.items():
+                if flight.error is None and self._cacheable(flight.value):
+                    self._entries[key] = (flight.value, now)
+                    self._entries.move_to_end(key)
+                self._inflight.pop(key, None)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        for flight in flights.values():
+            flight.event.set()
+
+    @staticmethod
+    def _cacheable(value):
+        if value is None:
+            return False
+        if isinstance(value, dict) and 'error' in value:
+            return False
+        return True
@@ -0,0 +1,154 @@
+"""
+Socket.IO quote streaming hub.
+Clients join a room per symbol instead of polling the REST routes. Each
+subscribed symbol has a single poller that pushes changed quotes to its
+room. With REDIS_URL set, rooms span all workers through Redis pub/sub and
+a Redis lock makes sure only one worker polls a given symbol.
+
+Client protocol:
+    emit('subscribe', {'symbols': ['AAPL'], 'kind': 'stock'})     # or kind 'crypto'
+    emit('unsubscribe', {'symbols': ['AAPL'], 'kind': 'stock'})
+    on('quote', handler)  # {'topic': 'stock:AAPL', 'data': {...}}
+"""
+
+import os
+import threading
+import uuid
+
+import redis
+import socketio
+
+
+class QuoteHub:
+    """Fans one upstream poll per symbol out to every subscribed client"""
+
+    def __init__(self, trading_service, redis_url=None, interval=None):
+        self.trading_service = trading_service
+        self.redis_url = redis_url or os.getenv("REDIS_URL")
+        self.interval = interval or float(os.getenv("QUOTE_STREAM_INTERVAL", "5"))
+        self.worker_id = uuid.uuid4().hex
+
+        client_manager = socketio.RedisManager(self.redis_url) if self.redis_url else None
+        self.redis = redis.Redis.from_url(self.redis_url) if self.redis_url else None
+        self.sio = socketio.Server(
+            async_mode='threading',
+            cors_allowed_origins=os.getenv("CORS_ORIGIN", "*"),
+            client_manager=client_manager
+        )
+
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # sid -> set of topics
+        self._subscribers = {}    # topic -> subscriber count on this worker
+        self._pollers = {}        # topic -> stop event
+        self.polls = 0
+        self.pushes = 0
+
+        self.sio.on('subscribe', self._on_subscribe)
+        self.sio.on('unsubscribe', self._on_unsubscribe)
+        self.sio.on('disconnect', self._on_disconnect)
+
+    def wrap(self, wsgi_app):
+        """Mount the Socket.IO endpoint in front of a WSGI app"""
+        return socketio.WSGIApp(self.sio, wsgi_app)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'worker_id': self.worker_id,
+                'redis': bool(self.redis),
+                'clients': len(self._subscriptions),
+                'topics': dict(self._subscribers),
+                'pollers': len(self._pollers),
+                'polls': self.polls,
+                'pushes': self.pushes,
+            }
+
+    # --- Socket.IO handlers ---
+
+    def _on_subscribe(self, sid, data):
+        for topic in self._topics(data):
+            self.sio.enter_room(sid, topic)
+            with self._lock:
+                topics = self._subscriptions.setdefault(sid, set())
+                if topic in topics:
+                    continue
+                topics.add(topic)
+                self._subscribers[topic] = self._subscribers.get(topic, 0) + 1
+                if topic not in self._pollers:
+                    stop = threading.Event()
+                    self._pollers[topic] = stop
+                    threading.Thread(target=self._poll, args=(topic, stop), daemon=True).start()
+        return {'subscribed': sorted(self._subscriptions.get(sid, ()))}
+
+    def _on_unsubscribe(self, sid, data):
+        for topic in self._topics(data):
+            self.sio.leave_room(sid, topic)
+            with self._lock:
+                topics = self._subscriptions.get(sid, set())
+                if topic in topics:
+                    topics.discard(topic)
+                    self._release(topic)
+        return {'subscribed': sorted(self._subscriptions.get(sid, ()))}
+
+    def _on_disconnect(self, sid, *args):
+        with self._lock:
+            for topic in self._subscriptions.pop(sid, set()):
+                self._release(topic)
+
+    def _release(self, topic):
+        """Drop one subscriber; stop the poller when nobody is left. Lock held"""
+        count = self._subscribers.get(topic, 0) - 1
+        if count > 0:
+            self._subscribers[topic] = count
+            return
+        self._subscribers.pop(topic, None)
+        stop = self._pollers.pop(topic, None)
+        if stop is not None:
+            stop.set()
+
+    @staticmethod
+    def _topics(data):
+        data = data or {}
+        kind = data.get('kind', 'stock')
+        if kind not in ('stock', 'crypto'):
+            return []
+        symbols = data.get('symbols') or ([data['symbol']] if data.get('symbol') else [])
+        return [f"{kind}:{str(s).strip().upper()}" for s in symbols if str(s).strip()]
+
+    # --- Polling ---
+
+    def _poll(self, topic, stop):
+        kind, symbol = topic.split(':', 1)
+        last = None
+        while not stop.is_set():
+            if self._is_leader(topic):
+                try:
+                    if kind == 'crypto':
+                        data = self.trading_service.get_crypto_data(symbol)
+                    else:
+                        data = self.trading_service.get_stock_data(symbol)
+                    self.polls += 1
+                    if data and data != last:
+                        self.sio.emit('quote', {'topic': topic, 'data': data}, room=topic)
+                        self.pushes += 1
+                        last = data
+                except Exception as e:
+                    print(f"[QuoteHub] Poll failed for {topic}: {e}")
+            stop.wait(self.interval)
+
+    def _is_leader(self, topic):
+        """Only one worker polls a topic; without Redis every worker is its own leader"""
+        if self.redis is None:
+            return True
+        key = f"quote_hub:leader:{topic}"
+        ttl_ms = int(self.interval * 3000)
+        try:
+            if self.redis.set(key, self.worker_id, nx=True, px=ttl_ms):
+                return True
+            if self.redis.get(key) == self.worker_id.encode():
+                self.redis.pexpire(key, ttl_ms)
+                return True
+            return False
+        except redis.RedisError as e:
+            print(f"[QuoteHub] Redis unavailable, polling locally: {e}")
+            return True
@@ -0,0 +1,152 @@
+"""
+Vectorized universe scanner for the trading strategies.
+Signals are computed with NumPy over a (symbols x bars) close-price matrix,
+so one pass covers the whole watchlist instead of one symbol per request.
+"""
+
+import warnings
+
+import numpy as np
+
+# Vectorized counterparts of GlobalTradingService.trading_strategies.
+# Each takes a (symbols x bars) close matrix, NaN-padded on the left for
+# short histories, plus the live quotes ({'price': array, 'change': array},
+# NaN where missing), and returns a dict of per-symbol arrays including
+# 'action', 'confidence' and 'signal' (False where the per-symbol strategy
+# would return no recommendation).
+SCAN_STRATEGIES = {}
+
+# Same windows as indicators.SymbolIndicators and backtest.mean_reversion_signals
+LOOKBACK = 21
+EXCLUDE = 5
+
+
+def scan_strategy(name):
+    """Register a vectorized strategy under its trading_strategies name"""
+    def decorator(func):
+        SCAN_STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+def build_price_matrix(windows, bars):
+    """Stack per-symbol close arrays into a right-aligned (symbols x bars) matrix"""
+    matrix = np.full((len(windows), bars), np.nan)
+    for row, close in enumerate(windows):
+        tail = close[-bars:]
+        if len(tail):
+            matrix[row, bars - len(tail):] = tail
+    return matrix
+
+
+def _signal_metrics(close):
+    """Return, z-score inputs and trend flags shared by every strategy"""
+    last = close[:, -1]
+    first = close[np.arange(close.shape[0]), np.argmax(~np.isnan(close), axis=1)]
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN rows
+        period_return = last / first - 1
+        trend_up = last > np.nanmean(close, axis=1)
+    return last, period_return, trend_up
+
+
+@scan_strategy('momentum')
+def scan_momentum(close, quotes):
+    """Buy on a positive live-quote change, sell otherwise (as momentum_strategy)"""
+    _, period_return, trend_up = _signal_metrics(close)
+    price, change = quotes['price'], quotes['change']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        confidence = np.minimum(0.8, np.abs(change) / price)
+    return {
+        'signal': ~np.isnan(price) & ~np.isnan(change),
+        'action': np.where(change > 0, 'buy', 'sell'),
+        'confidence': confidence,
+        'change': change,
+        'return': period_return,
+        'trend_up': trend_up,
+    }
+
+
+@scan_strategy('mean_reversion')
+def scan_mean_reversion(close, quotes=None):
+    """Buy below -2 sigma and sell above +2 sigma (as mean_reversion_strategy).
+
+    The last close is compared with bars [-LOOKBACK, -EXCLUDE) of the
+    matrix, the window SymbolIndicators keeps for the z-score.
+    """
+    last, period_return, trend_up = _signal_metrics(close)
+    z_score = np.full(close.shape[0], np.nan)
+    if close.shape[1] >= LOOKBACK:
+        base = close[:, -LOOKBACK:-EXCLUDE]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = base.mean(axis=1)
+            std = base.std(axis=1, ddof=1)
+            z_score = np.where(std > 0, (last - mean) / std, np.nan)
+    bars = np.count_nonzero(~np.isnan(close), axis=1)
+    with np.errstate(invalid='ignore'):
+        signal = (bars >= LOOKBACK) & ((z_score < -2) | (z_score > 2))
+        confidence = np.minimum(0.9, np.abs(z_score) / 3)
+    return {
+        'signal': signal,
+        'action': np.where(z_score < -2, 'buy', 'sell'),
+        'confidence': confidence,
+        'z_score': z_score,
+        'return': period_return,
+        'trend_up': trend_up,
+    }
+
+
+def scan(symbols, close, strategies, page=1, page_size=50, quotes=None):
+    """Run strategies over the close matrix and return a ranked, paged result.
+
+    Only symbols a strategy gives a recommendation for are listed, so the
+    rows match what /api/trading/strategy returns per symbol.
+    """
+    symbols = np.asarray(symbols)
+    if quotes is None:
+        quotes = {'price': np.full(len(symbols), np.nan), 'change': np.full(len(symbols), np.nan)}
+
+    columns = {'symbol': [], 'strategy': [], 'confidence': []}
+    extras = []
+    listed = np.zeros(len(symbols), dtype=bool)
+    for name in strategies:
+        result = SCAN_STRATEGIES[name](close, quotes)
+        valid = result.pop('signal')
+        listed |= valid
+        columns['symbol'].append(symbols[valid])
+        columns['strategy'].append(np.full(valid.sum(), name))
+        columns['confidence'].append(np.nan_to_num(result['confidence'][valid]))
+        extras.append({key: values[valid] for key, values in result.items() if key != 'confidence'})
+
+    if not extras:
+        return {'total': 0, 'page': page, 'page_size': page_size, 'results': []}
+
+    symbol_col = np.concatenate(columns['symbol'])
+    strategy_col = np.concatenate(columns['strategy'])
+    confidence_col = np.concatenate(columns['confidence'])
+    order = np.argsort(-confidence_col, kind='stable')
+
+    # Only the requested page is turned back into Python dicts
+    offsets = np.cumsum([0] + [len(c) for c in columns['symbol']])
+    start = (page - 1) * page_size
+    results = []
+    for idx in order[start:start + page_size]:
+        block = int(np.searchsorted(offsets, idx, side='right') - 1)
+        row = idx - offsets[block]
+        entry = {
+            'symbol': str(symbol_col[idx]),
+            'strategy': str(strategy_col[idx]),
+            'confidence': round(float(confidence_col[idx]), 4),
+        }
+        for key, values in extras[block].items():
+            value = values[row].item()
+            entry[key] = None if isinstance(value, float) and np.isnan(value) else value
+        results.append(entry)
+
+    return {
+        'total': int(len(order)),
+        'skipped': symbols[~listed].tolist(),
+        'page': page,
+        'page_size': page_size,
+        'results': results,
+    }
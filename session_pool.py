@@ -0,0 +1,144 @@
+"""
+Per-user assistant sessions for the chat server.
+Each user gets their own assistant (and conversation history) plus a lock
+that serializes that user's turns, so different users chat in parallel.
+Sessions are kept in LRU order; the least recently used one is dropped when
+the cap is reached, and sessions idle longer than idle_ttl are swept on access.
+A session whose turn is still running (lock held) is never dropped, so a
+user can't end up with two sessions running turns side by side.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class Session:
+    """One user's assistant and the lock guarding its turns"""
+
+    def __init__(self, user_id, assistant):
+        self.user_id = user_id
+        self.assistant = assistant
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.turns = 0
+
+    def approx_bytes(self):
+        """Rough memory footprint: held conversation text plus object overhead"""
+        memory_bytes = getattr(self.assistant, 'memory_bytes', None)
+        size = sys.getsizeof(self) + sys.getsizeof(self.assistant)
+        return size + (memory_bytes() if memory_bytes else 0)
+
+
+class SessionPool:
+    """LRU + idle-timeout pool of Sessions keyed by user ID"""
+
+    def __init__(self, factory, max_sessions=None, idle_ttl=None):
+        """factory(user_id) builds the assistant for a new session"""
+        self.factory = factory
+        self.max_sessions = max_sessions or int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+        self.idle_ttl = idle_ttl or float(os.getenv("CHAT_SESSION_IDLE_TTL", "1800"))
+        self._sessions = OrderedDict()  # user_id -> Session, least recently used first
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    def get(self, user_id):
+        """Return the user's session, creating it (and evicting others) as needed"""
+        with self._lock:
+            return self._get(user_id, time.monotonic())
+
+    def checkout(self, user_id):
+        """Return the user's session with its lock held, or None while a turn is running.
+
+        The lock is taken under the pool lock, so the session can't be
+        evicted between lookup and locking.
+        """
+        with self._lock:
+            session = self._get(user_id, time.monotonic())
+            if not session.lock.acquire(blocking=False):
+                return None
+            return session
+
+    def drop(self, user_id):
+        with self._lock:
+            return self._sessions.pop(user_id, None) is not None
+
+    def _get(self, user_id, now):
+        """Lock held"""
+        self._sweep(now)
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = Session(user_id, self.factory(user_id))
+            self._sessions[user_id] = session
+            self.created += 1
+            while len(self._sessions) > self.max_sessions and self._evict_lru(user_id, now):
+                pass
+        else:
+            self._sessions.move_to_end(user_id)
+        session.last_used = now
+        return session
+
+    def _evict_lru(self, keep, now):
+        """Drop the least recently used session that is not mid-turn, other than `keep`.
+
+        Returns False when all of them are mid-turn; the pool then stays over
+        its cap until one finishes. Lock held.
+        """
+        for user_id, session in list(self._sessions.items()):
+            if user_id == keep:
+                continue
+            if session.lock.locked():
+                # Mid-turn: counts as in use
+                session.last_used = now
+                self._sessions.move_to_end(user_id)
+                continue
+            del self._sessions[user_id]
+            self.evicted_lru += 1
+            return True
+        return False
+
+    def _sweep(self, now):
+        """Drop idle sessions from the LRU end, keeping any that are mid-turn. Lock held"""
+        for user_id, session in list(self._sessions.items()):
+            if now - session.last_used < self.idle_ttl:
+                break
+            if session.lock.locked():
+                session.last_used = now
+                self._sessions.move_to_end(user_id)
+                continue
+            del self._sessions[user_id]
+            self.evicted_idle += 1
+
+    def stats(self, top=10):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            sessions = list(self._sessions.values())
+        sizes = [(s, s.approx_bytes()) for s in sessions]
+        sizes.sort(key=lambda item: item[1], reverse=True)
+        total = sum(size for _, size in sizes)
+        return {
+            'sessions': len(sessions),
+            'max_sessions': self.max_sessions,
+            'idle_ttl': self.idle_ttl,
+            'created': self.created,
+            'evicted_lru': self.evicted_lru,
+            'evicted_idle': self.evicted_idle,
+            'total_bytes': total,
+            'avg_bytes': total // len(sessions) if sessions else 0,
+            'largest': [
+                {
+                    'user_id': s.user_id,
+                    'turns': s.turns,
+                    'bytes': size,
+                    'idle_seconds': round(now - s.last_used, 1),
+                    'busy': s.lock.locked(),
+                }
+                for s, size in sizes[:top]
+            ],
+        }
@@ -0,0 +1,56 @@
+"""
+Server-Sent Events helpers for the streaming chat endpoints.
+Each model chunk is written as a `data:` event the moment it arrives; the
+stream ends with a `done` event (or an `error` event). When the client goes
+away the WSGI server closes the response iterator, which closes the model
+stream and releases whatever the caller registered in on_close.
+"""
+
+import json
+import time
+
+from flask import Response
+
+
+def sse_event(data, event=None):
+    """Format one SSE frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+def sse_response(chunks, on_close=None, extra=None):
+    """Stream an iterator of text chunks to the client as SSE.
+
+    on_close runs exactly once when the response is finished or abandoned,
+    even if the client disconnects before the first chunk.
+    """
+    started = time.monotonic()
+
+    def generate():
+        first_token_ms = None
+        try:
+            # Flush headers immediately so the client sees the stream open
+            yield ": stream open\n\n"
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = int((time.monotonic() - started) * 1000)
+                yield sse_event({'text': chunk})
+            done = {'done': True, 'ttft_ms': first_token_ms,
+                    'total_ms': int((time.monotonic() - started) * 1000)}
+            done.update(extra or {})
+            yield sse_event(done, event='done')
+        except Exception as e:
+            yield sse_event({'error': str(e)}, event='error')
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    if on_close is not None:
+        response.call_on_close(on_close)
+    return response
@@ -1,5 +1,24 @@
 # Stock Market Tools for Stock Analyst Persona
 # This file contains tool definitions and handlers for stock market queries
+# Next to each schema (not part of the declaration sent to Gemini):
+#   "timeout"   - seconds before the backend call is abandoned
+#   "cache_ttl" - seconds a result is fresh
+#   "stale_ttl" - seconds past cache_ttl a result is still served while it refreshes
+#   "cache_size" - most symbols whose results are kept (LRU); QUOTE_CACHE_SIZE by default
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from quote_cache import QuoteCache
+
+STOCK_API_BASE_URL = os.getenv("STOCK_API_BASE_URL", "http://localhost:3001/api")
+STOCK_TOOL_TIMEOUT = float(os.getenv("STOCK_TOOL_TIMEOUT", "10"))
+STOCK_TOOL_WORKERS = int(os.getenv("STOCK_TOOL_WORKERS", "8"))
 
 STOCK_TOOLS = [
     {
@@ -14,7 +33,10 @@ STOCK_TOOLS = [
                 }
             },
             "required": ["symbol"]
-        }
+        },
+        "timeout": 5,
+        "cache_ttl": 5,
+        "stale_ttl": 10
     },
     {
         "name": "get_penny_stocks",
@@ -22,7 +44,10 @@ STOCK_TOOLS = [
         "parameters": {
             "type": "object",
             "properties": {}
-        }
+        },
+        "timeout": 10,
+        "cache_ttl": 60,
+        "stale_ttl": 120
     },
     {
         "name": "get_stock_intraday",
@@ -41,7 +66,10 @@ STOCK_TOOLS = [
                 }
             },
             "required": ["symbol"]
-        }
+        },
+        "timeout": 10,
+        "cache_ttl": 60,
+        "stale_ttl": 60
     },
     {
         "name": "get_stock_daily",
@@ -55,41 +83,142 @@ STOCK_TOOLS = [
                 }
             },
             "required": ["symbol"]
-        }
+        },
+        "timeout": 15,
+        "cache_ttl": 3600,
+        "stale_ttl": 21600
     }
 ]
 
+_TOOLS_BY_NAME = {tool["name"]: tool for tool in STOCK_TOOLS}
+
+# One cache per tool so each keeps its own freshness policy and hit rate
+_TOOL_CACHES = {
+    tool["name"]: QuoteCache(
+        ttl=tool.get("cache_ttl", 0),
+        stale_ttl=tool.get("stale_ttl", 0),
+        max_entries=tool.get("cache_size")
+    )
+    for tool in STOCK_TOOLS
+}
+
+_session = None
+_executor = None
+_init_lock = threading.Lock()
+
+
+def get_session():
+    """Shared keep-alive session; its pool is sized for the tool executor"""
+    global _session
+    with _init_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=STOCK_TOOL_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _get_executor():
+    global _executor
+    with _init_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=STOCK_TOOL_WORKERS, thread_name_prefix="stock-tool")
+        return _executor
+
+
+def tool_timeout(tool_name):
+    return _TOOLS_BY_NAME.get(tool_name, {}).get("timeout", STOCK_TOOL_TIMEOUT)
+
+
+def normalize_tool_input(tool_name, tool_input):
+    """Canonical arguments: declared properties only, defaults filled, symbols upper-cased"""
+    tool_input = tool_input or {}
+    properties = _TOOLS_BY_NAME.get(tool_name, {}).get("parameters", {}).get("properties", {})
+    normalized = {}
+    for name in properties:
+        value = tool_input.get(name)
+        if name == "interval" and not value:
+            value = "5min"
+        if name == "symbol" and value:
+            value = str(value).strip().upper()
+        if value is not None:
+            normalized[name] = value
+    return normalized
+
+
 def handle_stock_tool(tool_name, tool_input):
-    """Handle stock market tool calls and route to backend API."""
-    import requests
-    
-    base_url = "http://localhost:3001/api"
+    """Handle stock market tool calls, answering from the per-tool cache when fresh."""
+    cache = _TOOL_CACHES.get(tool_name)
+    if cache is None:
+        return fetch_stock_tool(tool_name, tool_input)
+    args = normalize_tool_input(tool_name, tool_input)
+    key = json.dumps(args, sort_keys=True)
+    return cache.get(key, lambda _: fetch_stock_tool(tool_name, args))
+
+
+def stock_tool_cache_stats():
+    """Per-tool cache counters and hit rates"""
+    return {name: cache.stats() for name, cache in _TOOL_CACHES.items()}
+
+
+def tool_result(tool_name, response):
+    """Backend JSON, or an error dict for non-2xx replies so the cache never keeps them"""
+    if not response.ok:
+        try:
+            details = response.json()
+        except ValueError:
+            details = response.text[:500]
+        return {"error": f"{tool_name} failed with HTTP {response.status_code}",
+                "status": response.status_code, "details": details}
+    return response.json()
+
+
+def fetch_stock_tool(tool_name, tool_input):
+    """Call the backend API for a stock tool (no caching)."""
+    session = get_session()
+    base_url = STOCK_API_BASE_URL
+    timeout = tool_timeout(tool_name)
+    tool_input = tool_input or {}
     
     try:
         if tool_name == "get_stock_quote":
             symbol = tool_input.get("symbol")
-            response = requests.get(f"{base_url}/external-stocks/quote/{symbol}")
-            return response.json()
+            response = session.get(f"{base_url}/external-stocks/quote/{symbol}", timeout=timeout)
         
         elif tool_name == "get_penny_stocks":
-            response = requests.get(f"{base_url}/external-stocks/penny-stocks")
-            return response.json()
+            response = session.get(f"{base_url}/external-stocks/penny-stocks", timeout=timeout)
         
         elif tool_name == "get_stock_intraday":
             symbol = tool_input.get("symbol")
             interval = tool_input.get("interval", "5min")
-            response = requests.get(f"{base_url}/external-stocks/intraday/{symbol}?interval={interval}")
-            return response.json()
+            response = session.get(f"{base_url}/external-stocks/intraday/{symbol}",
+                                   params={"interval": interval}, timeout=timeout)
         
         elif tool_name == "get_stock_daily":
             symbol = tool_input.get("symbol")
-            response = requests.get(f"{base_url}/external-stocks/daily/{symbol}")
-            return response.json()
+            response = session.get(f"{base_url}/external-stocks/daily/{symbol}", timeout=timeout)
         
         else:
             return {"error": f"Unknown stock tool: {tool_name}"}
+
+        return tool_result(tool_name, response)
     
+    except requests.exceptions.Timeout:
+        return {"error": f"{tool_name} timed out after {timeout}s"}
     except requests.exceptions.RequestException as e:
         return {"error": f"Failed to fetch stock data: {str(e)}"}
     except Exception as e:
         return {"error": str(e)}
+
+
+def execute_stock_tools(calls):
+    """Run all tool calls from one model turn concurrently.
+
+    calls is a list of (tool_name, tool_input) pairs or Gemini FunctionCall
+    objects; results come back in call order.
+    """
+    pairs = [(c.name, dict(c.args or {})) if hasattr(c, "name") else tuple(c) for c in calls]
+    if len(pairs) <= 1:
+        return [handle_stock_tool(name, args) for name, args in pairs]
+    return list(_get_executor().map(lambda pair: handle_stock_tool(*pair), pairs))
@@ -3,75 +3,241 @@ Affiliate AI Pro - Python Supabase Client
 Handles database operations from the Python AI service
 """
 
+import base64
+import json
 import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
 from datetime import datetime
 
-load_dotenv()
+from preferences_cache import preferences_cache
+from supabase_pool import get_supabase
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# Upper bounds for one bulk write request
+BATCH_MAX_ROWS = int(os.getenv("SUPABASE_BATCH_ROWS", "500"))
+BATCH_MAX_BYTES = int(os.getenv("SUPABASE_BATCH_BYTES", "1000000"))
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Rows per request when paging through a user's records
+PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "100"))
 
 
-class CampaignDB:
+def get_client() -> Client:
+    """Service-role client, created on first use and shared through supabase_pool"""
+    return get_supabase("service")
+
+
+def __getattr__(name):
+    # `from supabase_client import supabase` still works, without connecting at import
+    if name == "supabase":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def chunk_rows(items, max_rows=None, max_bytes=None):
+    """Split (index, row) pairs into batches bounded by row count and JSON size"""
+    max_rows = max_rows or BATCH_MAX_ROWS
+    max_bytes = max_bytes or BATCH_MAX_BYTES
+    batch, size = [], 2
+    for item in items:
+        row_size = len(json.dumps(item[1], default=str)) + 1
+        if batch and (len(batch) >= max_rows or size + row_size > max_bytes):
+            yield batch
+            batch, size = [], 2
+        batch.append(item)
+        size += row_size
+    if batch:
+        yield batch
+
+
+def write_many(table: str, rows: list, upsert: bool = False, on_conflict: str = "id", client: Client = None) -> list:
+    """Insert (or upsert) rows in size-bounded batch requests.
+
+    Rows are grouped by their column set, since PostgREST applies one column
+    list per request. Returns one result per input row, in input order: the
+    stored row, or {"error": ...} for each row of a batch that failed.
+    """
+    try:
+        client = client or get_client()
+    except Exception as e:
+        return [{"error": str(e)} for _ in rows]
+    results = [None] * len(rows)
+    groups = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append((index, row))
+    for items in groups.values():
+        for batch in chunk_rows(items):
+            payload = [row for _, row in batch]
+            try:
+                query = client.table(table)
+                if upsert:
+                    query = query.upsert(payload, on_conflict=on_conflict)
+                else:
+                    query = query.insert(payload)
+                data = query.execute().data or []
+                for position, (index, _) in enumerate(batch):
+                    results[index] = data[position] if position < len(data) else {}
+            except Exception as e:
+                for index, _ in batch:
+                    results[index] = {"error": str(e)}
+    return results
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque cursor for the page that follows `row`"""
+    raw = json.dumps([row["created_at"], row["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return created_at, row_id
+
+
+def _select_columns(columns) -> str:
+    """PostgREST select list; the (created_at, id) sort key is always included"""
+    if not columns or columns == "*":
+        return "*"
+    if isinstance(columns, str):
+        columns = [c.strip() for c in columns.split(",")]
+    return ",".join(dict.fromkeys(list(columns) + ["created_at", "id"]))
+
+
+def fetch_page(table: str, user_id: str, columns="*", limit: int = None, cursor: str = None,
+               client: Client = None) -> dict:
+    """One page of a user's rows, newest first, using keyset pagination.
+
+    Pages are ordered by (created_at, id) descending and the cursor holds the
+    last row's key, so each page is an index range scan on
+    (user_id, created_at DESC, id DESC) however deep the caller has paged.
+    Returns {"rows": [...], "next_cursor": str or None}.
+    """
+    limit = limit or PAGE_SIZE
+    query = (client or get_client()).table(table).select(_select_columns(columns)).eq("user_id", user_id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")'
+        )
+    response = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+    rows = response.data or []
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"rows": rows[:limit], "next_cursor": next_cursor}
+
+
+def iter_rows(table: str, user_id: str, columns="*", page_size: int = None, client: Client = None):
+    """Yield a user's rows newest first, fetching one page at a time as the caller advances"""
+    cursor = None
+    while True:
+        page = fetch_page(table, user_id, columns, page_size, cursor, client)
+        yield from page["rows"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+def fetch_rows(table: str, user_id: str, columns="*", limit: int = None, client: Client = None) -> list:
+    """Up to `limit` of a user's rows (all of them when limit is None), newest first, in one request.
+
+    Like any single PostgREST read this is capped by the project's max-rows
+    setting; use iter_rows to walk tables larger than that.
+    """
+    query = (client or get_client()).table(table).select(_select_columns(columns)).eq("user_id", user_id)
+    query = query.order("created_at", desc=True).order("id", desc=True)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.execute().data or []
+
+
+class PagedTable:
+    """Keyset-paginated reads shared by the per-table classes below"""
+
+    table = None
+
+    @classmethod
+    def get_all(cls, user_id: str, columns="*", limit: int = None) -> list:
+        """Get a user's rows, newest first; optionally only some columns and at most `limit` rows"""
+        try:
+            return fetch_rows(cls.table, user_id, columns, limit)
+        except Exception as e:
+            return []
+
+    @classmethod
+    def get_page(cls, user_id: str, columns="*", limit: int = None, cursor: str = None) -> dict:
+        """One page of a user's rows; pass the returned next_cursor to get the following page"""
+        try:
+            return fetch_page(cls.table, user_id, columns, limit, cursor)
+        except Exception as e:
+            return {"error": str(e)}
+
+    @classmethod
+    def iter_all(cls, user_id: str, columns="*", page_size: int = None):
+        """Lazily walk every row for a user, one page request at a time"""
+        return iter_rows(cls.table, user_id, columns, page_size)
+
+
+class CampaignDB(PagedTable):
     """Campaign database operations"""
+
+    table = "campaigns"
     
+    @staticmethod
+    def _row(user_id: str, campaign_data: dict, now: str) -> dict:
+        return {
+            "user_id": user_id,
+            "name": campaign_data.get("name"),
+            "platform": campaign_data.get("platform"),
+            "affiliate_link": campaign_data.get("affiliate_link"),
+            "content": campaign_data.get("content"),
+            "status": campaign_data.get("status", "draft"),
+            "clicks": campaign_data.get("clicks", 0),
+            "conversions": campaign_data.get("conversions", 0),
+            "earnings": campaign_data.get("earnings", 0),
+            "image_url": campaign_data.get("image_url"),
+            "scheduled_date": campaign_data.get("scheduled_date"),
+            "tags": campaign_data.get("tags", []),
+            "created_at": now,
+            "updated_at": now,
+        }
+
     @staticmethod
     def create(user_id: str, campaign_data: dict) -> dict:
         """Create a new campaign"""
         try:
-            response = supabase.table("campaigns").insert({
-                "user_id": user_id,
-                "name": campaign_data.get("name"),
-                "platform": campaign_data.get("platform"),
-                "affiliate_link": campaign_data.get("affiliate_link"),
-                "content": campaign_data.get("content"),
-                "status": campaign_data.get("status", "draft"),
-                "clicks": campaign_data.get("clicks", 0),
-                "conversions": campaign_data.get("conversions", 0),
-                "earnings": campaign_data.get("earnings", 0),
-                "image_url": campaign_data.get("image_url"),
-                "scheduled_date": campaign_data.get("scheduled_date"),
-                "tags": campaign_data.get("tags", []),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-            }).execute()
+            row = CampaignDB._row(user_id, campaign_data, datetime.now().isoformat())
+            response = get_client().table("campaigns").insert(row).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def create_many(user_id: str, campaigns: list) -> list:
+        """Create many campaigns in batch requests; one result per input"""
+        now = datetime.now().isoformat()
+        return write_many("campaigns", [CampaignDB._row(user_id, c, now) for c in campaigns])
+
+    @staticmethod
+    def upsert_many(user_id: str, campaigns: list, on_conflict: str = "id") -> list:
+        """Insert or update campaigns in batch requests; only the given fields are written"""
+        now = datetime.now().isoformat()
+        return write_many("campaigns", [{**c, "user_id": user_id, "updated_at": now} for c in campaigns],
+                          upsert=True, on_conflict=on_conflict)
+
     @staticmethod
     def get(user_id: str, campaign_id: str) -> dict:
         """Get a specific campaign"""
         try:
-            response = supabase.table("campaigns").select("*").eq(
+            response = get_client().table("campaigns").select("*").eq(
                 "id", campaign_id
             ).eq("user_id", user_id).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             return {"error": str(e)}
 
-    @staticmethod
-    def get_all(user_id: str) -> list:
-        """Get all campaigns for a user"""
-        try:
-            response = supabase.table("campaigns").select("*").eq(
-                "user_id", user_id
-            ).order("created_at", desc=True).execute()
-            return response.data or []
-        except Exception as e:
-            return []
-
     @staticmethod
     def update(user_id: str, campaign_id: str, updates: dict) -> dict:
         """Update a campaign"""
         try:
             updates["updated_at"] = datetime.now().isoformat()
-            response = supabase.table("campaigns").update(updates).eq(
+            response = get_client().table("campaigns").update(updates).eq(
                 "id", campaign_id
             ).eq("user_id", user_id).execute()
             return response.data[0] if response.data else {}
@@ -82,7 +248,7 @@ class CampaignDB:
     def delete(user_id: str, campaign_id: str) -> dict:
         """Delete a campaign"""
         try:
-            supabase.table("campaigns").delete().eq(
+            get_client().table("campaigns").delete().eq(
                 "id", campaign_id
             ).eq("user_id", user_id).execute()
             return {"success": True, "message": "Campaign deleted"}
@@ -90,104 +256,116 @@ class CampaignDB:
             return {"error": str(e)}
 
 
-class TransactionDB:
+class TransactionDB(PagedTable):
     """Transaction database operations"""
+
+    table = "transactions"
     
+    @staticmethod
+    def _row(user_id: str, transaction_data: dict, now: str) -> dict:
+        return {
+            "user_id": user_id,
+            "amount": transaction_data.get("amount"),
+            "type": transaction_data.get("type"),
+            "description": transaction_data.get("description", ""),
+            "payment_method": transaction_data.get("payment_method"),
+            "status": transaction_data.get("status", "completed"),
+            "created_at": now,
+            "updated_at": now,
+        }
+
     @staticmethod
     def create(user_id: str, transaction_data: dict) -> dict:
         """Create a new transaction"""
         try:
-            response = supabase.table("transactions").insert({
-                "user_id": user_id,
-                "amount": transaction_data.get("amount"),
-                "type": transaction_data.get("type"),
-                "description": transaction_data.get("description", ""),
-                "payment_method": transaction_data.get("payment_method"),
-                "status": transaction_data.get("status", "completed"),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-            }).execute()
+            row = TransactionDB._row(user_id, transaction_data, datetime.now().isoformat())
+            response = get_client().table("transactions").insert(row).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             return {"error": str(e)}
 
     @staticmethod
-    def get_all(user_id: str) -> list:
-        """Get all transactions for a user"""
-        try:
-            response = supabase.table("transactions").select("*").eq(
-                "user_id", user_id
-            ).order("created_at", desc=True).execute()
-            return response.data or []
-        except Exception as e:
-            return []
+    def create_many(user_id: str, transactions: list) -> list:
+        """Create many transactions (e.g. an imported payout report) in batch requests"""
+        now = datetime.now().isoformat()
+        return write_many("transactions", [TransactionDB._row(user_id, t, now) for t in transactions])
+
+    @staticmethod
+    def upsert_many(user_id: str, transactions: list, on_conflict: str = "id") -> list:
+        """Insert or update transactions in batch requests; only the given fields are written"""
+        now = datetime.now().isoformat()
+        return write_many("transactions", [{**t, "user_id": user_id, "updated_at": now} for t in transactions],
+                          upsert=True, on_conflict=on_conflict)
 
     @staticmethod
     def get_summary(user_id: str) -> dict:
-        """Get transaction summary"""
+        """Get transaction summary.
+
+        Totals are computed in the database by the get_transaction_summary
+        function (SUPABASE_SCHEMA.sql), so only the aggregate is transferred
+        however many transactions the user has.
+        """
         try:
-            transactions = TransactionDB.get_all(user_id)
-            summary = {
-                "total_earnings": 0,
-                "total_expenses": 0,
-                "by_type": {}
+            response = get_client().rpc("get_transaction_summary", {"p_user_id": user_id}).execute()
+            summary = response.data or {}
+            return {
+                "total_earnings": summary.get("total_earnings", 0),
+                "total_expenses": summary.get("total_expenses", 0),
+                "by_type": summary.get("by_type", {}),
+                "transaction_count": summary.get("transaction_count", 0),
             }
-            
-            for txn in transactions:
-                txn_type = txn.get("type")
-                amount = txn.get("amount", 0)
-                
-                summary["by_type"][txn_type] = summary["by_type"].get(txn_type, 0) + amount
-                
-                if txn_type in ["affiliate_payout", "dividend", "deposit"]:
-                    summary["total_earnings"] += amount
-                else:
-                    summary["total_expenses"] += amount
-            
-            return summary
         except Exception as e:
             return {"error": str(e)}
 
 
-class StockDB:
+class StockDB(PagedTable):
     """Stock database operations"""
+
+    table = "stocks"
     
+    @staticmethod
+    def _row(user_id: str, stock_data: dict, now: str) -> dict:
+        return {
+            "user_id": user_id,
+            "ticker": stock_data.get("ticker"),
+            "shares": stock_data.get("shares"),
+            "purchase_price": stock_data.get("purchase_price"),
+            "current_price": stock_data.get("current_price", stock_data.get("purchase_price")),
+            "purchase_date": stock_data.get("purchase_date", now),
+            "broker": stock_data.get("broker", "unknown"),
+            "created_at": now,
+            "updated_at": now,
+        }
+
     @staticmethod
     def create(user_id: str, stock_data: dict) -> dict:
         """Create a stock record"""
         try:
-            response = supabase.table("stocks").insert({
-                "user_id": user_id,
-                "ticker": stock_data.get("ticker"),
-                "shares": stock_data.get("shares"),
-                "purchase_price": stock_data.get("purchase_price"),
-                "current_price": stock_data.get("current_price", stock_data.get("purchase_price")),
-                "purchase_date": stock_data.get("purchase_date", datetime.now().isoformat()),
-                "broker": stock_data.get("broker", "unknown"),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-            }).execute()
+            row = StockDB._row(user_id, stock_data, datetime.now().isoformat())
+            response = get_client().table("stocks").insert(row).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             return {"error": str(e)}
 
     @staticmethod
-    def get_all(user_id: str) -> list:
-        """Get all stocks for a user"""
-        try:
-            response = supabase.table("stocks").select("*").eq(
-                "user_id", user_id
-            ).order("created_at", desc=True).execute()
-            return response.data or []
-        except Exception as e:
-            return []
+    def create_many(user_id: str, stocks: list) -> list:
+        """Create many stock records (e.g. a brokerage export) in batch requests"""
+        now = datetime.now().isoformat()
+        return write_many("stocks", [StockDB._row(user_id, stock, now) for stock in stocks])
+
+    @staticmethod
+    def upsert_many(user_id: str, stocks: list, on_conflict: str = "id") -> list:
+        """Insert or update stock records in batch requests; only the given fields are written"""
+        now = datetime.now().isoformat()
+        return write_many("stocks", [{**stock, "user_id": user_id, "updated_at": now} for stock in stocks],
+                          upsert=True, on_conflict=on_conflict)
 
     @staticmethod
     def update(user_id: str, stock_id: str, updates: dict) -> dict:
         """Update a stock record"""
         try:
             updates["updated_at"] = datetime.now().isoformat()
-            response = supabase.table("stocks").update(updates).eq(
+            response = get_client().table("stocks").update(updates).eq(
                 "id", stock_id
             ).eq("user_id", user_id).execute()
             return response.data[0] if response.data else {}
@@ -195,14 +373,16 @@ class StockDB:
             return {"error": str(e)}
 
 
-class LearningDB:
+class LearningDB(PagedTable):
     """Learning module database operations"""
+
+    table = "learning_modules"
     
     @staticmethod
     def create(user_id: str, module_data: dict) -> dict:
         """Create a learning module"""
         try:
-            response = supabase.table("learning_modules").insert({
+            response = get_client().table("learning_modules").insert({
                 "user_id": user_id,
                 "title": module_data.get("title"),
                 "platform": module_data.get("platform", "custom"),
@@ -217,23 +397,12 @@ class LearningDB:
         except Exception as e:
             return {"error": str(e)}
 
-    @staticmethod
-    def get_all(user_id: str) -> list:
-        """Get all learning modules for a user"""
-        try:
-            response = supabase.table("learning_modules").select("*").eq(
-                "user_id", user_id
-            ).order("created_at", desc=True).execute()
-            return response.data or []
-        except Exception as e:
-            return []
-
     @staticmethod
     def update(user_id: str, module_id: str, updates: dict) -> dict:
         """Update a learning module"""
         try:
             updates["updated_at"] = datetime.now().isoformat()
-            response = supabase.table("learning_modules").update(updates).eq(
+            response = get_client().table("learning_modules").update(updates).eq(
                 "id", module_id
             ).eq("user_id", user_id).execute()
             return response.data[0] if response.data else {}
@@ -242,13 +411,17 @@ class LearningDB:
 
 
 class PreferencesDB:
-    """User preferences database operations"""
+    """User preferences database operations (cached, see preferences_cache)"""
     
     @staticmethod
     def get(user_id: str) -> dict:
         """Get user preferences"""
+        return preferences_cache.get(user_id, PreferencesDB._load)
+
+    @staticmethod
+    def _load(user_id: str) -> dict:
         try:
-            response = supabase.table("user_preferences").select("*").eq(
+            response = get_client().table("user_preferences").select("*").eq(
                 "user_id", user_id
             ).execute()
             
@@ -274,9 +447,89 @@ class PreferencesDB:
             preferences["user_id"] = user_id
             preferences["updated_at"] = datetime.now().isoformat()
             
-            response = supabase.table("user_preferences").upsert(
-                preferences
+            response = get_client().table("user_preferences").upsert(
+                preferences, on_conflict="user_id"
             ).execute()
+            row = response.data[0] if response.data else {}
+            preferences_cache.write(user_id, row)
+            return row
+        except Exception as e:
+            preferences_cache.invalidate(user_id)
+            return {"error": str(e)}
+
+
+class ConversationDB:
+    """Conversation history and rolling summary operations"""
+
+    HISTORY_COLUMNS = "id, user_message, ai_response, tools_used, created_at"
+
+    @staticmethod
+    def create(user_id: str, persona: str, user_message: str, ai_response: str, tools_used: list = None) -> dict:
+        """Record one chat turn"""
+        try:
+            response = get_client().table("conversation_history").insert({
+                "user_id": user_id,
+                "persona": persona,
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "tools_used": tools_used or [],
+                "created_at": datetime.now().isoformat(),
+            }).execute()
+            return response.data[0] if response.data else {}
+        except Exception as e:
+            return {"error": str(e)}
+
+    @staticmethod
+    def get_recent(user_id: str, persona: str, limit: int, after: str = None) -> list:
+        """Newest turns first, optionally only those created after a timestamp"""
+        try:
+            query = get_client().table("conversation_history").select(
+                ConversationDB.HISTORY_COLUMNS
+            ).eq("user_id", user_id).eq("persona", persona)
+            if after:
+                query = query.gt("created_at", after)
+            response = query.order("created_at", desc=True).limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            return []
+
+    @staticmethod
+    def get_oldest(user_id: str, persona: str, limit: int, after: str = None) -> list:
+        """Oldest turns first, optionally only those created after a timestamp"""
+        try:
+            query = get_client().table("conversation_history").select(
+                ConversationDB.HISTORY_COLUMNS
+            ).eq("user_id", user_id).eq("persona", persona)
+            if after:
+                query = query.gt("created_at", after)
+            response = query.order("created_at").limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            return []
+
+    @staticmethod
+    def get_summary(user_id: str, persona: str) -> dict:
+        """Get the rolling summary for a user and persona"""
+        try:
+            response = get_client().table("conversation_summaries").select("*").eq(
+                "user_id", user_id
+            ).eq("persona", persona).execute()
+            return response.data[0] if response.data else {}
+        except Exception as e:
+            return {"error": str(e)}
+
+    @staticmethod
+    def save_summary(user_id: str, persona: str, summary: str, summarized_through: str, turns_summarized: int) -> dict:
+        """Store the rolling summary"""
+        try:
+            response = get_client().table("conversation_summaries").upsert({
+                "user_id": user_id,
+                "persona": persona,
+                "summary": summary,
+                "summarized_through": summarized_through,
+                "turns_summarized": turns_summarized,
+                "updated_at": datetime.now().isoformat(),
+            }).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             return {"error": str(e)}
@@ -284,10 +537,15 @@ class PreferencesDB:
 
 # Export classes for easy access
 __all__ = [
-    'supabase',
+    'get_client',
+    'write_many',
+    'fetch_page',
+    'fetch_rows',
+    'iter_rows',
     'CampaignDB',
     'TransactionDB',
     'StockDB',
     'LearningDB',
     'PreferencesDB',
+    'ConversationDB',
 ]
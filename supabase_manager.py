@@ -3,30 +3,30 @@ Supabase Client Configuration for Python AI Service
 This module provides database access and authentication helpers for the AI service
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
 
-# Load environment variables
-load_dotenv()
+from preferences_cache import preferences_cache
+from supabase_client import fetch_page, fetch_rows, iter_rows, write_many
+from supabase_pool import get_supabase
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY", "")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("[WARNING] Supabase credentials not found in environment variables")
-    print("Please set SUPABASE_URL and SUPABASE_ANON_KEY in your .env file")
-    supabase_client: Client = None
-else:
-    supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def __getattr__(name):
+    # Anon-key client, created on first access rather than at import
+    if name == "supabase_client":
+        return get_supabase("anon")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class SupabaseManager:
     """Manager class for all Supabase operations"""
     
     def __init__(self, client: Client = None):
-        self.client = client or supabase_client
+        self._client = client
+
+    @property
+    def client(self) -> Client:
+        """The injected client, or the shared anon-key client (created on first use)"""
+        return self._client or get_supabase("anon")
     
     def create_campaign(self, user_id: str, campaign_data: dict) -> dict:
         """Create a new campaign for a user"""
@@ -37,11 +37,10 @@ class SupabaseManager:
         except Exception as e:
             return {"error": str(e)}
     
-    def get_user_campaigns(self, user_id: str) -> list:
-        """Get all campaigns for a specific user"""
+    def get_user_campaigns(self, user_id: str, columns='*', limit: int = None) -> list:
+        """Get a user's campaigns, newest first (optionally some columns, at most limit rows)"""
         try:
-            response = self.client.table('campaigns').select('*').eq('user_id', user_id).execute()
-            return response.data if response.data else []
+            return fetch_rows('campaigns', user_id, columns, limit, client=self.client)
         except Exception as e:
             print(f"[Supabase Error]: {e}")
             return []
@@ -102,15 +101,25 @@ class SupabaseManager:
         except Exception as e:
             return {"error": str(e)}
     
-    def get_user_stocks(self, user_id: str) -> list:
-        """Get all stocks for a specific user"""
+    def get_user_stocks(self, user_id: str, columns='*', limit: int = None) -> list:
+        """Get a user's stocks, newest first (optionally some columns, at most limit rows)"""
         try:
-            response = self.client.table('stocks').select('*').eq('user_id', user_id).execute()
-            return response.data if response.data else []
+            return fetch_rows('stocks', user_id, columns, limit, client=self.client)
         except Exception as e:
             print(f"[Supabase Error]: {e}")
             return []
     
+    def get_page(self, table: str, user_id: str, columns='*', limit: int = None, cursor: str = None) -> dict:
+        """One keyset page of a user's rows in any per-user table; returns rows and next_cursor"""
+        try:
+            return fetch_page(table, user_id, columns, limit, cursor, client=self.client)
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def iter_rows(self, table: str, user_id: str, columns='*', page_size: int = None):
+        """Lazily walk a user's rows in any per-user table, one page request at a time"""
+        return iter_rows(table, user_id, columns, page_size, client=self.client)
+    
     def create_learning_module(self, user_id: str, module_data: dict) -> dict:
         """Create a new learning module for a user"""
         try:
@@ -129,12 +138,35 @@ class SupabaseManager:
             print(f"[Supabase Error]: {e}")
             return []
     
+    def create_many(self, table: str, user_id: str, rows: list) -> list:
+        """Bulk version of the create_* methods: batched inserts, one result per row"""
+        return self._write_many(table, user_id, rows)
+    
+    def upsert_many(self, table: str, user_id: str, rows: list, on_conflict: str = 'id') -> list:
+        """Batched insert-or-update; rows carrying an existing id are updated"""
+        return self._write_many(table, user_id, rows, upsert=True, on_conflict=on_conflict)
+    
+    def _write_many(self, table: str, user_id: str, rows: list, **options) -> list:
+        try:
+            client = self.client
+        except Exception as e:
+            return [{"error": str(e)} for _ in rows]
+        return write_many(table, [{**row, 'user_id': user_id} for row in rows], client=client, **options)
+    
     def get_user_preferences(self, user_id: str) -> dict:
-        """Get user preferences"""
+        """Get user preferences (cached, defaults included)"""
+        if self._client is None:
+            row = preferences_cache.get(user_id, self._load_user_preferences, namespace='anon')
+        else:
+            # An injected client may carry a user session, so its reads are not shared
+            row = self._load_user_preferences(user_id)
+        return None if 'error' in row else row
+    
+    def _load_user_preferences(self, user_id: str) -> dict:
         try:
-            response = self.client.table('user_preferences').select('*').eq('user_id', user_id).single().execute()
+            response = self.client.table('user_preferences').select('*').eq('user_id', user_id).limit(1).execute()
             if response.data:
-                return response.data
+                return response.data[0]
             # Return defaults if not found
             return {
                 'user_id': user_id,
@@ -146,17 +178,25 @@ class SupabaseManager:
             }
         except Exception as e:
             print(f"[Supabase Error]: {e}")
-            return None
+            return {"error": str(e)}
     
     def save_user_preferences(self, user_id: str, preferences: dict) -> dict:
         """Save user preferences"""
         try:
             preferences['user_id'] = user_id
-            response = self.client.table('user_preferences').upsert(preferences).execute()
-            return response.data[0] if response.data else {"error": "Failed to save preferences"}
+            response = self.client.table('user_preferences').upsert(preferences, on_conflict='user_id').execute()
+            if not response.data:
+                preferences_cache.invalidate(user_id)
+                return {"error": "Failed to save preferences"}
+            if self._client is None:
+                preferences_cache.write(user_id, response.data[0], namespace='anon')
+            else:
+                preferences_cache.invalidate(user_id)
+            return response.data[0]
         except Exception as e:
+            preferences_cache.invalidate(user_id)
             return {"error": str(e)}
 
 
 # Global instance
-db = SupabaseManager(supabase_client)
+db = SupabaseManager()
@@ -0,0 +1,98 @@
+"""
+Shared Supabase client factory.
+Clients are created on first use rather than at import, one per key role
+(service or anon), and every client sends its PostgREST/auth/storage calls
+through one keep-alive httpx connection pool (HTTP/2 when the h2 package is
+installed). CampaignDB & co. and SupabaseManager therefore share sockets
+instead of each module opening its own HTTP stack.
+"""
+
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from supabase import Client, ClientOptions, create_client
+
+load_dotenv()
+
+# Environment variable holding the key for each role
+KEY_ENV = {
+    "service": "SUPABASE_SERVICE_KEY",
+    "anon": "SUPABASE_ANON_KEY",
+}
+
+_http = None
+_clients = {}
+_lock = threading.RLock()  # get_supabase() builds the pool while holding it
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.Client:
+    """The pooled httpx client shared by every Supabase client"""
+    global _http
+    if _http is not None:
+        return _http
+    with _lock:
+        if _http is None:
+            pool_size = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+            _http = httpx.Client(
+                http2=os.getenv("SUPABASE_HTTP2", "on") != "off" and _http2_available(),
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=int(os.getenv("SUPABASE_POOL_KEEPALIVE", str(pool_size))),
+                    keepalive_expiry=float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30")),
+                ),
+                timeout=httpx.Timeout(float(os.getenv("SUPABASE_TIMEOUT", "10"))),
+                follow_redirects=True,
+            )
+        return _http
+
+
+def get_supabase(role: str = "service") -> Client:
+    """Supabase client for a key role, created on first use.
+
+    Raises RuntimeError when SUPABASE_URL or the role's key is not set.
+    """
+    client = _clients.get(role)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(role)
+        if client is None:
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv(KEY_ENV[role])
+            if not url or not key:
+                raise RuntimeError(f"Supabase is not configured: set SUPABASE_URL and {KEY_ENV[role]}")
+            client = create_client(url, key, options=ClientOptions(httpx_client=get_http_client()))
+            _clients[role] = client
+        return client
+
+
+def pool_stats() -> dict:
+    """Which clients exist and how many pooled connections are open"""
+    pool = getattr(getattr(_http, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None) or []
+    return {
+        "clients": sorted(_clients),
+        "http2": bool(getattr(pool, "_http2", False)),
+        "connections": len(connections),
+        "idle_connections": sum(1 for c in connections if c.is_idle()),
+    }
+
+
+def close():
+    """Close the shared connection pool (tests and shutdown hooks)"""
+    global _http
+    with _lock:
+        _clients.clear()
+        if _http is not None:
+            _http.close()
+            _http = None
@@ -0,0 +1,137 @@
+"""
+Chat server: gateway back-pressure, authenticated sessions and stream release.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import ai_server
+from ai_service import AffiliateAIExecutive
+from llm_gateway import LLMGateway
+from model_router import ModelRouter
+from session_pool import SessionPool
+
+
+@pytest.fixture
+def server(monkeypatch, gemini_client):
+    models = ModelRouter(small_model="gemini-1.5-flash", large_model="gemini-1.5-pro")
+    monkeypatch.setattr(ai_server, "gateway", LLMGateway(max_concurrency=1, max_queue=0, timeout=5))
+    monkeypatch.setattr(ai_server, "sessions", SessionPool(
+        lambda user_id: AffiliateAIExecutive(llm_client=gemini_client, user_id=user_id, models=models)
+    ))
+    return ai_server.app.test_client()
+
+
+def test_chat_replies(server):
+    response = server.post('/chat', json={"message": "Show me all my campaigns"})
+    assert response.status_code == 200
+    assert response.get_json()["response"].startswith("Fake reply")
+    assert ai_server.gateway.stats()['completed'] == 1
+
+
+def test_full_gateway_returns_429_with_retry_after(server):
+    with ai_server.gateway.slot():
+        response = server.post('/chat', json={"message": "hi"})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()["retry_after"] == int(response.headers['Retry-After'])
+
+
+def test_stream_sends_events_and_releases_the_gateway(server):
+    response = server.post('/chat/stream', json={"message": "hi"})
+    body = response.get_data(as_text=True)
+    response.close()
+    assert body.startswith(": stream open")
+    assert "event: done" in body
+    assert ai_server.gateway.stats()['active'] == 0
+
+
+def test_stream_disconnect_releases_the_gateway(server):
+    response = server.post('/chat/stream', json={"message": "hi"}, buffered=False)
+    next(iter(response.response))
+    assert ai_server.gateway.stats()['active'] == 1
+    response.close()
+    assert ai_server.gateway.stats()['active'] == 0
+
+
+def test_stream_is_refused_with_429_when_the_gateway_is_full(server):
+    with ai_server.gateway.slot():
+        response = server.post('/chat/stream', json={"message": "hi"})
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+
+
+class FakeAuth:
+    def get_user(self, token):
+        if token != "valid-token":
+            raise ValueError("invalid JWT")
+        return SimpleNamespace(user=SimpleNamespace(id="9b2f6c1e-0000-4000-8000-000000000001"))
+
+
+@pytest.fixture
+def supabase_auth(monkeypatch):
+    monkeypatch.setattr(ai_server, "get_supabase", lambda role="service": SimpleNamespace(auth=FakeAuth()))
+
+
+def session_keys():
+    return sorted(s['user_id'] for s in ai_server.sessions.stats()['largest'])
+
+
+def test_anonymous_callers_get_their_own_server_issued_sessions(server):
+    other = ai_server.app.test_client()
+    server.post('/chat', json={"message": "hi"})
+    server.post('/chat', json={"message": "hi"})
+    other.post('/chat', json={"message": "hi"})
+
+    keys = session_keys()
+    assert len(keys) == 2 and all(key.startswith("anon:") for key in keys)
+    assert sorted(s['turns'] for s in ai_server.sessions.stats()['largest']) == [1, 2]
+
+
+def test_client_supplied_user_ids_do_not_select_a_session(server):
+    server.post('/chat', json={"message": "hi"}, headers={"X-User-Id": "victim"})
+    ai_server.app.test_client().post('/chat', json={"message": "hi", "user_id": "victim"})
+    assert "victim" not in session_keys()
+    assert len(session_keys()) == 2
+
+
+def test_second_turn_for_a_busy_session_fails_fast_with_429(server, monkeypatch):
+    monkeypatch.setattr(ai_server, "gateway", LLMGateway(max_concurrency=2, max_queue=0, timeout=5))
+    streaming = server.post('/chat/stream', json={"message": "hi"}, buffered=False)
+    next(iter(streaming.response))
+
+    second = server.post('/chat', json={"message": "again"})
+    assert second.status_code == 429
+    assert int(second.headers['Retry-After']) >= 1
+    assert ai_server.app.test_client().post('/chat', json={"message": "hi"}).status_code == 200
+
+    streaming.close()
+    assert server.post('/chat', json={"message": "again"}).status_code == 200
+
+
+def test_session_lock_is_released_after_a_stream(server):
+    server.post('/chat/stream', json={"message": "hi"}).close()
+    streaming = server.post('/chat/stream', json={"message": "hi"}, buffered=False)
+    next(iter(streaming.response))
+    streaming.close()
+    assert all(not s['busy'] for s in ai_server.sessions.stats()['largest'])
+    assert ai_server.sessions.stats()['largest'][0]['turns'] == 2
+
+
+def test_verified_token_names_the_session(server, supabase_auth):
+    headers = {"Authorization": "Bearer valid-token", "X-User-Id": "someone-else"}
+    assert server.post('/chat', json={"message": "hi", "user_id": "victim"}, headers=headers).status_code == 200
+    assert session_keys() == ["9b2f6c1e-0000-4000-8000-000000000001"]
+
+
+def test_invalid_token_is_rejected(server, supabase_auth):
+    response = server.post('/chat/stream', json={"message": "hi"}, headers={"Authorization": "Bearer forged"})
+    assert response.status_code == 401
+
+
+def test_persisted_history_requires_a_token(server, supabase_auth, monkeypatch):
+    monkeypatch.setattr(ai_server, "PERSIST_HISTORY", True)
+    response = server.post('/chat', json={"message": "hi", "user_id": "victim"}, headers={"X-User-Id": "victim"})
+    assert response.status_code == 401
+    assert ai_server.sessions.stats()['sessions'] == 0
@@ -0,0 +1,70 @@
+"""
+AffiliateAIExecutive chat turns against the in-process fake Gemini.
+"""
+
+from ai_service import AffiliateAIExecutive
+from chat_context import ContextBuilder, InMemoryConversationStore
+from model_router import ModelRouter
+
+
+class SpyContext(ContextBuilder):
+    def __init__(self):
+        super().__init__(InMemoryConversationStore(), window=4, fold_batch=4)
+        self.built = []
+
+    def build(self, user_id, persona, message):
+        self.built.append(persona)
+        return super().build(user_id, persona, message)
+
+
+def make_assistant(gemini_client):
+    models = ModelRouter(small_model="gemini-1.5-flash", large_model="gemini-1.5-pro")
+    return AffiliateAIExecutive(llm_client=gemini_client, user_id="u1", context_builder=SpyContext(), models=models)
+
+
+def test_chat_uses_one_persona_for_budget_tools_and_history(gemini_client, monkeypatch):
+    attached = []
+    monkeypatch.setattr("ai_service.tools_for_persona", lambda persona: attached.append(persona) or None)
+    assistant = make_assistant(gemini_client)
+
+    reply = assistant.chat("Hey Stock Analyst, log my Apple stock purchase: 10 shares at $150")
+
+    assert reply.startswith("Fake reply")
+    assert assistant.context.built == attached == ["stock_analyst"]
+    assert len(assistant.context.store.get_recent("u1", "stock_analyst", 10)) == 1
+    assert assistant.context.store.get_recent("u1", "executive", 10) == []
+
+
+def test_chat_stream_records_under_the_detected_persona(gemini_client):
+    assistant = make_assistant(gemini_client)
+
+    chunks = list(assistant.chat_stream("Create a new Instagram campaign called Summer Sale"))
+
+    history = assistant.context.store.get_recent("u1", "campaign_manager", 10)
+    assert assistant.context.built == ["campaign_manager"]
+    assert [turn['ai_response'] for turn in history] == [''.join(chunks)]
+
+
+class StubTrading:
+    quote_strategies = {'momentum'}
+
+    def __init__(self):
+        self.prewarmed = []
+        self.trading_strategies = {name: (lambda symbol: {'symbol': symbol}) for name in ('momentum', 'mean_reversion')}
+
+    def get_stock_data_many(self, symbols):
+        self.prewarmed.append(symbols)
+
+
+def test_multi_symbol_strategy_prewarms_quotes_only_when_used(monkeypatch):
+    import ai_service
+    stub = StubTrading()
+    monkeypatch.setattr(ai_service, "trading_service", stub)
+    client = ai_service.app.test_client()
+
+    reversion = client.get('/api/trading/strategy/aapl,MSFT/mean_reversion').get_json()
+    momentum = client.get('/api/trading/strategy/aapl, MSFT/momentum').get_json()
+
+    assert reversion == {'aapl': {'symbol': 'aapl'}, 'MSFT': {'symbol': 'MSFT'}}
+    assert set(momentum) == {'aapl', 'MSFT'}
+    assert stub.prewarmed == [['aapl', 'MSFT']]
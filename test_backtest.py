@@ -0,0 +1,74 @@
+"""
+Vectorized backtest against per-bar reference loops, and the shared process pool.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+
+
+@pytest.fixture(scope="module")
+def close():
+    rng = np.random.default_rng(7)
+    matrix = 100 * np.cumprod(1 + rng.normal(0, 0.02, (6, 80)), axis=1)
+    matrix[0, :30] = np.nan  # short history, NaN-padded like build_price_matrix
+    return matrix
+
+
+def test_mean_reversion_matches_pandas_windows(close):
+    signals = backtest.mean_reversion_signals(close)
+    for row, series in enumerate(close):
+        prices = pd.Series(series)
+        base = prices.shift(5).rolling(16)
+        z_score = (prices - base.mean()) / base.std()
+        expected = np.where(z_score < -2, 1, np.where(z_score > 2, -1, 0))
+        np.testing.assert_array_equal(signals[row], expected)
+
+
+def test_run_backtest_pnl_follows_the_previous_bar_signal(close):
+    result = backtest.run_backtest(close, 'momentum')
+    for row, series in enumerate(close):
+        pnl = [0.0]
+        for t in range(1, len(series)):
+            bar_return = series[t] / series[t - 1] - 1
+            pnl.append(0.0 if np.isnan(bar_return) else result['signal'][row, t - 1] * bar_return)
+        np.testing.assert_allclose(result['pnl'][row], pnl)
+        assert result['total_return'][row] == pytest.approx(np.prod(1 + np.array(pnl)) - 1)
+
+
+def test_process_pool_matches_in_process_and_is_reused(close, monkeypatch):
+    symbols = [f"S{i}" for i in range(len(close))]
+    strategies = list(backtest.SIGNAL_STRATEGIES)
+    expected = backtest.backtest_universe(symbols, close, strategies, workers=1)
+
+    monkeypatch.setattr(backtest, "PARALLEL_MIN_SYMBOLS", 0)
+    try:
+        first = backtest.backtest_universe(symbols, close, strategies, workers=2, chunk_size=2)
+        pool = backtest._pool
+        second = backtest.backtest_universe(symbols, close, strategies, workers=2, chunk_size=2)
+        assert pool is not None and backtest._pool is pool
+    finally:
+        backtest.shutdown_pool()
+    assert first == second == expected
+
+
+def test_pool_is_resized_when_workers_change(close, monkeypatch):
+    symbols = [f"S{i}" for i in range(len(close))]
+    monkeypatch.setattr(backtest, "PARALLEL_MIN_SYMBOLS", 0)
+    try:
+        backtest.backtest_universe(symbols, close, ['momentum'], workers=2, chunk_size=2)
+        first = backtest._pool
+        result = backtest.backtest_universe(symbols, close, ['momentum'], workers=3, chunk_size=2)
+        assert backtest._pool is not first
+        assert backtest._pool._max_workers == 3
+    finally:
+        backtest.shutdown_pool()
+    assert result == backtest.backtest_universe(symbols, close, ['momentum'], workers=1)
+
+
+def test_small_universes_stay_in_process(close):
+    symbols = [f"S{i}" for i in range(len(close))]
+    backtest.backtest_universe(symbols, close, ['momentum'], workers=4, chunk_size=2)
+    assert backtest._pool is None
@@ -0,0 +1,106 @@
+"""
+ContextBuilder windowing, background folding and the LLM summarizer.
+"""
+
+import threading
+
+import pytest
+
+from chat_context import ContextBuilder, InMemoryConversationStore, extractive_summary, llm_summarizer
+from llm_gateway import GatewayBusy, LLMGateway
+from model_router import ModelRouter
+
+
+def add_turns(store, count, user_id="u1", persona="executive"):
+    for i in range(count):
+        turn = store.create(user_id, persona, f"question {i}", f"answer {i}")
+        turn['created_at'] = f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}"
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, previous, turns):
+        self.batches.append([turn['user_message'] for turn in turns])
+        return extractive_summary(previous, turns)
+
+
+def test_fold_covers_every_unsummarized_turn_older_than_the_window():
+    store = InMemoryConversationStore()
+    summarizer = RecordingSummarizer()
+    builder = ContextBuilder(store, summarizer=summarizer, window=4, fold_batch=3)
+    add_turns(store, 20)
+
+    builder.build("u1", "executive", "hello")
+    builder.flush(5)
+
+    assert [len(batch) for batch in summarizer.batches] == [3, 3, 3, 3, 3, 1]
+    assert summarizer.batches[0][0] == "question 0"
+    row = store.get_summary("u1", "executive")
+    assert row['turns_summarized'] == 16
+    assert row['summarized_through'] == "2024-01-01T00:00:15"
+
+    context = builder.build("u1", "executive", "hello")
+    builder.flush(5)
+    assert [turn['user_message'] for turn in context['turns']] == [f"question {i}" for i in range(16, 20)]
+    assert len(summarizer.batches) == 6
+
+
+def test_build_does_not_wait_for_the_summarizer():
+    store = InMemoryConversationStore()
+    release = threading.Event()
+
+    def slow_summarizer(previous, turns):
+        release.wait(5)
+        return "summary"
+
+    builder = ContextBuilder(store, summarizer=slow_summarizer, window=2, fold_batch=2)
+    add_turns(store, 4)
+    context = builder.build("u1", "executive", "hello")
+    assert context['summary'] == ''
+    assert len(context['turns']) == 4  # unsummarized turns stay in the prompt meanwhile
+    release.set()
+    builder.flush(5)
+    assert builder.build("u1", "executive", "hello")['summary'] == "summary"
+
+
+def test_oversized_summary_keeps_its_newest_part(monkeypatch):
+    monkeypatch.setenv("CHAT_TOKEN_BUDGET_EXECUTIVE", "100")
+    store = InMemoryConversationStore()
+    store.save_summary("u1", "executive", "oldest " * 200 + "NEWEST", None, 0)
+    context = ContextBuilder(store, window=2, fold_batch=2).build("u1", "executive", "hi")
+    assert context['summary'].endswith("NEWEST")
+    assert len(context['summary']) <= 100
+
+
+def test_llm_summarizer_goes_through_router_and_gateway(gemini_client, fake_gemini):
+    models = ModelRouter(small_model="gemini-1.5-flash", large_model="gemini-1.5-pro")
+    gateway = LLMGateway(max_concurrency=1, max_queue=0, timeout=5)
+    summarize = llm_summarizer(gemini_client, models, gateway)
+
+    summary = summarize("", [{'user_message': "hi", 'ai_response': "hello"}])
+
+    assert summary.startswith("Fake reply")
+    assert models.stats()['tiers']['small']['calls'] == 1
+    assert gateway.stats()['completed'] == 1
+    assert fake_gemini.stats()['by_model'] == {'gemini-1.5-flash': 1}
+
+
+def test_fold_is_deferred_while_the_gateway_is_full(gemini_client):
+    gateway = LLMGateway(max_concurrency=1, max_queue=0, timeout=5)
+    store = InMemoryConversationStore()
+    builder = ContextBuilder(store, summarizer=llm_summarizer(gemini_client, ModelRouter(), gateway),
+                             window=2, fold_batch=2)
+    add_turns(store, 4)
+
+    with gateway.slot():
+        with pytest.raises(GatewayBusy):
+            gateway.acquire()
+        builder.build("u1", "executive", "hello")
+        builder.flush(5)
+    assert store.get_summary("u1", "executive") == {}
+
+    builder.build("u1", "executive", "hello")
+    builder.flush(5)
+    assert store.get_summary("u1", "executive")['turns_summarized'] == 2
@@ -0,0 +1,77 @@
+"""
+Streaming indicators against the pandas window definitions they replace.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import IndicatorEngine, RollingStats
+
+
+def reference(close, volume):
+    """The windowed pandas/NumPy definitions from the per-symbol strategies"""
+    close, volume = pd.Series(close), pd.Series(volume)
+    base = close.iloc[-21:-5]
+    last30 = close.iloc[-30:]
+    return {
+        'z_score': (close.iloc[-1] - base.mean()) / base.std(ddof=1),
+        'price_trend': 'up' if close.iloc[-1] > close.iloc[-10] else 'down',
+        'volume_ratio': volume.iloc[-5:].mean() / volume.iloc[-30:-5].mean(),
+        'volatility': last30.pct_change().iloc[1:].std(ddof=1) * 100,
+        'ema': close.ewm(span=20, adjust=False).mean().iloc[-1],
+    }
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(3)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, 120))
+    volume = rng.integers(1_000, 5_000, 120).astype(float)
+    return np.arange(120) * 86_400, close, volume
+
+
+def test_snapshot_matches_pandas_windows_at_every_bar(bars):
+    ts, close, volume = bars
+    engine = IndicatorEngine()
+    for end in range(31, len(ts)):
+        engine.ingest("AAPL", ts[:end], close[:end], volume[:end])
+        snapshot = engine.snapshot("AAPL")
+        expected = reference(close[:end], volume[:end])
+        assert snapshot['bars'] == end
+        assert snapshot['price_trend'] == expected['price_trend']
+        for key in ('z_score', 'volume_ratio', 'volatility', 'ema'):
+            assert snapshot[key] == pytest.approx(expected[key], rel=1e-9), key
+
+
+def test_pending_bar_is_revised_in_place(bars):
+    ts, close, volume = bars
+    engine = IndicatorEngine()
+    engine.ingest("AAPL", ts[:60], close[:60], volume[:60])
+    engine.update("AAPL", int(ts[59]), 150.0, volume[59])
+    revised = close[:60].copy()
+    revised[-1] = 150.0
+
+    snapshot = engine.snapshot("AAPL")
+    assert snapshot['bars'] == 60
+    assert snapshot['z_score'] == pytest.approx(reference(revised, volume[:60])['z_score'], rel=1e-9)
+
+
+def test_windows_are_none_until_full(bars):
+    ts, close, volume = bars
+    engine = IndicatorEngine()
+    engine.ingest("AAPL", ts[:10], close[:10], volume[:10])
+    snapshot = engine.snapshot("AAPL")
+    assert (snapshot['z_score'], snapshot['volatility'], snapshot['volume_ratio']) == (None, None, None)
+    assert engine.snapshot("MSFT") == {'bars': 0}
+
+
+def test_rolling_stats_track_the_window():
+    stats = RollingStats(4)
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0]
+    for i, value in enumerate(values):
+        stats.add(value)
+        window = values[max(0, i - 3):i + 1]
+        assert stats.mean == pytest.approx(np.mean(window))
+        if len(window) > 1:
+            assert stats.variance() == pytest.approx(np.var(window, ddof=1))
@@ -0,0 +1,46 @@
+"""
+LLMGateway concurrency slots, bounded queue and deadlines.
+"""
+
+import threading
+
+import pytest
+
+from llm_gateway import GatewayBusy, GatewayTimeout, LLMGateway
+
+
+def test_queue_full_raises_busy_with_retry_after():
+    gateway = LLMGateway(max_concurrency=1, max_queue=0, timeout=5)
+    with gateway.slot():
+        with pytest.raises(GatewayBusy) as error:
+            gateway.acquire()
+    assert not isinstance(error.value, GatewayTimeout)
+    assert error.value.retry_after >= 1
+    assert gateway.stats()['rejected'] == 1
+
+
+def test_waiter_times_out_at_its_deadline():
+    gateway = LLMGateway(max_concurrency=1, max_queue=1, timeout=5)
+    with gateway.slot():
+        with pytest.raises(GatewayTimeout):
+            gateway.acquire(timeout=0.05)
+    assert gateway.stats()['timed_out'] == 1
+
+
+def test_waiter_gets_the_slot_when_it_is_released():
+    gateway = LLMGateway(max_concurrency=1, max_queue=1, timeout=5)
+    held = gateway.acquire()
+    acquired = threading.Event()
+
+    def wait_for_slot():
+        with gateway.slot():
+            acquired.set()
+
+    thread = threading.Thread(target=wait_for_slot)
+    thread.start()
+    assert not acquired.wait(0.05)
+    gateway.release(held)
+    thread.join(5)
+    assert acquired.is_set()
+    stats = gateway.stats()
+    assert (stats['active'], stats['waiting'], stats['completed']) == (0, 0, 2)
@@ -0,0 +1,46 @@
+"""
+Compiled persona router against the substring router it replaced.
+"""
+
+import pytest
+
+from personas import BENCH_MESSAGES, DEFAULT_PERSONA, PersonaRouter, PERSONA_KEYWORDS, PERSONAS, \
+    _substring_detect_persona, detect_persona, detect_personas
+
+MESSAGES = [message for message in BENCH_MESSAGES if "reviewed" not in message] + [
+    "Hey Stock Analyst, show me my portfolio",
+    "Learning Manager, update my progress on Python course to 75%",
+    "I want to buy 10 shares of Apple at $150 each",
+    "Set my app theme to dark mode",
+    "Show me all my campaigns",
+    "How much have I earned from dividends this year?",
+    "I completed a course on Data Science",
+    "Campaign Manager, let's create a TikTok viral marketing campaign",
+]
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_matches_the_substring_router(message):
+    assert detect_persona(message) == _substring_detect_persona(message)
+
+
+def test_batch_routing_matches_single_routing():
+    assert detect_personas(MESSAGES) == [detect_persona(message) for message in MESSAGES]
+
+
+def test_keywords_only_match_at_word_starts():
+    # The substring router found "view" inside "reviewed" and picked the app customizer
+    message = "What should we do next with the numbers we reviewed yesterday?"
+    assert _substring_detect_persona(message) == "app_customizer"
+    assert detect_persona(message) == DEFAULT_PERSONA
+
+
+def test_naming_a_persona_beats_keywords():
+    assert detect_persona("Stock Analyst, create a campaign for my campaign launch") == "stock_analyst"
+
+
+def test_weights_change_the_winner():
+    message = "translate my campaign"
+    assert PersonaRouter(PERSONAS, PERSONA_KEYWORDS).route(message) == "campaign_manager"
+    weighted = PersonaRouter(PERSONAS, PERSONA_KEYWORDS, {"translate": 5})
+    assert weighted.route(message) == "language_assistant"
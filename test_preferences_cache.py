@@ -0,0 +1,142 @@
+"""
+PreferencesCache read-through, write-through and cross-worker invalidation.
+"""
+
+import threading
+
+import redis
+
+from preferences_cache import PreferencesCache
+
+
+class FakeRedis:
+    """Just the Redis commands PreferencesCache uses, shared by several caches like one server"""
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}  # key -> modification count, for WATCH
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, px=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        self._touch(key)
+
+    def incr(self, key):
+        self.set(key, str(int(self.data.get(key, b"0")) + 1))
+
+    def pexpire(self, key, ms):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            if self.data.pop(key, None) is not None:
+                self._touch(key)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, server):
+        self.server = server
+        self.watched = {}
+        self.queued = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, key):
+        self.watched[key] = self.server.versions.get(key, 0)
+
+    def get(self, key):
+        return self.server.get(key)
+
+    def multi(self):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.queued.append((name, args, kwargs))
+
+    def execute(self):
+        if any(self.server.versions.get(key, 0) != seen for key, seen in self.watched.items()):
+            raise redis.WatchError()
+        for name, args, kwargs in self.queued:
+            getattr(self.server, name)(*args, **kwargs)
+
+
+def make_cache(server=None):
+    cache = PreferencesCache(ttl=60, max_entries=3, local_ttl=60)
+    cache.redis = server
+    return cache
+
+
+def test_read_through_and_write_through():
+    cache = make_cache()
+    calls = []
+    loader = lambda user_id: calls.append(user_id) or {"theme": "dark"}
+    assert cache.get("u1", loader) == {"theme": "dark"}
+    assert cache.get("u1", loader) == {"theme": "dark"}
+    assert calls == ["u1"]
+
+    cache.write("u1", {"theme": "light"})
+    assert cache.get("u1", loader) == {"theme": "light"}
+    assert calls == ["u1"]
+
+
+def test_invalidate_drops_every_namespace():
+    cache = make_cache()
+    cache.get("u1", lambda user_id: {"ns": "service"})
+    cache.get("u1", lambda user_id: {"ns": "anon"}, namespace="anon")
+    cache.invalidate("u1")
+    assert cache.get("u1", lambda user_id: {"ns": "fresh"}, namespace="anon") == {"ns": "fresh"}
+    assert cache.stats()["entries"] == 1
+
+
+def test_errors_are_not_cached_and_lru_is_bounded():
+    cache = make_cache()
+    cache.get("u0", lambda user_id: {"error": "db down"})
+    assert cache.stats()["entries"] == 0
+    for n in range(5):
+        cache.get(f"u{n}", lambda user_id: {"n": user_id})
+    assert cache.stats()["entries"] == 3
+
+
+def test_slow_read_in_one_worker_does_not_republish_over_another_workers_write():
+    server = FakeRedis()
+    reader, writer = make_cache(server), make_cache(server)
+    loading, written = threading.Event(), threading.Event()
+
+    def slow_loader(user_id):
+        loading.set()
+        written.wait(5)
+        return {"theme": "stale"}
+
+    thread = threading.Thread(target=reader.get, args=("u1", slow_loader))
+    thread.start()
+    loading.wait(5)
+    writer.write("u1", {"theme": "new"})
+    written.set()
+    thread.join(5)
+
+    assert reader.stats()["stale_loads"] == 1
+    third = make_cache(server)
+    assert third.get("u1", lambda user_id: {"theme": "from db"}) == {"theme": "new"}
+
+
+def test_loaded_rows_are_shared_through_redis():
+    server = FakeRedis()
+    make_cache(server).get("u1", lambda user_id: {"theme": "dark"})
+    other = make_cache(server)
+    assert other.get("u1", lambda user_id: {"theme": "from db"}) == {"theme": "dark"}
+    assert other.stats()["redis_hits"] == 1
@@ -0,0 +1,108 @@
+"""
+QuoteCache single-flight loading, stale-while-revalidate and LRU bound.
+"""
+
+import threading
+import time
+
+from quote_cache import QuoteCache
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = QuoteCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        started.set()
+        release.wait(5)
+        return {'price': 1.0}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("AAPL", loader))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()['coalesced'] < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["AAPL"]
+    assert results == [{'price': 1.0}] * 5
+
+
+def test_errors_are_returned_but_not_cached():
+    cache = QuoteCache(ttl=60)
+    assert cache.get("AAPL", lambda key: {'error': 'down'}) == {'error': 'down'}
+    assert cache.get("AAPL", lambda key: {'price': 2.0}) == {'price': 2.0}
+    assert cache.stats()['misses'] == 2
+
+
+def test_get_many_loads_only_misses_in_one_call():
+    cache = QuoteCache(ttl=60)
+    cache.get("AAPL", lambda key: {'price': 1.0})
+    batches = []
+
+    def bulk(keys):
+        batches.append(keys)
+        return {key: {'price': 2.0} for key in keys if key != "NONE"}
+
+    results = cache.get_many(["AAPL", "MSFT", "NONE"], bulk)
+    assert batches == [["MSFT", "NONE"]]
+    assert results == {"AAPL": {'price': 1.0}, "MSFT": {'price': 2.0}, "NONE": None}
+
+
+def test_expired_entry_is_served_stale_while_one_refresh_runs():
+    cache = QuoteCache(ttl=0.01, stale_ttl=60)
+    cache.get("AAPL", lambda key: {'price': 1.0})
+    time.sleep(0.02)
+    release = threading.Event()
+    calls = []
+
+    def slow_loader(key):
+        calls.append(key)
+        release.wait(5)
+        return {'price': 2.0}
+
+    assert cache.get("AAPL", slow_loader) == {'price': 1.0}
+    assert cache.get("AAPL", slow_loader) == {'price': 1.0}
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.stats()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert calls == ["AAPL"]
+    assert cache.stats()['revalidations'] == 1
+    assert cache.get("AAPL", slow_loader) == {'price': 2.0}
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    cache = QuoteCache(ttl=0.01, stale_ttl=60)
+    cache.get("AAPL", lambda key: {'price': 1.0})
+    time.sleep(0.02)
+
+    def failing(key):
+        raise RuntimeError("upstream down")
+
+    assert cache.get("AAPL", failing) == {'price': 1.0}
+    deadline = time.monotonic() + 5
+    while cache.stats()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert cache.get("AAPL", failing) == {'price': 1.0}
+
+
+def test_least_recently_used_symbol_is_evicted():
+    cache = QuoteCache(ttl=60, max_entries=2)
+    cache.get("A", lambda key: 1)
+    cache.get("B", lambda key: 2)
+    cache.get("A", lambda key: 0)  # hit: A becomes most recent
+    cache.get("C", lambda key: 3)
+
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (2, 1)
+    assert cache.get("A", lambda key: 0) == 1
+    assert cache.get("B", lambda key: 20) == 20
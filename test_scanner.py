@@ -0,0 +1,77 @@
+"""
+The vectorized scan must agree with the per-symbol strategies it batches.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scanner
+from history_store import HistoryStore
+from market_data import ReplayMarketDataProvider, _write_ohlcv, synthesize_fixtures
+
+SYMBOLS = ["AAPL", "MSFT", "KO", "JNJ", "DROP", "JUMP"]
+
+
+def _write_daily(out_dir, symbol, close):
+    index = pd.date_range(end=pd.Timestamp("2024-01-02T21:00:00Z"), periods=len(close), freq="D", tz="UTC")
+    frame = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                          "Volume": np.full(len(close), 1e6)}, index=index)
+    _write_ohlcv(out_dir, symbol, "1d", frame)
+
+
+@pytest.fixture(scope="module")
+def trading(tmp_path_factory):
+    from ai_service import GlobalTradingService
+
+    fixtures = str(tmp_path_factory.mktemp("fixtures"))
+    synthesize_fixtures(fixtures, symbols=SYMBOLS, seed=11)
+    # Flat-ish histories ending in a crash and a spike, so both mean-reversion signals fire
+    wiggle = 100 + np.sin(np.arange(60))
+    _write_daily(fixtures, "DROP", np.r_[wiggle[:-1], 90.0])
+    _write_daily(fixtures, "JUMP", np.r_[wiggle[:-1], 110.0])
+
+    provider = ReplayMarketDataProvider(fixtures)
+    service = GlobalTradingService(market_data=provider)
+    service.history = HistoryStore(root=str(tmp_path_factory.mktemp("history")), provider=provider)
+    yield service
+    service.scheduler.shutdown(wait=False)
+
+
+@pytest.mark.parametrize("strategy", ["momentum", "mean_reversion"])
+def test_scan_matches_per_symbol_strategy(trading, strategy):
+    result = trading.scan_universe(SYMBOLS, [strategy], bars=30, page_size=100)
+    scanned = {row["symbol"]: row for row in result["results"]}
+
+    expected = {}
+    for symbol in SYMBOLS:
+        signal = trading.trading_strategies[strategy](symbol)
+        if signal and "error" not in signal:
+            expected[symbol] = signal
+
+    assert set(scanned) == set(expected)
+    assert set(result["skipped"]) == set(SYMBOLS) - set(expected)
+    for symbol, signal in expected.items():
+        assert scanned[symbol]["action"] == signal["action"]
+        assert scanned[symbol]["confidence"] == pytest.approx(signal["confidence"], abs=1e-4)
+
+
+def test_mean_reversion_fires_on_crafted_series(trading):
+    result = trading.scan_universe(["DROP", "JUMP"], ["mean_reversion"], bars=30)
+    actions = {row["symbol"]: row["action"] for row in result["results"]}
+    assert actions == {"DROP": "buy", "JUMP": "sell"}
+
+
+def test_scan_z_score_matches_indicator_engine(trading):
+    close = trading._close_matrix(SYMBOLS, 30)
+    z_scores = scanner.scan_mean_reversion(close)["z_score"]
+    for symbol, z_score in zip(SYMBOLS, z_scores):
+        assert z_score == pytest.approx(trading.get_indicators(symbol)["z_score"], rel=1e-9)
+
+
+def test_no_signal_rows_are_dropped():
+    close = np.tile(100 + np.sin(np.arange(30)), (2, 1))
+    quotes = {"price": np.array([np.nan, 101.0]), "change": np.array([np.nan, 0.5])}
+    result = scanner.scan(["A", "B"], close, ["momentum", "mean_reversion"], quotes=quotes)
+    assert [(row["symbol"], row["strategy"]) for row in result["results"]] == [("B", "momentum")]
+    assert result["skipped"] == ["A"]
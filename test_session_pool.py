@@ -0,0 +1,100 @@
+"""
+SessionPool LRU and idle-timeout eviction.
+"""
+
+import time
+from types import SimpleNamespace
+
+import session_pool
+from session_pool import SessionPool
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(session_pool, "time", SimpleNamespace(monotonic=clock, time=time.time))
+    built = []
+    pool = SessionPool(lambda user_id: built.append(user_id) or object(), **kwargs)
+    return pool, clock, built
+
+
+def test_sessions_are_reused_per_user(monkeypatch):
+    pool, _, built = make_pool(monkeypatch, max_sessions=10, idle_ttl=60)
+    assert pool.get("a") is pool.get("a")
+    assert pool.get("b") is not pool.get("a")
+    assert built == ["a", "b"]
+
+
+def test_least_recently_used_session_is_evicted(monkeypatch):
+    pool, _, built = make_pool(monkeypatch, max_sessions=2, idle_ttl=60)
+    first = pool.get("a")
+    pool.get("b")
+    pool.get("a")  # "b" is now least recently used
+    pool.get("c")
+
+    assert pool.get("a") is first
+    assert pool.stats()['evicted_lru'] == 1
+    pool.get("b")
+    assert built == ["a", "b", "c", "b"]
+
+
+def test_idle_sessions_are_swept(monkeypatch):
+    pool, clock, built = make_pool(monkeypatch, max_sessions=10, idle_ttl=60)
+    pool.get("a")
+    clock.now += 30
+    pool.get("b")
+    clock.now += 45  # "a" idle for 75s, "b" for 45s
+
+    stats = pool.stats()
+    assert stats['sessions'] == 1 and stats['evicted_idle'] == 1
+    assert [s['user_id'] for s in stats['largest']] == ["b"]
+
+
+def test_drop_forgets_a_session(monkeypatch):
+    pool, _, built = make_pool(monkeypatch, max_sessions=10, idle_ttl=60)
+    pool.get("a")
+    assert pool.drop("a") is True
+    assert pool.drop("a") is False
+    pool.get("a")
+    assert built == ["a", "a"]
+
+
+def test_busy_sessions_are_not_evicted_for_the_cap(monkeypatch):
+    pool, _, built = make_pool(monkeypatch, max_sessions=2, idle_ttl=60)
+    busy = pool.checkout("a")
+    pool.get("b")
+    pool.get("c")  # "a" is least recently used but mid-turn, so "b" goes
+
+    assert pool.checkout("a") is None
+    busy.lock.release()
+    assert pool.checkout("a") is busy
+    assert built == ["a", "b", "c"]
+    assert pool.stats()['evicted_lru'] == 1
+
+
+def test_pool_stays_over_the_cap_while_every_session_is_busy(monkeypatch):
+    pool, _, _ = make_pool(monkeypatch, max_sessions=1, idle_ttl=60)
+    busy = pool.checkout("a")
+    pool.get("b")
+    assert pool.stats()['sessions'] == 2
+    busy.lock.release()
+    pool.get("c")
+    assert pool.stats()['sessions'] == 1
+
+
+def test_busy_sessions_survive_the_idle_sweep(monkeypatch):
+    pool, clock, built = make_pool(monkeypatch, max_sessions=10, idle_ttl=60)
+    busy = pool.checkout("a")
+    clock.now += 120  # a long stream
+    pool.get("b")
+    assert pool.stats()['evicted_idle'] == 0
+    busy.lock.release()
+    assert pool.checkout("a") is busy
+    assert built == ["a", "b"]
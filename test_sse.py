@@ -0,0 +1,76 @@
+"""
+SSE framing and the close path when a client disconnects mid-stream.
+"""
+
+import json
+
+from flask import Flask
+
+from sse import sse_response
+
+
+def stream(chunks, on_close=None):
+    app = Flask(__name__)
+    app.add_url_rule('/stream', 'stream', lambda: sse_response(chunks, on_close=on_close))
+    return app.test_client().get('/stream', buffered=False)
+
+
+def frames(body):
+    events = []
+    for frame in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines.get("event"), json.loads(lines["data"])))
+    return events
+
+
+def test_chunks_are_framed_and_end_with_done():
+    closed = []
+    response = stream(iter(["Hello", "", " world"]), on_close=lambda: closed.append(True))
+    events = frames(response.get_data(as_text=True))
+    response.close()
+
+    assert response.headers['Content-Type'].startswith('text/event-stream')
+    assert [data['text'] for event, data in events[:-1]] == ["Hello", " world"]
+    assert events[-1][0] == 'done' and events[-1][1]['done'] is True
+    assert closed == [True]
+
+
+def test_errors_become_an_error_event():
+    def failing():
+        yield "partial"
+        raise RuntimeError("upstream reset")
+
+    response = stream(failing())
+    events = frames(response.get_data(as_text=True))
+    assert events[-1] == ('error', {'error': 'upstream reset'})
+
+
+def test_disconnect_closes_the_model_stream_and_runs_on_close_once():
+    state = {'closed': False, 'produced': 0}
+    released = []
+
+    def model_stream():
+        try:
+            while True:
+                state['produced'] += 1
+                yield "token "
+        finally:
+            state['closed'] = True
+
+    response = stream(model_stream(), on_close=lambda: released.append(True))
+    body = iter(response.response)
+    next(body)  # ": stream open"
+    next(body)  # first token
+    response.close()
+
+    assert state['closed'] is True
+    assert state['produced'] == 1
+    assert released == [True]
+
+
+def test_on_close_runs_when_the_client_leaves_before_the_first_chunk():
+    released = []
+    response = stream(iter(["never read"]), on_close=lambda: released.append(True))
+    response.close()
+    assert released == [True]
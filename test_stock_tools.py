@@ -0,0 +1,46 @@
+"""
+Stock tool results: backend errors are returned to the model but never cached.
+"""
+
+import requests
+
+import stock_tools
+
+
+def backend_response(status, body):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body.encode()
+    return response
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def test_non_2xx_json_body_is_an_error_and_is_not_cached(monkeypatch):
+    session = FakeSession([
+        backend_response(503, '{"message": "rate limited"}'),
+        backend_response(200, '{"symbol": "AAPL", "price": 190.1}'),
+    ])
+    monkeypatch.setattr(stock_tools, "get_session", lambda: session)
+    stock_tools._TOOL_CACHES["get_stock_daily"].invalidate()
+
+    failed = stock_tools.handle_stock_tool("get_stock_daily", {"symbol": "aapl"})
+    assert failed["status"] == 503 and failed["details"] == {"message": "rate limited"}
+    assert "error" in failed
+
+    assert stock_tools.handle_stock_tool("get_stock_daily", {"symbol": "AAPL"})["price"] == 190.1
+    assert stock_tools.handle_stock_tool("get_stock_daily", {"symbol": "AAPL"})["price"] == 190.1
+    assert session.calls == 2
+
+
+def test_non_json_success_body_is_an_error(monkeypatch):
+    monkeypatch.setattr(stock_tools, "get_session", lambda: FakeSession([backend_response(200, "<html>")]))
+    assert "error" in stock_tools.fetch_stock_tool("get_penny_stocks", {})
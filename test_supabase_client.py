@@ -0,0 +1,123 @@
+"""
+supabase_client reads and bulk writes against a fake PostgREST over httpx.MockTransport.
+"""
+
+import json
+import re
+
+import httpx
+import pytest
+from supabase import ClientOptions, create_client
+
+import supabase_client
+from supabase_client import chunk_rows, fetch_page, fetch_rows, iter_rows, write_many
+
+
+class FakeRest:
+    """Enough of PostgREST for per-user keyset reads and bulk inserts"""
+
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if request.method == "POST":
+            payload = json.loads(request.content)
+            if any(row.get("name") == "bad" for row in payload):
+                return httpx.Response(400, json={"message": "rejected", "code": "23514"})
+            return httpx.Response(201, json=[dict(row, id=f"{len(self.requests)}-{i}") for i, row in enumerate(payload)])
+        params = request.url.params
+        user_id = params["user_id"].removeprefix("eq.")
+        rows = [row for row in self.rows if row["user_id"] == user_id]
+        cursor = params.get("or")
+        if cursor:
+            created_at, row_id = re.search(r'created_at\.lt\."(.+?)".*id\.lt\."(.+?)"', cursor).groups()
+            rows = [row for row in rows if (row["created_at"], row["id"]) < (created_at, int(row_id))]
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        if "limit" in params:
+            rows = rows[:int(params["limit"])]
+        return httpx.Response(200, json=rows)
+
+
+@pytest.fixture
+def rest():
+    # Rows 0..249; pairs share a created_at so the id tie-breaker matters
+    return FakeRest([
+        {"id": i, "user_id": "u1", "created_at": f"2024-01-01T00:{i // 2 // 60:02d}:{i // 2 % 60:02d}", "name": f"c{i}"}
+        for i in range(250)
+    ] + [{"id": 1000, "user_id": "u2", "created_at": "2024-01-01T00:00:00", "name": "other"}])
+
+
+@pytest.fixture
+def client(rest):
+    return create_client("http://supabase.test", "aaa.bbb.ccc",
+                         options=ClientOptions(httpx_client=httpx.Client(transport=httpx.MockTransport(rest))))
+
+
+def test_keyset_pages_cover_every_row_once_newest_first(client, rest):
+    ids, cursor = [], None
+    while True:
+        page = fetch_page("campaigns", "u1", "name", limit=40, cursor=cursor, client=client)
+        ids += [row["id"] for row in page["rows"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == list(range(249, -1, -1))
+    assert len(rest.requests) == 7
+    select = rest.requests[0].url.params["select"]
+    assert select == "name,created_at,id"
+
+
+def test_iter_rows_is_lazy(client, rest):
+    rows = iter_rows("campaigns", "u1", page_size=10, client=client)
+    first = [next(rows)["id"] for _ in range(10)]
+    assert first == list(range(249, 239, -1))
+    assert len(rest.requests) == 1
+
+
+def test_get_all_without_limit_is_one_request(client, rest, monkeypatch):
+    monkeypatch.setattr(supabase_client, "get_client", lambda: client)
+    rows = supabase_client.CampaignDB.get_all("u1")
+    assert len(rows) == 250
+    assert len(rest.requests) == 1
+    assert "limit" not in rest.requests[0].url.params
+
+
+def test_fetch_rows_with_limit(client, rest):
+    assert [row["id"] for row in fetch_rows("campaigns", "u1", limit=3, client=client)] == [249, 248, 247]
+    assert rest.requests[0].url.params["limit"] == "3"
+
+
+def test_write_many_groups_by_column_set_and_keeps_input_order(client, rest):
+    rows = [{"name": "a"}, {"name": "b", "status": "active"}, {"name": "c"}, {"status": "draft", "name": "d"}]
+    results = write_many("campaigns", rows, client=client)
+
+    assert [result["name"] for result in results] == ["a", "b", "c", "d"]
+    assert len(rest.requests) == 2
+    assert sorted(len(json.loads(request.content)) for request in rest.requests) == [2, 2]
+
+
+def test_write_many_chunks_by_rows_and_bytes(client, rest, monkeypatch):
+    monkeypatch.setattr(supabase_client, "BATCH_MAX_ROWS", 2)
+    results = write_many("campaigns", [{"name": f"c{i}"} for i in range(5)], client=client)
+    assert len(results) == 5 and len(rest.requests) == 3
+
+    rows = [(i, {"name": "x" * 40}) for i in range(6)]
+    batches = list(chunk_rows(rows, max_rows=100, max_bytes=120))
+    assert [len(batch) for batch in batches] == [2, 2, 2]
+
+
+def test_write_many_reports_errors_only_for_the_failed_batch(client, rest, monkeypatch):
+    monkeypatch.setattr(supabase_client, "BATCH_MAX_ROWS", 2)
+    results = write_many("campaigns", [{"name": "ok1"}, {"name": "ok2"}, {"name": "bad"}, {"name": "ok3"}],
+                         client=client)
+    assert [("error" in result) for result in results] == [False, False, True, True]
+
+
+def test_upsert_many_sends_on_conflict(client, rest):
+    write_many("user_preferences", [{"user_id": "u1", "theme": "dark"}], upsert=True, on_conflict="user_id",
+               client=client)
+    request = rest.requests[0]
+    assert request.url.params["on_conflict"] == "user_id"
+    assert "resolution=merge-duplicates" in request.headers["prefer"]
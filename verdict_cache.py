@@ -0,0 +1,82 @@
+"""
+Feature-keyed cache for LLM trading verdicts.
+ai_ml_strategy asks Gemini for a recommendation based on a handful of
+features. Requests whose features fall into the same quantized buckets
+reuse the stored answer until it expires or is evicted (LRU).
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """TTL + LRU cache keyed on symbol and bucketed strategy features"""
+
+    def __init__(self, ttl=None, max_entries=None, price_step_pct=None, volatility_step=None):
+        self.ttl = ttl or float(os.getenv("LLM_CACHE_TTL", "900"))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_SIZE", "1024"))
+        self.price_step_pct = price_step_pct or float(os.getenv("LLM_CACHE_PRICE_STEP_PCT", "1.0"))
+        self.volatility_step = volatility_step or float(os.getenv("LLM_CACHE_VOLATILITY_STEP", "0.25"))
+        self._entries = OrderedDict()  # key -> (verdict, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.llm_calls = 0
+
+    def key(self, symbol, price, price_trend, volume_trend, volatility):
+        """Quantize features so small moves map to the same entry.
+
+        Price uses log buckets of price_step_pct percent; volatility uses
+        fixed steps of volatility_step percentage points.
+        """
+        price_bucket = round(math.log(price) / math.log1p(self.price_step_pct / 100)) if price > 0 else 0
+        volatility_bucket = round(volatility / self.volatility_step)
+        return (symbol.upper(), price_bucket, price_trend, volume_trend, volatility_bucket)
+
+    def get(self, key):
+        """Return the stored verdict, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            verdict, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def put(self, key, verdict):
+        """Store a fresh verdict from the LLM"""
+        with self._lock:
+            self.llm_calls += 1
+            self._entries[key] = (verdict, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'llm_calls': self.llm_calls,
+                'llm_calls_avoided': self.hits,
+            }